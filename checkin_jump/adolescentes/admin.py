@@ -1,12 +1,13 @@
 from django.contrib import admin
 from django.contrib.auth.models import User, Group
 from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin, GroupAdmin as DjangoGroupAdmin
-from .models import Adolescente, DiaEvento, Presenca, PequenoGrupo, Imperio
+from .models import Adolescente, Convidador, DiaEvento, Presenca, PequenoGrupo, Imperio, TarefaExportacao, gerar_token_checkin
 
 from django import forms
 from django.contrib import messages
 from django.contrib.admin.helpers import ActionForm
 from django.http import HttpResponse
+from django.shortcuts import redirect
 from django.template.response import TemplateResponse
 import csv
 from django.contrib.auth.tokens import default_token_generator
@@ -14,6 +15,8 @@ from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 from django.urls import reverse
 from django.conf import settings
+from .cache_utils import invalidar_dados
+from . import exports, tarefas
 
 
 class PresencaInline(admin.TabularInline):
@@ -72,6 +75,8 @@ class AdolescenteAdmin(admin.ModelAdmin):
         "definir_imperio",
         "definir_pg_e_imperio",
         "exportar_csv",
+        "exportar_xlsx",
+        "gerar_novo_token_checkin",
     ]
 
     @admin.action(description="Definir PG para selecionados")
@@ -85,6 +90,7 @@ class AdolescenteAdmin(admin.ModelAdmin):
             )
             return
         updated = queryset.update(pg=pg_id)
+        invalidar_dados()
         self.message_user(request, f"PG definido para {updated} registros.")
 
     @admin.action(description="Definir Império para selecionados")
@@ -98,6 +104,7 @@ class AdolescenteAdmin(admin.ModelAdmin):
             )
             return
         updated = queryset.update(imperio=imperio_id)
+        invalidar_dados()
         self.message_user(request, f"Império definido para {updated} registros.")
 
     @admin.action(description="Definir PG e Império para selecionados")
@@ -119,23 +126,43 @@ class AdolescenteAdmin(admin.ModelAdmin):
         if imperio_id:
             data["imperio"] = imperio_id
         updated = queryset.update(**data)
+        invalidar_dados()
         self.message_user(request, f"Atualização em massa aplicada a {updated} registros.")
 
+    @admin.action(description="Gerar novo QR de crachá (invalida os impressos)")
+    def gerar_novo_token_checkin(self, request, queryset):
+        adolescentes = list(queryset.only("id"))
+        for adolescente in adolescentes:
+            adolescente.token_checkin = gerar_token_checkin()
+        Adolescente.objects.bulk_update(adolescentes, ["token_checkin"], batch_size=500)
+        self.message_user(request, f"Novo QR gerado para {len(adolescentes)} registros.")
+
+    def _exportar(self, request, queryset, formato):
+        # Seleções grandes viram tarefa em segundo plano (não seguram o worker)
+        if queryset.count() > tarefas.limite_sincrono():
+            tarefa = tarefas.solicitar_exportacao(
+                "adolescentes_admin",
+                {"ids": sorted(queryset.values_list("pk", flat=True)), "formato": formato},
+                f"adolescentes.{formato}",
+                request.user,
+            )
+            self.message_user(request, "Exportação iniciada em segundo plano.")
+            return redirect("tarefa_exportacao", tarefa.pk)
+        linhas = exports.linhas_adolescentes_admin(queryset, tipado=formato == "xlsx")
+        response = HttpResponse(
+            b"".join(exports.conteudo_exportacao(linhas, formato, bom=False, planilha="Adolescentes")),
+            content_type=exports.content_type_exportacao(formato),
+        )
+        response["Content-Disposition"] = f'attachment; filename="adolescentes.{formato}"'
+        return response
+
     @admin.action(description="Exportar CSV (nome, sobrenome, PG, Império, nascimento)")
     def exportar_csv(self, request, queryset):
-        response = HttpResponse(content_type="text/csv; charset=utf-8")
-        response["Content-Disposition"] = 'attachment; filename="adolescentes.csv"'
-        writer = csv.writer(response)
-        writer.writerow(["Nome", "Sobrenome", "PG", "Império", "Data de Nascimento"])
-        for a in queryset.select_related("pg", "imperio"):
-            writer.writerow([
-                a.nome,
-                a.sobrenome,
-                a.pg.nome if a.pg else "",
-                a.imperio.nome if a.imperio else "",
-                a.data_nascimento.strftime("%Y-%m-%d") if a.data_nascimento else "",
-            ])
-        return response
+        return self._exportar(request, queryset, "csv")
+
+    @admin.action(description="Exportar XLSX (nome, sobrenome, PG, Império, nascimento)")
+    def exportar_xlsx(self, request, queryset):
+        return self._exportar(request, queryset, "xlsx")
 
 admin.site.register(DiaEvento)
 admin.site.register(Presenca)
@@ -310,3 +337,22 @@ except admin.sites.NotRegistered:
     pass
 admin.site.register(Group, CustomGroupAdmin)
 
+
+@admin.register(TarefaExportacao)
+class TarefaExportacaoAdmin(admin.ModelAdmin):
+    list_display = ("nome_arquivo", "tipo", "status", "total_linhas", "criado_por", "criado_em", "concluido_em")
+    list_filter = ("status", "tipo")
+    readonly_fields = ("chave", "parametros", "erro", "criado_em", "concluido_em")
+
+
+@admin.register(Convidador)
+class ConvidadorAdmin(admin.ModelAdmin):
+    list_display = ("nome", "ano", "adolescente", "criado_em")
+    list_filter = ("ano",)
+    search_fields = ("nome", "chave")
+    # Convidadores são criados pela resolução do "convidado por"; aqui só se corrige o vínculo
+    readonly_fields = ("nome", "ano", "chave", "fonetica", "criado_em")
+    raw_id_fields = ("adolescente",)
+
+    def has_add_permission(self, request):
+        return False
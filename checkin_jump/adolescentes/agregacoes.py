@@ -0,0 +1,150 @@
+"""
+Agregações de presença para o dashboard e relatórios: médias por grupo
+(PG / Império) e séries temporais por período.
+
+A média de um grupo é o número de presenças dos seus integrantes no período
+dividido pelo número de DiaEventos do período (e não pelos dias em que o grupo
+teve algum registro), sempre em ponto flutuante.
+"""
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, TruncMonth, TruncQuarter, TruncWeek
+
+from .models import Adolescente, DiaEvento, Imperio, PequenoGrupo, Presenca
+
+# Modelo do grupo e campo do Adolescente que aponta para ele
+GRUPOS = {
+    'pg': (PequenoGrupo, 'pg'),
+    'imperio': (Imperio, 'imperio'),
+}
+
+
+def _contagem(queryset, campo):
+    """Subquery com a contagem de ``queryset`` para o grupo da linha externa (0 se vazio)."""
+    subquery = queryset.order_by().values(campo).annotate(total=Count('id')).values('total')
+    return Coalesce(Subquery(subquery, output_field=IntegerField()), 0)
+
+
+def media_presenca_por_grupo(ano, grupo, eventos):
+    """
+    Presença por grupo no conjunto ``eventos`` (queryset de DiaEvento).
+
+    Uma única query sobre os grupos do ano: integrantes e presenças vêm de
+    subqueries correlacionadas separadas, então as contagens não se multiplicam
+    entre si, e grupos ainda sem integrantes aparecem com zero.
+
+    Retorna lista de dicts ordenada pelas presenças (desc):
+    ``{id, nome, membros, presencas, media, taxa}``, onde ``media`` é a média
+    de presentes por evento e ``taxa`` o percentual de presença dos integrantes.
+    """
+    modelo, campo = GRUPOS[grupo]
+    evento_ids = list(eventos.values_list('id', flat=True))
+    total_eventos = len(evento_ids)
+    membros = Adolescente.objects.filter(ano=ano, **{campo: OuterRef('pk')})
+    presencas = Presenca.objects.filter(
+        presente=True, dia_id__in=evento_ids, adolescente__ano=ano, **{f'adolescente__{campo}': OuterRef('pk')},
+    )
+    linhas = (
+        modelo.objects.filter(ano=ano)
+        .annotate(membros=_contagem(membros, campo), presencas=_contagem(presencas, f'adolescente__{campo}'))
+        .values('id', 'nome', 'membros', 'presencas')
+    )
+
+    resultado = []
+    for linha in linhas:
+        membros = linha['membros']
+        presencas = linha['presencas']
+        resultado.append({
+            'id': linha['id'],
+            'nome': linha['nome'],
+            'membros': membros,
+            'presencas': presencas,
+            'media': round(presencas / total_eventos, 1) if total_eventos else 0.0,
+            'taxa': round(presencas / (membros * total_eventos) * 100, 1) if total_eventos and membros else 0.0,
+        })
+    resultado.sort(key=lambda item: (-item['presencas'], item['nome']))
+    return resultado
+
+
+# --- Séries temporais de presença por período ---
+
+TRUNCAMENTOS = {
+    'semana': TruncWeek,
+    'mes': TruncMonth,
+    'trimestre': TruncQuarter,
+}
+
+
+def _rotulo_periodo(inicio, periodo):
+    if periodo == 'semana':
+        return inicio.strftime('%d/%m/%Y')
+    if periodo == 'mes':
+        return inicio.strftime('%m/%Y')
+    return f'T{(inicio.month - 1) // 3 + 1}/{inicio.year}'
+
+
+def media_movel(valores, janela):
+    """Média móvel simples (None até completar a primeira janela)."""
+    resultado = []
+    soma = 0.0
+    for i, valor in enumerate(valores):
+        soma += valor
+        if i >= janela:
+            soma -= valores[i - janela]
+        resultado.append(round(soma / janela, 1) if i >= janela - 1 else None)
+    return resultado
+
+
+def serie_presencas(periodo, ano=None, data_inicio=None, data_fim=None, janela=4):
+    """
+    Série de presenças agrupada por semana/mês/trimestre, truncando as datas no
+    banco: duas queries agrupadas (eventos e presenças por período) cujo custo
+    de transferência depende do número de períodos, não de dias.
+
+    Sem ``data_inicio``/``data_fim`` usa os eventos do ``ano``; com período
+    explícito, o intervalo pode atravessar anos.
+    """
+    truncar = TRUNCAMENTOS[periodo]
+    filtro_dias = {}
+    if data_inicio or data_fim:
+        if data_inicio:
+            filtro_dias['data__gte'] = data_inicio
+        if data_fim:
+            filtro_dias['data__lte'] = data_fim
+    else:
+        filtro_dias['ano'] = ano
+
+    eventos = (
+        DiaEvento.objects.filter(**filtro_dias)
+        .annotate(periodo=truncar('data'))
+        .values('periodo')
+        .annotate(total=Count('id'))
+        .order_by('periodo')
+    )
+    presentes = dict(
+        Presenca.objects.filter(presente=True, **{f'dia__{campo}': valor for campo, valor in filtro_dias.items()})
+        .annotate(periodo=truncar('dia__data'))
+        .values('periodo')
+        .annotate(total=Count('id'))
+        .order_by()
+        .values_list('periodo', 'total')
+    )
+
+    inicios, total_eventos, total_presentes, medias = [], [], [], []
+    for linha in eventos:
+        inicio = linha['periodo']
+        inicios.append(inicio)
+        total_eventos.append(linha['total'])
+        total_presentes.append(presentes.get(inicio, 0))
+        medias.append(round(total_presentes[-1] / linha['total'], 1))
+
+    janela = max(int(janela or 1), 1)
+    return {
+        'periodo': periodo,
+        'janela': janela,
+        'labels': [_rotulo_periodo(inicio, periodo) for inicio in inicios],
+        'inicio': [inicio.isoformat() for inicio in inicios],
+        'eventos': total_eventos,
+        'presentes': total_presentes,
+        'media': medias,
+        'media_movel': media_movel(medias, janela),
+    }
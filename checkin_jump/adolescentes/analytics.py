@@ -0,0 +1,228 @@
+"""
+Análises de retenção e coortes sobre a matriz de presenças.
+
+As presenças de um ano são carregadas em uma matriz booleana densa
+(adolescentes × DiaEvento, em ordem cronológica) com 3 queries; todas as
+métricas são calculadas com operações vetorizadas do NumPy.
+"""
+import numpy as np
+
+from .cache_utils import obter_ou_calcular, TIMEOUT_LONGO
+from .models import Adolescente, DiaEvento, Presenca, PequenoGrupo, Imperio
+
+# Janelas (em semanas) usadas para a taxa de retorno das coortes
+JANELAS_RETORNO = (2, 4, 8)
+# Pontos da curva de retenção (semanas após a primeira visita)
+SEMANAS_CURVA = tuple(range(1, 13))
+
+
+class MatrizPresenca:
+    """Matriz booleana de presenças de um ano e os metadados de linhas/colunas."""
+
+    def __init__(self, adolescente_ids, pg_ids, imperio_ids, dia_ids, datas, presente):
+        self.adolescente_ids = adolescente_ids  # int64[n]
+        self.pg_ids = pg_ids                    # int64[n] (0 = sem PG)
+        self.imperio_ids = imperio_ids          # int64[n] (0 = sem Império)
+        self.dia_ids = dia_ids                  # int64[d], ordem cronológica
+        self.datas = datas                      # datetime64[D][d]
+        self.presente = presente                # bool[n, d]
+
+    @property
+    def vazia(self):
+        return self.presente.size == 0
+
+    def primeira_visita(self):
+        """Índice da coluna da primeira presença de cada adolescente (-1 se nunca veio)."""
+        veio = self.presente.any(axis=1)
+        return np.where(veio, self.presente.argmax(axis=1), -1)
+
+    def ultima_visita(self):
+        """Índice da coluna da última presença de cada adolescente (-1 se nunca veio)."""
+        veio = self.presente.any(axis=1)
+        n_dias = self.presente.shape[1]
+        return np.where(veio, n_dias - 1 - self.presente[:, ::-1].argmax(axis=1), -1)
+
+
+def carregar_matriz(ano, adolescente_ids=None, ate=None):
+    """
+    Monta a matriz de presenças do ano (sem cache). Opcionalmente restrita a
+    alguns adolescentes e aos dias até a data ``ate`` (inclusive).
+    """
+    dias = DiaEvento.objects.filter(ano=ano)
+    if ate is not None:
+        dias = dias.filter(data__lte=ate)
+    dias = list(dias.order_by('data').values_list('id', 'data'))
+    filtro_ids = None if adolescente_ids is None else list(adolescente_ids)
+    adolescentes = Adolescente.objects.filter(ano=ano)
+    if filtro_ids is not None:
+        adolescentes = adolescentes.filter(id__in=filtro_ids)
+    adolescentes = list(adolescentes.order_by('id').values_list('id', 'pg_id', 'imperio_id'))
+    dia_ids = np.array([d[0] for d in dias], dtype=np.int64)
+    datas = np.array([d[1] for d in dias], dtype='datetime64[D]')
+    adolescente_ids = np.array([a[0] for a in adolescentes], dtype=np.int64)
+    pg_ids = np.array([a[1] or 0 for a in adolescentes], dtype=np.int64)
+    imperio_ids = np.array([a[2] or 0 for a in adolescentes], dtype=np.int64)
+
+    presente = np.zeros((len(adolescente_ids), len(dia_ids)), dtype=bool)
+    if len(adolescente_ids) and len(dia_ids):
+        presencas = Presenca.objects.filter(dia__ano=ano, adolescente__ano=ano, presente=True)
+        if ate is not None:
+            presencas = presencas.filter(dia__data__lte=ate)
+        if filtro_ids is not None:
+            presencas = presencas.filter(adolescente_id__in=filtro_ids)
+        pares = np.array(
+            list(presencas.values_list('adolescente_id', 'dia_id')),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        if len(pares):
+            # dia_ids não está ordenado por id, então mapeamos via argsort
+            ordem_dias = np.argsort(dia_ids)
+            linhas = np.searchsorted(adolescente_ids, pares[:, 0])
+            colunas = ordem_dias[np.searchsorted(dia_ids[ordem_dias], pares[:, 1])]
+            presente[linhas, colunas] = True
+
+    return MatrizPresenca(adolescente_ids, pg_ids, imperio_ids, dia_ids, datas, presente)
+
+
+def obter_matriz(ano):
+    """Matriz de presenças do ano, cacheada pela versão dos dados."""
+    arrays = obter_ou_calcular(
+        'matriz_presenca', [ano],
+        lambda: vars(carregar_matriz(ano)),
+        timeout=TIMEOUT_LONGO,
+    )
+    return MatrizPresenca(**arrays)
+
+
+def coortes_primeira_visita(matriz, janelas=JANELAS_RETORNO):
+    """
+    Agrupa os adolescentes pelo mês da primeira visita e calcula, para cada
+    janela de N semanas, quantos voltaram pelo menos uma vez nesse intervalo.
+    """
+    if matriz.vazia:
+        return []
+    primeira = matriz.primeira_visita()
+    veio = primeira >= 0
+    if not veio.any():
+        return []
+
+    presente = matriz.presente[veio]
+    data_primeira = matriz.datas[primeira[veio]]
+    mes_primeira = data_primeira.astype('datetime64[M]')
+    ultima_data = matriz.datas[-1]
+
+    coortes = []
+    meses, inverso = np.unique(mes_primeira, return_inverse=True)
+    for janela in janelas:
+        limite = data_primeira + np.timedelta64(7 * janela, 'D')
+        # (n × d): colunas estritamente após a primeira visita e dentro da janela
+        na_janela = (matriz.datas[None, :] > data_primeira[:, None]) & (matriz.datas[None, :] <= limite[:, None])
+        voltou = (presente & na_janela).any(axis=1)
+        # Só conta como elegível quem já teve a janela inteira decorrida
+        elegivel = limite <= ultima_data
+        coortes.append((
+            janela,
+            np.bincount(inverso, weights=voltou & elegivel, minlength=len(meses)),
+            np.bincount(inverso, weights=elegivel, minlength=len(meses)),
+        ))
+
+    novos = np.bincount(inverso, minlength=len(meses))
+    resultado = []
+    for i, mes in enumerate(meses):
+        item = {'mes': str(mes), 'novos': int(novos[i]), 'retorno': {}}
+        for janela, voltaram, elegiveis in coortes:
+            item['retorno'][str(janela)] = {
+                'voltaram': int(voltaram[i]),
+                'elegiveis': int(elegiveis[i]),
+                'taxa': round(float(voltaram[i] / elegiveis[i]) * 100, 1) if elegiveis[i] else None,
+            }
+        resultado.append(item)
+    return resultado
+
+
+def curva_retencao(matriz, semanas=SEMANAS_CURVA):
+    """
+    Retenção "rolling": percentual dos adolescentes que ainda compareceram
+    em algum evento N ou mais semanas após a primeira visita.
+    """
+    if matriz.vazia:
+        return []
+    primeira = matriz.primeira_visita()
+    veio = primeira >= 0
+    if not veio.any():
+        return []
+    data_primeira = matriz.datas[primeira[veio]]
+    data_ultima = matriz.datas[matriz.ultima_visita()[veio]]
+    ultima_data = matriz.datas[-1]
+
+    offsets = np.array([7 * s for s in semanas], dtype='timedelta64[D]')
+    marcos = data_primeira[:, None] + offsets[None, :]    # (n × s)
+    elegivel = marcos <= ultima_data
+    retido = (data_ultima[:, None] >= marcos) & elegivel
+    total_elegivel = elegivel.sum(axis=0)
+    total_retido = retido.sum(axis=0)
+    return [
+        {
+            'semana': int(s),
+            'elegiveis': int(total_elegivel[i]),
+            'taxa': round(float(total_retido[i] / total_elegivel[i]) * 100, 1) if total_elegivel[i] else None,
+        }
+        for i, s in enumerate(semanas)
+    ]
+
+
+def resumo_por_grupo(matriz, grupo_ids, nomes, janela=4):
+    """
+    Métricas por PG/Império: membros, ativos no ano, taxa média de presença
+    e taxa de retorno em ``janela`` semanas após a primeira visita.
+    """
+    if len(grupo_ids) == 0:
+        return []
+    n_dias = matriz.presente.shape[1]
+    grupos, inverso = np.unique(grupo_ids, return_inverse=True)
+    membros = np.bincount(inverso, minlength=len(grupos))
+    presencas = matriz.presente.sum(axis=1)
+    ativos = np.bincount(inverso, weights=presencas > 0, minlength=len(grupos))
+    soma_presencas = np.bincount(inverso, weights=presencas, minlength=len(grupos))
+
+    voltou = np.zeros(len(grupo_ids), dtype=bool)
+    elegivel = np.zeros(len(grupo_ids), dtype=bool)
+    if n_dias:
+        primeira = matriz.primeira_visita()
+        veio = primeira >= 0
+        data_primeira = matriz.datas[np.maximum(primeira, 0)]
+        limite = data_primeira + np.timedelta64(7 * janela, 'D')
+        na_janela = (matriz.datas[None, :] > data_primeira[:, None]) & (matriz.datas[None, :] <= limite[:, None])
+        elegivel = veio & (limite <= matriz.datas[-1])
+        voltou = (matriz.presente & na_janela).any(axis=1) & elegivel
+    total_voltou = np.bincount(inverso, weights=voltou, minlength=len(grupos))
+    total_elegivel = np.bincount(inverso, weights=elegivel, minlength=len(grupos))
+
+    resultado = []
+    for i, grupo_id in enumerate(grupos):
+        resultado.append({
+            'id': int(grupo_id) or None,
+            'nome': nomes.get(int(grupo_id), 'Sem grupo'),
+            'membros': int(membros[i]),
+            'ativos': int(ativos[i]),
+            'taxa_presenca': round(float(soma_presencas[i] / (membros[i] * n_dias)) * 100, 1) if n_dias else 0,
+            'taxa_retorno': round(float(total_voltou[i] / total_elegivel[i]) * 100, 1) if total_elegivel[i] else None,
+        })
+    resultado.sort(key=lambda item: (-item['taxa_presenca'], item['nome']))
+    return resultado
+
+
+def resumo_retencao(ano):
+    """Seção de retenção do dashboard (JSON-serializável)."""
+    matriz = obter_matriz(ano)
+    nomes_pg = dict(PequenoGrupo.objects.filter(ano=ano).values_list('id', 'nome'))
+    nomes_imperio = dict(Imperio.objects.filter(ano=ano).values_list('id', 'nome'))
+    return {
+        'total_adolescentes': int(len(matriz.adolescente_ids)),
+        'total_eventos': int(len(matriz.dia_ids)),
+        'janelas': list(JANELAS_RETORNO),
+        'coortes': coortes_primeira_visita(matriz),
+        'curva': curva_retencao(matriz),
+        'por_pg': resumo_por_grupo(matriz, matriz.pg_ids, nomes_pg),
+        'por_imperio': resumo_por_grupo(matriz, matriz.imperio_ids, nomes_imperio),
+    }
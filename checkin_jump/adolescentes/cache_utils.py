@@ -0,0 +1,148 @@
+"""
+Utilitários de cache compartilhados pelas views.
+
+A invalidação é feita por uma "versão dos dados" global: qualquer escrita
+relevante (check-in, cadastro, contagens...) incrementa a versão, e os
+resultados em cache guardam a versão com que foram calculados.
+"""
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+DATA_VERSION_KEY = 'adolescentes:data_version'
+STATS_PREFIX = 'adolescentes:cache_stats'
+
+TIMEOUT_CURTO = 300  # 5 minutos
+TIMEOUT_MEDIO = 1800  # 30 minutos
+TIMEOUT_LONGO = 3600  # 1 hora
+
+# Tempo máximo que um recálculo pode segurar o lock (e que os demais esperam)
+LOCK_TIMEOUT = 30
+LOCK_ESPERA = 0.1
+
+
+def _relogio():
+    return time.time_ns() // 1000
+
+
+def get_data_version():
+    """Retorna a versão atual dos dados."""
+    versao = cache.get(DATA_VERSION_KEY)
+    if versao is None:
+        # Semente baseada no relógio: se o cache for limpo, a versão nunca volta
+        # a um valor antigo (o que faria entradas velhas parecerem atuais).
+        cache.add(DATA_VERSION_KEY, _relogio(), timeout=None)
+        versao = cache.get(DATA_VERSION_KEY, 0)
+    return versao
+
+
+def bump_data_version():
+    """
+    Avança a versão dos dados, invalidando todos os resultados em cache.
+
+    Não usa ``cache.incr``: no DatabaseCache ele é um get + set sem trava, e dois
+    workers incrementando juntos gravariam o mesmo número (o segundo incremento
+    se perderia e um resultado calculado entre os dois pareceria atual). Com o
+    relógio em microssegundos cada incremento gera um valor novo e crescente.
+    """
+    versao = max(get_data_version() + 1, _relogio())
+    cache.set(DATA_VERSION_KEY, versao, timeout=None)
+    return versao
+
+
+def invalidar_dados():
+    """
+    Invalida o cache agora e novamente no commit da transação corrente.
+    O segundo incremento descarta resultados calculados por outra requisição
+    enquanto a transação ainda não estava visível.
+    """
+    bump_data_version()
+    transaction.on_commit(bump_data_version)
+
+
+def hash_partes(partes):
+    """Hash estável de partes JSON-serializáveis (usado em chaves e ETags)."""
+    bruto = json.dumps(partes, sort_keys=True, default=str)
+    return hashlib.md5(bruto.encode('utf-8')).hexdigest()
+
+
+def montar_chave(nome, partes):
+    """Chave estável (e segura para memcached) a partir de partes JSON-serializáveis."""
+    return f'adolescentes:{nome}:{hash_partes(partes)}'
+
+
+def _registrar(nome, tipo):
+    chave = f'{STATS_PREFIX}:{nome}:{tipo}'
+    if not cache.add(chave, 1, timeout=None):
+        try:
+            cache.incr(chave)
+        except ValueError:
+            cache.set(chave, 1, timeout=None)
+
+
+def estatisticas_cache(nome):
+    """Contadores de hit/miss/stale de um cache nomeado."""
+    hits = cache.get(f'{STATS_PREFIX}:{nome}:hit', 0)
+    misses = cache.get(f'{STATS_PREFIX}:{nome}:miss', 0)
+    stale = cache.get(f'{STATS_PREFIX}:{nome}:stale', 0)
+    total = hits + misses + stale
+    return {
+        'hits': hits,
+        'misses': misses,
+        'stale': stale,
+        'hit_rate': round((hits + stale) / total, 3) if total else 0,
+    }
+
+
+def obter_ou_calcular(nome, partes, calcular, timeout=TIMEOUT_MEDIO,
+                      stale_timeout=TIMEOUT_LONGO, permitir_stale=True):
+    """
+    Retorna o valor em cache para (partes, versão dos dados) ou o recalcula.
+
+    - Apenas uma requisição recalcula por vez (lock via ``cache.add``); as demais
+      esperam o resultado em vez de repetir as mesmas queries.
+    - Com ``permitir_stale``, quem não obteve o lock recebe imediatamente o último
+      valor calculado (mesmo de uma versão anterior) enquanto o recálculo ocorre.
+    - O valor precisa ser JSON-serializável (ou ao menos serializável pelo backend).
+    """
+    versao = get_data_version()
+    chave = montar_chave(nome, partes)
+    envelope = cache.get(chave)
+    if envelope is not None and envelope['versao'] == versao and envelope['expira_em'] > time.time():
+        _registrar(nome, 'hit')
+        return envelope['valor']
+
+    chave_lock = f'{chave}:lock'
+    if cache.add(chave_lock, 1, timeout=LOCK_TIMEOUT):
+        try:
+            _registrar(nome, 'miss')
+            valor = calcular()
+            cache.set(chave, {
+                'versao': versao,
+                'expira_em': time.time() + timeout,
+                'valor': valor,
+            }, timeout + stale_timeout)
+            return valor
+        finally:
+            cache.delete(chave_lock)
+
+    if envelope is not None and permitir_stale:
+        _registrar(nome, 'stale')
+        return envelope['valor']
+
+    # Outro processo está recalculando: aguardar o resultado dele
+    limite = time.monotonic() + LOCK_TIMEOUT
+    while time.monotonic() < limite:
+        time.sleep(LOCK_ESPERA)
+        envelope = cache.get(chave)
+        if envelope is not None and envelope['versao'] >= versao:
+            _registrar(nome, 'hit')
+            return envelope['valor']
+        if cache.get(chave_lock) is None:
+            break
+
+    _registrar(nome, 'miss')
+    return calcular()
@@ -0,0 +1,187 @@
+"""
+Resolução de ``VisitanteEvento.convidado_por`` (texto livre) para Convidador.
+
+O nome digitado é comparado com os convidadores do ano do evento, nesta ordem:
+
+1. nome normalizado igual (sem acentos, caixa ou espaços extras);
+2. mesma chave fonética ("Thiago"/"Tiago", "Luiz"/"Luís", "Sousa"/"Souza");
+3. só o primeiro nome foi digitado e exatamente um convidador do mesmo evento
+   tem nome completo começando por ele ("Ana" -> "Ana Souza"). Nunca no
+   sentido inverso: nomes completos diferentes ("Ana Lima", "Ana Souza")
+   não se fundem num "Ana" já existente, qualquer que seja a ordem.
+
+Sem correspondência, um novo Convidador é criado, vinculado ao Adolescente
+do ano com o mesmo nome completo (fonético) quando houver exatamente um.
+
+Com os visitantes apontando para um Convidador (FK indexada), os rankings de
+convites agregam por chave inteira em vez de agrupar pelo texto.
+"""
+import re
+
+from django.db.models import Count, Q
+
+from . import importacao
+from .models import Adolescente, Convidador, VisitanteEvento
+
+# Regras aplicadas em ordem sobre o nome normalizado (maiúsculas são marcadores
+# temporários para não reprocessar o que já foi convertido)
+_REGRAS_FONETICAS = (
+    (r'[^a-z ]', ''),
+    (r'ph', 'f'),
+    (r'lh', 'L'),
+    (r'nh', 'N'),
+    (r'ch|sh', 'X'),
+    (r'h', ''),
+    (r'qu(?=[ei])|q', 'K'),
+    (r'gu(?=[ei])', 'G'),
+    (r'g(?=[ei])', 'j'),
+    (r'c(?=[ei])', 's'),
+    (r'c|k', 'K'),
+    (r'w', 'v'),
+    (r'y', 'i'),
+    (r'z', 's'),
+    (r'([a-zA-Z])\1+', r'\1'),
+)
+
+
+def chave_fonetica(texto):
+    """Chave fonética simplificada (português) de um nome."""
+    chave = importacao.normalizar(texto)
+    for padrao, troca in _REGRAS_FONETICAS:
+        chave = re.sub(padrao, troca, chave)
+    return ' '.join(chave.lower().split())
+
+
+class ResolvedorConvidadores:
+    """
+    Resolve nomes para Convidadores de um ano. Carrega os convidadores (e, se
+    preciso, os adolescentes) do ano uma vez só: use uma instância por lote.
+    ``apps`` (registro de uma migração) troca os models pelos históricos.
+    """
+
+    def __init__(self, ano, apps=None):
+        self.ano = ano
+        if apps is None:
+            self.Adolescente, self.Convidador, self.VisitanteEvento = Adolescente, Convidador, VisitanteEvento
+        else:
+            self.Adolescente = apps.get_model('adolescentes', 'Adolescente')
+            self.Convidador = apps.get_model('adolescentes', 'Convidador')
+            self.VisitanteEvento = apps.get_model('adolescentes', 'VisitanteEvento')
+        self._convidadores = None
+        self._adolescentes = None
+        self._por_evento = None
+
+    def convidadores(self):
+        if self._convidadores is None:
+            self._convidadores = list(self.Convidador.objects.filter(ano=self.ano).order_by('id'))
+        return self._convidadores
+
+    def _adolescente_id(self, fonetica):
+        """Id do único adolescente do ano com esse nome completo (ou nome + último sobrenome)."""
+        if self._adolescentes is None:
+            self._adolescentes = {}
+            for pk, nome, sobrenome in self.Adolescente.objects.filter(ano=self.ano).values_list('id', 'nome', 'sobrenome'):
+                completo = chave_fonetica(f'{nome} {sobrenome}')
+                palavras = completo.split()
+                chaves = {completo, f'{palavras[0]} {palavras[-1]}'} if len(palavras) > 1 else {completo}
+                for chave in chaves:
+                    # Nomes repetidos ficam ambíguos (None)
+                    self._adolescentes[chave] = pk if chave not in self._adolescentes else None
+        return self._adolescentes.get(fonetica)
+
+    def _ids_do_evento(self, evento_id):
+        """Ids dos convidadores que já têm convidados no evento (inclui os resolvidos neste lote)."""
+        if self._por_evento is None:
+            self._por_evento = {}
+            pares = (
+                self.VisitanteEvento.objects.filter(evento__ano=self.ano, convidador__isnull=False)
+                .values_list('evento_id', 'convidador_id').distinct()
+            )
+            for evento, convidador in pares:
+                self._por_evento.setdefault(evento, set()).add(convidador)
+        return self._por_evento.setdefault(evento_id, set())
+
+    def encontrar(self, nome, evento_id=None):
+        """Convidador existente para o nome, sem criar (None se não houver)."""
+        chave, fonetica = importacao.normalizar(nome), chave_fonetica(nome)
+        convidadores = self.convidadores()
+        for convidador in convidadores:
+            if convidador.chave == chave:
+                return convidador
+        for convidador in convidadores:
+            if convidador.fonetica == fonetica:
+                return convidador
+        if evento_id is None or len(fonetica.split()) != 1:
+            return None
+        do_evento = self._ids_do_evento(evento_id)
+        parciais = [c for c in convidadores if c.id in do_evento and c.fonetica.split()[0] == fonetica]
+        return parciais[0] if len(parciais) == 1 else None
+
+    def resolver(self, texto, evento_id=None):
+        """
+        Convidador para o texto digitado, criando um novo se necessário.
+        ``evento_id`` habilita a correspondência só pelo primeiro nome.
+        """
+        nome = ' '.join((texto or '').split())
+        if not nome or not chave_fonetica(nome):
+            return None
+        convidador = self.encontrar(nome, evento_id)
+        if convidador is None:
+            fonetica = chave_fonetica(nome)
+            convidador, _ = self.Convidador.objects.get_or_create(
+                chave=importacao.normalizar(nome), ano=self.ano,
+                defaults={'nome': nome, 'fonetica': fonetica, 'adolescente_id': self._adolescente_id(fonetica)},
+            )
+            self.convidadores().append(convidador)
+        if evento_id is not None:
+            self._ids_do_evento(evento_id).add(convidador.id)
+        return convidador
+
+
+def resolver_visitantes(visitantes, apps=None):
+    """
+    Preenche ``convidador`` dos visitantes (não salva), com um resolvedor por
+    ano. Retorna os visitantes cujo convidador mudou.
+    """
+    resolvedores = {}
+    alterados = []
+    for visitante in visitantes:
+        ano = visitante.evento.ano
+        if ano not in resolvedores:
+            resolvedores[ano] = ResolvedorConvidadores(ano, apps)
+        convidador = resolvedores[ano].resolver(visitante.convidado_por, visitante.evento_id)
+        convidador_id = convidador.id if convidador else None
+        if visitante.convidador_id != convidador_id:
+            visitante.convidador = convidador
+            alterados.append(visitante)
+    return alterados
+
+
+# --- Rankings ---
+
+def _totais_convites():
+    return {
+        'total_convidados': Count('convidados'),
+        'total_presentes': Count('convidados', filter=Q(convidados__presente=True)),
+        'total_migrados': Count('convidados', filter=Q(convidados__migrado=True)),
+    }
+
+
+def ranking_evento(evento):
+    """Convidadores do evento com totais, agregados pela chave do convidador."""
+    return (
+        Convidador.objects.filter(convidados__evento=evento)
+        .annotate(**_totais_convites())
+        .order_by('-total_convidados', 'nome')
+        .values('id', 'nome', 'adolescente', *_totais_convites())
+    )
+
+
+def ranking_ano(ano):
+    """Ranking de convidadores somando todos os eventos especiais do ano (uma query agrupada)."""
+    return (
+        Convidador.objects.filter(ano=ano, convidados__evento__ano=ano)
+        .annotate(**_totais_convites(), total_eventos=Count('convidados__evento', distinct=True))
+        .order_by('-total_convidados', 'nome')
+        .values('id', 'nome', 'adolescente', 'total_eventos', *_totais_convites())
+    )
@@ -0,0 +1,98 @@
+"""
+Crachás com QR Code para o check-in por leitura de câmera.
+
+O QR carrega ``JUMP:<token>``, onde o token é ``Adolescente.token_checkin``
+(aleatório, com índice único): a leitura vira uma busca direta pelo índice em
+vez da busca por nome. O PNG do crachá é gerado com Pillow e guardado no
+cache pela combinação token + textos impressos, então só é refeito quando
+algum deles muda.
+"""
+from io import BytesIO
+
+from django.core.cache import cache
+from PIL import Image, ImageDraw, ImageFont
+
+from .cache_utils import hash_partes, montar_chave
+from .qr import imagem_qr
+
+PREFIXO = 'JUMP:'
+LARGURA = 400
+ALTURA = 560
+TEMPO_CACHE = 60 * 60 * 24 * 7
+
+
+def conteudo_qr(adolescente):
+    return f'{PREFIXO}{adolescente.token_checkin}'
+
+
+def token_do_conteudo(conteudo):
+    """Token lido de um QR (aceita também o token puro). Vazio se não parecer um token."""
+    conteudo = (conteudo or '').strip()
+    if conteudo.startswith(PREFIXO):
+        conteudo = conteudo[len(PREFIXO):]
+    if not conteudo or len(conteudo) > 32:
+        return ''
+    return conteudo
+
+
+def _fonte(tamanho):
+    try:
+        return ImageFont.load_default(size=tamanho)
+    except TypeError:  # Pillow < 10.1 não escala a fonte padrão
+        return ImageFont.load_default()
+
+
+def _texto_centralizado(desenho, y, texto, tamanho):
+    fonte = _fonte(tamanho)
+    # Encolhe nomes compridos até caber na largura do crachá
+    while tamanho > 12 and desenho.textlength(texto, font=fonte) > LARGURA - 32:
+        tamanho -= 2
+        fonte = _fonte(tamanho)
+    largura = desenho.textlength(texto, font=fonte)
+    desenho.text(((LARGURA - largura) / 2, y), texto, fill='black', font=fonte)
+
+
+def _desenhar(conteudo, nome, subtitulo):
+    cracha = Image.new('RGB', (LARGURA, ALTURA), 'white')
+    desenho = ImageDraw.Draw(cracha)
+    desenho.rectangle((0, 0, LARGURA - 1, ALTURA - 1), outline='black', width=2)
+
+    qr = imagem_qr(conteudo, escala=1, borda=4)
+    escala = (LARGURA - 80) // qr.width
+    qr = qr.resize((qr.width * escala, qr.height * escala), Image.NEAREST)
+    cracha.paste(qr.convert('RGB'), ((LARGURA - qr.width) // 2, 32))
+
+    y = 32 + qr.height + 24
+    _texto_centralizado(desenho, y, nome, 36)
+    if subtitulo:
+        _texto_centralizado(desenho, y + 52, subtitulo, 24)
+
+    saida = BytesIO()
+    cracha.save(saida, format='PNG', optimize=True)
+    return saida.getvalue()
+
+
+def textos_cracha(adolescente):
+    """(nome, subtítulo) impressos no crachá."""
+    nome = f'{adolescente.nome} {adolescente.sobrenome}'.strip()
+    subtitulo = adolescente.pg.nome if adolescente.pg_id and adolescente.pg else ''
+    return nome, subtitulo
+
+
+def _partes(adolescente):
+    return [adolescente.token_checkin, *textos_cracha(adolescente)]
+
+
+def versao_cracha(adolescente):
+    """Hash do que vai impresso no crachá (ETag do PNG)."""
+    return hash_partes(_partes(adolescente))
+
+
+def png_cracha(adolescente):
+    """Bytes PNG do crachá do adolescente (cacheado pela versão)."""
+    chave = montar_chave('cracha', _partes(adolescente))
+    png = cache.get(chave)
+    if png is None:
+        png = _desenhar(conteudo_qr(adolescente), *textos_cracha(adolescente))
+        cache.set(chave, png, TEMPO_CACHE)
+    return png
@@ -0,0 +1,359 @@
+"""
+Exportações em streaming (memória constante, primeiro byte imediato).
+
+As funções daqui produzem geradores de bytes/strings para serem usados com
+``StreamingHttpResponse``; nenhuma delas materializa o resultado inteiro.
+"""
+import csv
+import io
+import zipfile
+from itertools import groupby
+
+import numpy as np
+from django.db.models import Count, FilteredRelation, Q
+from django.http import StreamingHttpResponse
+
+from . import convidadores, xlsx
+from .cache_utils import obter_ou_calcular
+from .models import Adolescente, DiaEvento, Presenca
+from .xlsx import ZipStream
+
+# Tamanho dos lotes lidos do banco por .iterator()
+CHUNK_SIZE = 2000
+# Adolescentes por bloco (row group) no formato binário colunar
+LINHAS_POR_BLOCO = 1024
+# Formatos de planilha aceitos pelas exportações (?formato=)
+FORMATOS = ('csv', 'xlsx')
+
+
+class Echo:
+    """Pseudo-buffer: csv.writer escreve e o valor é devolvido para o gerador."""
+
+    def write(self, value):
+        return value
+
+
+def linhas_csv(linhas, bom=True):
+    """Converte um iterável de linhas em strings CSV (com BOM UTF-8 opcional)."""
+    writer = csv.writer(Echo())
+    if bom:
+        yield '\ufeff'
+    for linha in linhas:
+        yield writer.writerow(linha)
+
+
+def formato_exportacao(request, padrao='csv'):
+    """Formato pedido em ?formato= (csv ou xlsx)."""
+    formato = request.GET.get('formato', padrao)
+    return formato if formato in FORMATOS else padrao
+
+
+def conteudo_exportacao(linhas, formato='csv', bom=True, planilha='Dados'):
+    """Bytes (em pedaços) das ``linhas`` em CSV (UTF-8) ou XLSX."""
+    if formato == 'xlsx':
+        return xlsx.linhas_xlsx(linhas, planilha)
+    return (parte.encode('utf-8') for parte in linhas_csv(linhas, bom=bom))
+
+
+def content_type_exportacao(formato, content_type_csv='text/csv; charset=utf-8'):
+    return xlsx.CONTENT_TYPE if formato == 'xlsx' else content_type_csv
+
+
+def resposta_exportacao(linhas, nome_arquivo, formato='csv', bom=True,
+                        content_type_csv='text/csv; charset=utf-8', planilha='Dados'):
+    """
+    StreamingHttpResponse com as ``linhas`` em CSV ou XLSX. As linhas devem vir
+    tipadas quando ``formato == 'xlsx'`` (datas como date, números como número).
+    """
+    response = StreamingHttpResponse(
+        conteudo_exportacao(linhas, formato, bom, planilha),
+        content_type=content_type_exportacao(formato, content_type_csv),
+    )
+    response['Content-Disposition'] = f'attachment; filename="{nome_arquivo}.{formato}"'
+    return response
+
+
+# --- Cadastro de adolescentes ---
+
+def _texto(valor):
+    return valor or ''
+
+
+def _data_br(valor):
+    return valor.strftime('%d/%m/%Y') if valor else ''
+
+
+_GENEROS = dict(Adolescente.GENERO_CHOICES)
+
+# campo selecionável -> (cabeçalho, coluna do values_list, formatador)
+CAMPOS_ADOLESCENTE = {
+    'nome': ('Nome', 'nome', None),
+    'sobrenome': ('Sobrenome', 'sobrenome', None),
+    'data_nascimento': ('Data de Nascimento', 'data_nascimento', _data_br),
+    'genero': ('Sexo', 'genero', lambda valor: _GENEROS.get(valor, valor)),
+    'telefone': ('Telefone', 'telefone', _texto),
+    'pg': ('PG', 'pg__nome', _texto),
+    'imperio': ('Império', 'imperio__nome', _texto),
+    'nome_responsavel': ('Nome do Responsável', 'nome_responsavel', _texto),
+    'telefone_responsavel': ('Telefone do Responsável', 'telefone_responsavel', _texto),
+}
+
+
+def compilar_campos(campos, tipado=False):
+    """
+    Prepara a exportação uma única vez: retorna (cabeçalho, colunas do
+    values_list, função que formata uma tupla do banco em linha do arquivo).
+    O ``id`` vai sempre na primeira coluna (mantém o DISTINCT dos filtros de
+    presença por adolescente) e é descartado na formatação.
+    Com ``tipado`` (XLSX), datas seguem como ``date``.
+    Campos desconhecidos são ignorados.
+    """
+    campos = [campo for campo in campos if campo in CAMPOS_ADOLESCENTE]
+    cabecalho = [CAMPOS_ADOLESCENTE[campo][0] for campo in campos]
+    colunas = ['id'] + [CAMPOS_ADOLESCENTE[campo][1] for campo in campos]
+    pares = [
+        (i, CAMPOS_ADOLESCENTE[campo][2])
+        for i, campo in enumerate(campos, start=1)
+        if CAMPOS_ADOLESCENTE[campo][2] is not None
+        and not (tipado and CAMPOS_ADOLESCENTE[campo][2] is _data_br)
+    ]
+
+    def formatar(linha):
+        linha = list(linha[1:])
+        for i, formatador in pares:
+            linha[i - 1] = formatador(linha[i - 1])
+        return linha
+
+    return cabecalho, colunas, formatar
+
+
+def linhas_adolescentes(queryset, campos, tipado=False, chunk_size=CHUNK_SIZE):
+    """Linhas dos adolescentes do queryset, lidas em lotes só com as colunas pedidas."""
+    cabecalho, colunas, formatar = compilar_campos(campos, tipado)
+    yield cabecalho
+    for linha in queryset.values_list(*colunas).iterator(chunk_size=chunk_size):
+        yield formatar(linha)
+
+
+def adolescentes_csv(queryset, campos, chunk_size=CHUNK_SIZE):
+    """CSV (com BOM) dos adolescentes do queryset."""
+    return linhas_csv(linhas_adolescentes(queryset, campos, chunk_size=chunk_size))
+
+
+def linhas_adolescentes_admin(queryset, tipado=False):
+    """Linhas da ação de exportação do admin (nome, sobrenome, PG, Império, nascimento)."""
+    yield ['Nome', 'Sobrenome', 'PG', 'Império', 'Data de Nascimento']
+    colunas = queryset.values_list('nome', 'sobrenome', 'pg__nome', 'imperio__nome', 'data_nascimento')
+    for nome, sobrenome, pg, imperio, nascimento in colunas.iterator(chunk_size=CHUNK_SIZE):
+        if not tipado:
+            nascimento = nascimento.strftime('%Y-%m-%d') if nascimento else ''
+        yield [nome, sobrenome, pg or '', imperio or '', nascimento]
+
+
+# --- Estatísticas de convites de evento especial ---
+
+def estatisticas_convites(evento):
+    """Convidadores do evento, do maior para o menor número de convites."""
+    return convidadores.ranking_evento(evento)
+
+
+def linhas_estatisticas_convites(estatisticas, tipado=False):
+    yield ['Posição', 'Nome', 'Total Convidados', 'Presentes', 'Migrados', 'Taxa Presença (%)']
+    for idx, stat in enumerate(estatisticas, 1):
+        taxa = (stat['total_presentes'] / stat['total_convidados'] * 100) if stat['total_convidados'] > 0 else 0
+        yield [
+            idx,
+            stat['nome'],
+            stat['total_convidados'],
+            stat['total_presentes'],
+            stat['total_migrados'],
+            round(taxa, 1) if tipado else f"{taxa:.1f}",
+        ]
+
+
+def linhas_ranking_convidadores(ranking, tipado=False):
+    yield ['Posição', 'Nome', 'Eventos', 'Total Convidados', 'Presentes', 'Migrados', 'Adolescente Cadastrado']
+    for idx, stat in enumerate(ranking, 1):
+        yield [
+            idx,
+            stat['nome'],
+            stat['total_eventos'],
+            stat['total_convidados'],
+            stat['total_presentes'],
+            stat['total_migrados'],
+            'Sim' if stat['adolescente'] else 'Não',
+        ]
+
+
+# --- Presenças por dia ---
+
+def presentes_por_dia(ano):
+    """{dia_id: presentes} dos DiaEventos do ano, em cache por versão dos dados."""
+    pares = obter_ou_calcular(
+        'presentes_por_dia', [ano],
+        lambda: list(
+            Presenca.objects.filter(dia__ano=ano, presente=True)
+            .values('dia').annotate(total=Count('id')).order_by()
+            .values_list('dia', 'total')
+        ),
+    )
+    return dict(pares)
+
+
+def linhas_presencas_dia(dia, tipado=False):
+    """Linhas (Data, Nome, Presente) de um dia, lidas numa única query ordenada."""
+    yield ['Data', 'Nome', 'Presente']
+    data = dia.data if tipado else dia.data.strftime('%d/%m/%Y')
+    presencas = (
+        Presenca.objects.filter(dia=dia)
+        .order_by('adolescente__nome', 'adolescente__sobrenome', 'adolescente_id')
+        .values_list('adolescente__nome', 'adolescente__sobrenome', 'presente')
+    )
+    for nome, sobrenome, presente in presencas.iterator(chunk_size=CHUNK_SIZE):
+        yield [data, f'{nome} {sobrenome}', 'Sim' if presente else 'Não']
+
+
+def zip_presencas_dias(dias, linhas_por_escrita=500):
+    """
+    ZIP em streaming com um CSV por dia (``presencas_dd_mm_aaaa.csv``) e um
+    ``resumo.csv`` com presentes/ausentes de cada dia, somados durante a escrita.
+    """
+    destino = ZipStream()
+    writer = csv.writer(Echo())
+    resumo = [['Data', 'Título', 'Presentes', 'Ausentes', 'Registros']]
+    with zipfile.ZipFile(destino, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for dia in dias:
+            linhas = linhas_presencas_dia(dia)
+            pendentes = ['\ufeff', writer.writerow(next(linhas))]
+            presentes = registros = 0
+            with zf.open(f'presencas_{dia.data.strftime("%d_%m_%Y")}.csv', 'w', force_zip64=True) as arquivo:
+                for linha in linhas:
+                    registros += 1
+                    presentes += linha[2] == 'Sim'
+                    pendentes.append(writer.writerow(linha))
+                    if len(pendentes) >= linhas_por_escrita:
+                        arquivo.write(''.join(pendentes).encode('utf-8'))
+                        pendentes = []
+                        dados = destino.drenar()
+                        if dados:
+                            yield dados
+                arquivo.write(''.join(pendentes).encode('utf-8'))
+            resumo.append([dia.data.strftime('%d/%m/%Y'), dia.titulo or '', presentes, registros - presentes, registros])
+            yield destino.drenar()
+        zf.writestr('resumo.csv', ''.join(linhas_csv(resumo)))
+    yield destino.drenar()
+
+
+# --- Matriz de presenças (uma linha por adolescente, uma coluna por dia) ---
+
+def dias_do_periodo(ano, data_inicio=None, data_fim=None):
+    """DiaEventos do ano no intervalo (inclusive), em ordem cronológica."""
+    dias = DiaEvento.objects.filter(ano=ano)
+    if data_inicio:
+        dias = dias.filter(data__gte=data_inicio)
+    if data_fim:
+        dias = dias.filter(data__lte=data_fim)
+    return list(dias.order_by('data').values_list('id', 'data', 'titulo'))
+
+
+def iterar_matriz_presencas(ano, dias):
+    """
+    Gera (adolescente_id, nome, sobrenome, pg, imperio, presencas) para cada
+    adolescente do ano, onde ``presencas`` é uma lista de bool alinhada a ``dias``.
+
+    Usa uma única query ordenada: adolescentes com LEFT JOIN nas presenças
+    (presente=True) dos dias do período, lida em lotes com .iterator().
+    """
+    dia_ids = [d[0] for d in dias]
+    posicao = {dia_id: i for i, dia_id in enumerate(dia_ids)}
+    linhas = (
+        Adolescente.objects.filter(ano=ano)
+        .annotate(presencas_periodo=FilteredRelation(
+            'presenca',
+            condition=Q(presenca__dia_id__in=dia_ids, presenca__presente=True),
+        ))
+        .order_by('nome', 'sobrenome', 'id')
+        .values_list('id', 'nome', 'sobrenome', 'pg__nome', 'imperio__nome', 'presencas_periodo__dia_id')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    for adolescente_id, grupo in groupby(linhas, key=lambda linha: linha[0]):
+        presencas = [False] * len(dia_ids)
+        for linha in grupo:
+            if linha[5] is not None:
+                presencas[posicao[linha[5]]] = True
+        yield adolescente_id, linha[1], linha[2], linha[3] or '', linha[4] or '', presencas
+
+
+def linhas_matriz_presencas(ano, dias):
+    """Tabela larga: dados do adolescente, uma coluna 1/0 por dia, total e taxa."""
+    cabecalho = ['Nome', 'Sobrenome', 'PG', 'Império']
+    cabecalho += [data.strftime('%d/%m/%Y') for _, data, _ in dias]
+    cabecalho += ['Total', 'Taxa de Presença (%)']
+    yield cabecalho
+    for _, nome, sobrenome, pg, imperio, presencas in iterar_matriz_presencas(ano, dias):
+        total = sum(presencas)
+        taxa = round(total / len(dias) * 100, 1) if dias else 0
+        yield [nome, sobrenome, pg, imperio] + [1 if p else 0 for p in presencas] + [total, taxa]
+
+
+def matriz_presencas_csv(ano, dias):
+    return linhas_csv(linhas_matriz_presencas(ano, dias))
+
+
+def _escrever_array(zf, nome, array):
+    with zf.open(f'{nome}.npy', 'w', force_zip64=True) as destino:
+        np.lib.format.write_array(destino, np.asarray(array), allow_pickle=False)
+
+
+def matriz_presencas_npz(ano, dias, linhas_por_bloco=LINHAS_POR_BLOCO):
+    """
+    Formato binário colunar: arquivo .npz (legível com ``numpy.load``) gerado em
+    streaming. Os dias vão em ``dias_id``/``dias_data``; os adolescentes em blocos
+    de ``linhas_por_bloco`` linhas, cada bloco com suas colunas
+    (``bloco_00000_id``, ``_nome``, ``_sobrenome``, ``_pg``, ``_imperio``,
+    ``_presente`` como matriz bool linhas × dias e ``_total``).
+    """
+    destino = ZipStream()
+    with zipfile.ZipFile(destino, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        _escrever_array(zf, 'dias_id', np.array([d[0] for d in dias], dtype=np.int64))
+        _escrever_array(zf, 'dias_data', np.array([d[1] for d in dias], dtype='datetime64[D]'))
+        yield destino.drenar()
+
+        linhas = iterar_matriz_presencas(ano, dias)
+        indice = 0
+        while True:
+            bloco = [linha for _, linha in zip(range(linhas_por_bloco), linhas)]
+            if not bloco:
+                break
+            prefixo = f'bloco_{indice:05d}'
+            colunas = list(zip(*bloco))
+            presente = np.array(colunas[5], dtype=bool).reshape(len(bloco), len(dias))
+            _escrever_array(zf, f'{prefixo}_id', np.array(colunas[0], dtype=np.int64))
+            for i, nome in enumerate(('nome', 'sobrenome', 'pg', 'imperio'), start=1):
+                _escrever_array(zf, f'{prefixo}_{nome}', np.array(colunas[i], dtype=str))
+            _escrever_array(zf, f'{prefixo}_presente', presente)
+            _escrever_array(zf, f'{prefixo}_total', presente.sum(axis=1).astype(np.int32))
+            indice += 1
+            yield destino.drenar()
+    yield destino.drenar()
+
+
+def ler_npz_matriz(arquivo):
+    """Reagrupa os blocos de um .npz gerado por ``matriz_presencas_npz``."""
+    with np.load(io.BytesIO(arquivo) if isinstance(arquivo, bytes) else arquivo) as npz:
+        blocos = sorted({nome.rsplit('_', 1)[0] for nome in npz.files if nome.startswith('bloco_')})
+        n_dias = len(npz['dias_id'])
+        def juntar(coluna, vazio):
+            partes = [npz[f'{b}_{coluna}'] for b in blocos]
+            return np.concatenate(partes) if partes else vazio
+        return {
+            'dias_id': npz['dias_id'],
+            'dias_data': npz['dias_data'],
+            'id': juntar('id', np.array([], dtype=np.int64)),
+            'nome': juntar('nome', np.array([], dtype=str)),
+            'sobrenome': juntar('sobrenome', np.array([], dtype=str)),
+            'pg': juntar('pg', np.array([], dtype=str)),
+            'imperio': juntar('imperio', np.array([], dtype=str)),
+            'presente': juntar('presente', np.zeros((0, n_dias), dtype=bool)),
+            'total': juntar('total', np.array([], dtype=np.int32)),
+        }
@@ -0,0 +1,192 @@
+"""
+Filtros da lista de adolescentes, compartilhados entre a listagem, a exportação
+e as ações em massa (ex.: definir PG dos filtrados).
+
+A querystring é lida uma única vez num ``FiltroAdolescentes`` (imutável), que
+compila o queryset e conta os resultados com cache por (hash do filtro,
+versão dos dados): a paginação usa essa contagem em vez de repetir o COUNT.
+"""
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from urllib.parse import urlencode
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.http import QueryDict
+
+from .cache_utils import TIMEOUT_CURTO, hash_partes, obter_ou_calcular
+from .models import Adolescente
+
+# Janela dos filtros de presença recente
+DIAS_PRESENCA_RECENTE = 30
+
+
+def buscar_adolescentes_por_nome(queryset, termo_busca):
+    """
+    Função auxiliar para buscar adolescentes por nome de forma mais inteligente
+    """
+    if not termo_busca:
+        return queryset
+
+    # Remove espaços extras e divide em palavras
+    palavras = [palavra.strip() for palavra in termo_busca.split() if palavra.strip()]
+
+    if not palavras:
+        return queryset
+
+    if len(palavras) == 1:
+        # Busca simples: uma palavra em nome ou sobrenome
+        return queryset.filter(
+            Q(nome__icontains=palavras[0]) | Q(sobrenome__icontains=palavras[0])
+        )
+    else:
+        # Busca por nome completo: múltiplas estratégias
+        # 1. Busca por nome completo concatenado
+        nome_completo = ' '.join(palavras)
+        query = Q()
+
+        # 2. Busca por nome completo concatenado (nome + sobrenome)
+        query |= Q(nome__icontains=nome_completo)
+        query |= Q(sobrenome__icontains=nome_completo)
+
+        # 3. Busca por nome completo concatenado (sobrenome + nome)
+        nome_invertido = ' '.join(palavras[::-1])
+        query |= Q(nome__icontains=nome_invertido)
+        query |= Q(sobrenome__icontains=nome_invertido)
+
+        # 4. Busca por todas as palavras em nome ou sobrenome
+        query_palavras = Q()
+        for palavra in palavras:
+            query_palavras &= (Q(nome__icontains=palavra) | Q(sobrenome__icontains=palavra))
+        query |= query_palavras
+
+        return queryset.filter(query)
+
+
+@dataclass(frozen=True)
+class FiltroAdolescentes:
+    """Filtros da lista de adolescentes de um ano (valores já normalizados)."""
+    ano: int
+    busca: str = ''
+    pg: str = ''
+    genero: str = ''
+    imperio: str = ''
+    presenca: str = ''
+    sequencia: str = ''
+    ano_nascimento: int | None = None
+
+    PARAMETROS = ('busca', 'pg', 'genero', 'imperio', 'presenca', 'sequencia', 'ano_nascimento')
+
+    @classmethod
+    def da_querystring(cls, params, ano):
+        """Lê os filtros de um QueryDict/dict (ou querystring); valores inválidos são ignorados."""
+        if isinstance(params, str):
+            params = QueryDict(params)
+        valores = {campo: (params.get(campo) or '').strip() for campo in cls.PARAMETROS}
+        bruto = valores.pop('ano_nascimento')
+        try:
+            ano_nascimento = int(bruto) if bruto else None
+        except ValueError:
+            ano_nascimento = None
+        return cls(ano=ano, ano_nascimento=ano_nascimento, **valores)
+
+    @classmethod
+    def do_request(cls, request, ano):
+        return cls.da_querystring(request.GET, ano)
+
+    @property
+    def ativo(self):
+        return any(getattr(self, campo) for campo in self.PARAMETROS)
+
+    def querystring(self):
+        """Querystring só com os filtros preenchidos (sem o ano, que vem da sessão)."""
+        return urlencode({campo: getattr(self, campo) for campo in self.PARAMETROS if getattr(self, campo)})
+
+    def _hoje(self):
+        return date.today()
+
+    def partes(self):
+        """Partes estáveis para chaves de cache (presença recente depende do dia)."""
+        partes = asdict(self)
+        if self.presenca:
+            partes['hoje'] = self._hoje().isoformat()
+        return partes
+
+    @property
+    def hash(self):
+        return hash_partes(self.partes())
+
+    def aplicar(self, queryset):
+        """Aplica os filtros sobre um queryset de Adolescente (sem ordenação)."""
+        adolescentes = queryset.filter(ano=self.ano)
+        if self.busca:
+            adolescentes = buscar_adolescentes_por_nome(adolescentes, self.busca)
+        if self.pg:
+            if self.pg == 'sem_pg':
+                adolescentes = adolescentes.filter(pg__isnull=True)
+            else:
+                adolescentes = adolescentes.filter(pg__id=self.pg)
+        if self.genero:
+            adolescentes = adolescentes.filter(genero=self.genero)
+        if self.imperio:
+            if self.imperio == 'sem_imperio':
+                adolescentes = adolescentes.filter(imperio__isnull=True)
+            else:
+                adolescentes = adolescentes.filter(imperio__id=self.imperio)
+        if self.ano_nascimento:
+            adolescentes = adolescentes.filter(data_nascimento__year=self.ano_nascimento)
+
+        if self.presenca:
+            limite = self._hoje() - timedelta(days=DIAS_PRESENCA_RECENTE)
+            if self.presenca == 'presente_30':
+                adolescentes = adolescentes.filter(
+                    presenca__presente=True,
+                    presenca__dia__data__gte=limite,
+                ).distinct()
+            elif self.presenca == 'ausente_30':
+                # Não teve nenhuma presença (presente=True) nos últimos 30 dias
+                adolescentes = adolescentes.exclude(
+                    presenca__presente=True,
+                    presenca__dia__data__gte=limite,
+                ).distinct()
+            elif self.presenca == 'nunca':
+                # Nunca compareceu (sem nenhum registro de presença)
+                adolescentes = adolescentes.filter(presenca__isnull=True).distinct()
+
+        # Sequência (campos mantidos por sequencias.py): "seguidas_N" veio nos
+        # últimos N eventos; "faltas_K" faltou nos últimos K eventos
+        if self.sequencia:
+            tipo, _, minimo = self.sequencia.partition('_')
+            try:
+                minimo = int(minimo)
+            except ValueError:
+                minimo = None
+            if minimo and tipo == 'seguidas':
+                adolescentes = adolescentes.filter(sequencia_atual__gte=minimo)
+            elif minimo and tipo == 'faltas':
+                adolescentes = adolescentes.filter(ausencias_seguidas__gte=minimo)
+        return adolescentes
+
+    def queryset(self):
+        return self.aplicar(Adolescente.objects.all())
+
+    def contar(self):
+        """Total de adolescentes filtrados, em cache por (filtro, versão dos dados)."""
+        return obter_ou_calcular(
+            'contagem_adolescentes', self.partes(),
+            lambda: self.queryset().order_by().count(),
+            timeout=TIMEOUT_CURTO,
+            permitir_stale=False,
+        )
+
+
+class PaginatorContado(Paginator):
+    """Paginator com o total já conhecido (não executa COUNT)."""
+
+    def __init__(self, object_list, per_page, total, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.total = total
+
+    @property
+    def count(self):
+        return self.total
@@ -1,6 +1,7 @@
 from django import forms
 from .models import Adolescente, DiaEvento, ContagemAuditorio, ContagemVisitantes, EventoEspecial, VisitanteEvento
 from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
 from datetime import datetime, date
 
 class AdolescenteForm(forms.ModelForm):
@@ -70,6 +71,8 @@ class AdolescenteForm(forms.ModelForm):
         ano = kwargs.pop('ano', None)  # Ano para filtrar PGs e Impérios
         
         super().__init__(*args, **kwargs)
+        # Upload validado que a view entrega a otimizacao_fotos.enfileirar_upload
+        self.foto_enviada = None
         
         # Usar querysets otimizados se fornecidos, ou filtrar por ano
         if pgs_queryset is not None:
@@ -91,6 +94,15 @@ class AdolescenteForm(forms.ModelForm):
             raise ValidationError("A data de nascimento não pode ser no futuro.")
         return data_nascimento
 
+    # a foto enviada não vai direto para o storage: é reduzida em segundo plano
+    # (otimizacao_fotos) e só então associada; até lá fica a foto atual
+    def clean_foto(self):
+        foto = self.cleaned_data.get('foto')
+        if isinstance(foto, UploadedFile):
+            self.foto_enviada = foto
+            return None
+        return foto
+
 
 class DiaEventoForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,340 @@
+"""
+Importação em massa a partir de planilhas (CSV ou XLSX).
+
+O arquivo é lido linha a linha; cada linha é validada com as regras do
+formulário do cadastro, mas sem queries por linha: PGs e Impérios são
+resolvidos por nome num mapa em cache e os duplicados são detectados contra um
+conjunto carregado numa única query. A gravação usa ``bulk_create`` em lotes.
+
+O resultado (``ResultadoImportacao``) serve tanto para o relatório da
+simulação (dry run) quanto para a gravação efetiva.
+"""
+import csv
+import io
+import itertools
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+from django.db import transaction
+
+from . import convidadores, xlsx
+from .cache_utils import invalidar_dados, obter_ou_calcular
+from .forms import AdolescenteForm, VisitanteEventoForm
+from .models import Adolescente, Imperio, PequenoGrupo, VisitanteEvento
+from .totais_eventos import registrar_criados
+
+# Linhas por INSERT no bulk_create
+TAMANHO_LOTE = 500
+EXTENSOES = ('.csv', '.xlsx')
+
+
+def normalizar(texto):
+    """Minúsculas, sem acentos e com espaços simples (para comparar nomes)."""
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.casefold().split())
+
+
+def ler_planilha(arquivo, nome_arquivo):
+    """Linhas (listas de valores) de um CSV (vírgula ou ponto e vírgula) ou XLSX."""
+    if nome_arquivo.lower().endswith('.xlsx'):
+        yield from xlsx.ler_linhas_xlsx(arquivo)
+        return
+    texto = io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+    primeira = texto.readline()
+    delimitador = ';' if primeira.count(';') > primeira.count(',') else ','
+    yield from csv.reader(itertools.chain([primeira], texto), delimiter=delimitador)
+
+
+def mapear_cabecalho(cabecalho, apelidos):
+    """{índice da coluna: campo} a partir dos nomes (normalizados) das colunas."""
+    colunas = {}
+    for indice, titulo in enumerate(cabecalho):
+        campo = apelidos.get(normalizar(titulo))
+        if campo and campo not in colunas.values():
+            colunas[indice] = campo
+    return colunas
+
+
+def valor_data(valor):
+    """Datas de planilha: serial do Excel, date/datetime ou texto (dd/mm/aaaa ou ISO)."""
+    if isinstance(valor, datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return xlsx.data_do_serial(valor).isoformat()
+    return str(valor or '').strip()
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def _mensagens(form):
+    return '; '.join(
+        f"{form.fields[campo].label if campo in form.fields else campo}: {' '.join(erros)}"
+        for campo, erros in form.errors.items()
+    )
+
+
+@dataclass
+class ResultadoImportacao:
+    total: int = 0
+    validos: list = field(default_factory=list)
+    erros: list = field(default_factory=list)  # (linha, mensagem)
+    duplicados: list = field(default_factory=list)  # (linha, nome, motivo)
+    criados: int = 0
+
+    @property
+    def pode_importar(self):
+        return bool(self.validos)
+
+
+# --- Adolescentes ---
+
+# nome de coluna normalizado -> campo (aceita o cabeçalho da própria exportação)
+APELIDOS_ADOLESCENTE = {
+    'nome': 'nome',
+    'sobrenome': 'sobrenome',
+    'data de nascimento': 'data_nascimento',
+    'data_nascimento': 'data_nascimento',
+    'nascimento': 'data_nascimento',
+    'sexo': 'genero',
+    'genero': 'genero',
+    'telefone': 'telefone',
+    'pg': 'pg',
+    'imperio': 'imperio',
+    'nome do responsavel': 'nome_responsavel',
+    'responsavel': 'nome_responsavel',
+    'telefone do responsavel': 'telefone_responsavel',
+}
+OBRIGATORIAS_ADOLESCENTE = ('nome', 'sobrenome', 'data_nascimento')
+
+_GENEROS = {
+    'm': 'M', 'masculino': 'M',
+    'f': 'F', 'feminino': 'F',
+}
+
+
+class ImportacaoAdolescenteForm(AdolescenteForm):
+    """Regras do cadastro sem foto e sem os selects de PG/Império (resolvidos por nome)."""
+
+    class Meta(AdolescenteForm.Meta):
+        exclude = ['ano', 'foto', 'pg', 'imperio']
+
+
+def mapa_grupos(ano):
+    """{'pg': {nome normalizado: id}, 'imperio': {...}} do ano, em cache por versão dos dados."""
+    def calcular():
+        return {
+            'pg': {normalizar(nome): pk for pk, nome in PequenoGrupo.objects.filter(ano=ano).values_list('id', 'nome')},
+            'imperio': {normalizar(nome): pk for pk, nome in Imperio.objects.filter(ano=ano).values_list('id', 'nome')},
+        }
+    return obter_ou_calcular('mapa_grupos', [ano], calcular)
+
+
+def chave_duplicado(nome, sobrenome, data_nascimento):
+    return (normalizar(nome), normalizar(sobrenome), str(data_nascimento))
+
+
+def validar_adolescentes(linhas, ano):
+    """
+    Valida as linhas (a primeira é o cabeçalho) para o ``ano``. Não grava nada:
+    devolve os adolescentes válidos (não salvos), os erros e os duplicados
+    (no próprio arquivo ou já cadastrados no ano).
+    """
+    resultado = ResultadoImportacao()
+    linhas = iter(linhas)
+    cabecalho = next(linhas, None) or []
+    colunas = mapear_cabecalho(cabecalho, APELIDOS_ADOLESCENTE)
+    faltando = [campo for campo in OBRIGATORIAS_ADOLESCENTE if campo not in colunas.values()]
+    if faltando:
+        resultado.erros.append((1, f"Colunas obrigatórias ausentes: {', '.join(faltando)}"))
+        return resultado
+
+    grupos = mapa_grupos(ano)
+    vistos = set(
+        chave_duplicado(*linha)
+        for linha in Adolescente.objects.filter(ano=ano).values_list('nome', 'sobrenome', 'data_nascimento')
+    )
+    existentes = set(vistos)
+
+    for numero, linha in enumerate(linhas, start=2):
+        valores = {campo: linha[indice] if indice < len(linha) else None for indice, campo in colunas.items()}
+        if not any(_texto(valor) for valor in valores.values()):
+            continue
+        resultado.total += 1
+
+        dados = {campo: _texto(valor) for campo, valor in valores.items()}
+        dados['data_nascimento'] = valor_data(valores.get('data_nascimento'))
+        if 'genero' in dados:
+            dados['genero'] = _GENEROS.get(normalizar(dados['genero']), dados['genero'])
+
+        erros = []
+        fks = {}
+        for campo, rotulo in (('pg', 'PG'), ('imperio', 'Império')):
+            nome = dados.pop(campo, '')
+            if nome:
+                fks[f'{campo}_id'] = grupos[campo].get(normalizar(nome))
+                if fks[f'{campo}_id'] is None:
+                    erros.append(f"{rotulo} '{nome}' não encontrado em {ano}")
+
+        form = ImportacaoAdolescenteForm(data=dados)
+        if not form.is_valid():
+            erros.insert(0, _mensagens(form))
+        if erros:
+            resultado.erros.append((numero, '; '.join(erros)))
+            continue
+
+        adolescente = form.save(commit=False)
+        adolescente.ano = ano
+        for atributo, valor in fks.items():
+            setattr(adolescente, atributo, valor)
+
+        chave = chave_duplicado(adolescente.nome, adolescente.sobrenome, adolescente.data_nascimento)
+        if chave in vistos:
+            motivo = 'Já cadastrado no ano' if chave in existentes else 'Repetido no arquivo'
+            resultado.duplicados.append((numero, f'{adolescente.nome} {adolescente.sobrenome}', motivo))
+            continue
+        vistos.add(chave)
+        resultado.validos.append(adolescente)
+    return resultado
+
+
+def importar_adolescentes(resultado, tamanho_lote=TAMANHO_LOTE):
+    """Grava os adolescentes válidos em lotes (tudo ou nada)."""
+    with transaction.atomic():
+        Adolescente.objects.bulk_create(resultado.validos, batch_size=tamanho_lote)
+    resultado.criados = len(resultado.validos)
+    # bulk_create não dispara sinais
+    invalidar_dados()
+    return resultado
+
+
+# --- Visitantes de evento especial ---
+
+APELIDOS_VISITANTE = {
+    'nome': 'nome',
+    'sobrenome': 'sobrenome',
+    'data de nascimento': 'data_nascimento',
+    'data_nascimento': 'data_nascimento',
+    'nascimento': 'data_nascimento',
+    'telefone': 'telefone',
+    'convidado por': 'convidado_por',
+    'convidado_por': 'convidado_por',
+    'quem convidou': 'convidado_por',
+    'presente': 'presente',
+    'observacoes': 'observacoes',
+    'observacao': 'observacoes',
+}
+OBRIGATORIAS_VISITANTE = ('nome', 'sobrenome', 'data_nascimento')
+
+_VERDADEIROS = {'sim', 's', 'x', '1', 'true', 'verdadeiro', 'presente'}
+_FALSOS = {'nao', 'n', '0', 'false', 'falso', 'ausente'}
+
+
+def _valor_presente(valor, padrao):
+    if isinstance(valor, bool):
+        return valor
+    texto = normalizar(_texto(valor))
+    if texto in _VERDADEIROS:
+        return True
+    if texto in _FALSOS:
+        return False
+    return padrao
+
+
+def validar_visitantes(linhas, evento, presente_padrao=False):
+    """
+    Valida a lista de convidados de um evento. ``convidado_por`` é padronizado
+    (a mesma pessoa escrita com acentos/caixa/espaços diferentes vira uma só
+    grafia, preferindo a já usada no evento). Repetidos no arquivo ou já
+    cadastrados no evento são ignorados; quem já é adolescente cadastrado é
+    apenas sinalizado (``visitante.adolescente_existente``), com uma única
+    query para o arquivo inteiro.
+    """
+    resultado = ResultadoImportacao()
+    linhas = iter(linhas)
+    cabecalho = next(linhas, None) or []
+    colunas = mapear_cabecalho(cabecalho, APELIDOS_VISITANTE)
+    faltando = [campo for campo in OBRIGATORIAS_VISITANTE if campo not in colunas.values()]
+    if faltando:
+        resultado.erros.append((1, f"Colunas obrigatórias ausentes: {', '.join(faltando)}"))
+        return resultado
+
+    existentes_evento = evento.visitantes.values_list('nome', 'sobrenome', 'data_nascimento', 'convidado_por')
+    vistos = set()
+    grafias = {}
+    for nome, sobrenome, nascimento, convidado_por in existentes_evento:
+        vistos.add(chave_duplicado(nome, sobrenome, nascimento))
+        if convidado_por:
+            grafias.setdefault(normalizar(convidado_por), convidado_por)
+    existentes = set(vistos)
+
+    for numero, linha in enumerate(linhas, start=2):
+        valores = {campo: linha[indice] if indice < len(linha) else None for indice, campo in colunas.items()}
+        if not any(_texto(valor) for valor in valores.values()):
+            continue
+        resultado.total += 1
+
+        dados = {campo: _texto(valor) for campo, valor in valores.items()}
+        dados['data_nascimento'] = valor_data(valores.get('data_nascimento'))
+        presente = _valor_presente(valores.get('presente'), presente_padrao)
+        dados['presente'] = 'on' if presente else ''
+        convidado_por = ' '.join(dados.get('convidado_por', '').split())
+        if convidado_por:
+            dados['convidado_por'] = grafias.setdefault(normalizar(convidado_por), convidado_por)
+
+        form = VisitanteEventoForm(data=dados)
+        if not form.is_valid():
+            resultado.erros.append((numero, _mensagens(form)))
+            continue
+
+        visitante = form.save(commit=False)
+        visitante.evento = evento
+        chave = chave_duplicado(visitante.nome, visitante.sobrenome, visitante.data_nascimento)
+        if chave in vistos:
+            motivo = 'Já cadastrado no evento' if chave in existentes else 'Repetido no arquivo'
+            resultado.duplicados.append((numero, visitante.nome_completo(), motivo))
+            continue
+        vistos.add(chave)
+        visitante.adolescente_existente = None
+        resultado.validos.append(visitante)
+
+    _marcar_adolescentes_existentes(resultado.validos)
+    return resultado
+
+
+def _marcar_adolescentes_existentes(visitantes):
+    """Uma query (pelas datas de nascimento do arquivo) para achar quem já é adolescente."""
+    if not visitantes:
+        return
+    por_chave = {}
+    candidatos = (
+        Adolescente.objects.filter(data_nascimento__in={v.data_nascimento for v in visitantes})
+        .order_by('-ano')
+        .values_list('id', 'nome', 'sobrenome', 'data_nascimento', 'ano')
+    )
+    for pk, nome, sobrenome, nascimento, ano in candidatos:
+        por_chave.setdefault(chave_duplicado(nome, sobrenome, nascimento), {'id': pk, 'ano': ano})
+    for visitante in visitantes:
+        visitante.adolescente_existente = por_chave.get(
+            chave_duplicado(visitante.nome, visitante.sobrenome, visitante.data_nascimento)
+        )
+
+
+def importar_visitantes(resultado, tamanho_lote=TAMANHO_LOTE):
+    """Grava os visitantes válidos em lotes (tudo ou nada)."""
+    with transaction.atomic():
+        convidadores.resolver_visitantes(resultado.validos)
+        VisitanteEvento.objects.bulk_create(resultado.validos, batch_size=tamanho_lote)
+        registrar_criados(resultado.validos)
+    resultado.criados = len(resultado.validos)
+    invalidar_dados()
+    return resultado
@@ -0,0 +1,102 @@
+"""
+Modo quiosque: cadastro rápido de visitantes na porta dos eventos especiais.
+
+A tela do quiosque envia cada visitante como JSON; a view valida com o
+``VisitanteEventoForm`` e só enfileira o visitante num buffer do processo,
+respondendo na hora. O buffer é gravado com ``bulk_create`` quando junta
+``KIOSK_BUFFER_TAMANHO`` visitantes ou ``KIOSK_BUFFER_ESPERA`` segundos depois
+do primeiro da fila (numa thread), e também na saída do processo.
+
+Como cada worker do gunicorn tem o seu buffer, o que ainda não foi gravado
+aparece como "pendente" só para as requisições atendidas pelo mesmo processo.
+Com ``KIOSK_BUFFER_ESPERA = 0`` o buffer é desligado e cada cadastro é gravado
+na própria requisição.
+"""
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from . import convidadores
+from .cache_utils import invalidar_dados
+from .models import VisitanteEvento
+from .totais_eventos import registrar_criados
+
+logger = logging.getLogger(__name__)
+
+
+def tamanho_buffer():
+    return getattr(settings, 'KIOSK_BUFFER_TAMANHO', 20)
+
+
+def espera_buffer():
+    return getattr(settings, 'KIOSK_BUFFER_ESPERA', 2.0)
+
+
+class BufferVisitantes:
+    """Fila de visitantes validados aguardando gravação em lote."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fila = []
+        self._temporizador = None
+
+    def adicionar(self, visitante):
+        """Enfileira o visitante; grava o lote se a fila encheu ou o buffer está desligado."""
+        with self._lock:
+            self._fila.append(visitante)
+            cheio = len(self._fila) >= tamanho_buffer() or espera_buffer() <= 0
+            if not cheio and self._temporizador is None:
+                self._temporizador = threading.Timer(espera_buffer(), self._descarregar_em_thread)
+                self._temporizador.daemon = True
+                self._temporizador.start()
+        if cheio:
+            self.descarregar()
+
+    def pendentes(self, evento_id):
+        with self._lock:
+            return sum(1 for visitante in self._fila if visitante.evento_id == evento_id)
+
+    def _descarregar_em_thread(self):
+        close_old_connections()
+        try:
+            self.descarregar()
+        finally:
+            close_old_connections()
+
+    def descarregar(self):
+        """Grava tudo o que está na fila. Retorna quantos visitantes foram gravados."""
+        with self._lock:
+            lote, self._fila = self._fila, []
+            if self._temporizador is not None:
+                self._temporizador.cancel()
+                self._temporizador = None
+        if not lote:
+            return 0
+        try:
+            with transaction.atomic():
+                convidadores.resolver_visitantes(lote)
+                VisitanteEvento.objects.bulk_create(lote)
+                registrar_criados(lote)
+            gravados = len(lote)
+        except Exception:
+            # Um visitante problemático não pode levar o lote inteiro junto
+            logger.exception('Falha ao gravar lote do quiosque; gravando um a um')
+            gravados = 0
+            for visitante in lote:
+                try:
+                    visitante.pk = None
+                    visitante.save()
+                    gravados += 1
+                except Exception:
+                    logger.exception('Visitante do quiosque perdido: %s', visitante.nome_completo())
+        invalidar_dados()
+        logger.info('Quiosque: %s visitante(s) gravado(s) (%s)', gravados, dict(Counter(v.evento_id for v in lote)))
+        return gravados
+
+
+buffer = BufferVisitantes()
+atexit.register(buffer.descarregar)
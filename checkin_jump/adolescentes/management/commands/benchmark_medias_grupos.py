@@ -0,0 +1,107 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.test.utils import CaptureQueriesContext
+
+from adolescentes.agregacoes import media_presenca_por_grupo
+from adolescentes.models import Adolescente, DiaEvento, PequenoGrupo, Presenca
+
+# Ano fictício para não misturar com dados reais (tudo é desfeito no final)
+ANO_BENCHMARK = 1999
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Mede a média de presença por PG com dados sintéticos (desfeitos ao final)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pgs', type=int, default=100)
+        parser.add_argument('--dias', type=int, default=50)
+        parser.add_argument('--adolescentes', type=int, default=5000)
+        parser.add_argument('--taxa', type=float, default=0.6, help='Probabilidade de presença')
+        parser.add_argument('--repeticoes', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--confirmar',
+            action='store_true',
+            help='Permite rodar num banco que não é SQLite nem de testes (ex.: Postgres de produção)',
+        )
+
+    def handle(self, *args, **options):
+        # Centenas de milhares de INSERTs, mesmo desfeitos, seguram locks e incham o WAL
+        banco = str(connection.settings_dict['NAME'])
+        descartavel = connection.vendor == 'sqlite' or banco.startswith('test_')
+        if not descartavel and not options['confirmar']:
+            linhas = options['adolescentes'] * (options['dias'] + 1)
+            raise CommandError(
+                f'O banco "{banco}" ({connection.vendor}) não é SQLite nem de testes e o benchmark '
+                f'insere ~{linhas} linhas antes do rollback. Use --confirmar para rodar mesmo assim.'
+            )
+        try:
+            with transaction.atomic():
+                self._popular(options)
+                eventos = DiaEvento.objects.filter(ano=ANO_BENCHMARK)
+                self._medir('agregacoes.media_presenca_por_grupo',
+                            lambda: media_presenca_por_grupo(ANO_BENCHMARK, 'pg', eventos), options['repeticoes'])
+                self._medir('annotate legado (2 Counts no mesmo join)',
+                            lambda: self._legado(eventos), options['repeticoes'])
+                raise Rollback
+        except Rollback:
+            self.stdout.write(self.style.SUCCESS('✅ Dados sintéticos removidos'))
+
+    def _popular(self, options):
+        rnd = random.Random(options['seed'])
+        inicio = time.perf_counter()
+        PequenoGrupo.objects.bulk_create(
+            PequenoGrupo(nome=f'PG {i:03d}', ano=ANO_BENCHMARK) for i in range(options['pgs'])
+        )
+        pgs = list(PequenoGrupo.objects.filter(ano=ANO_BENCHMARK))
+        DiaEvento.objects.bulk_create(
+            DiaEvento(data=date(ANO_BENCHMARK, 1, 3) + timedelta(weeks=i), ano=ANO_BENCHMARK)
+            for i in range(options['dias'])
+        )
+        dias = list(DiaEvento.objects.filter(ano=ANO_BENCHMARK).values_list('id', flat=True))
+        Adolescente.objects.bulk_create(
+            (Adolescente(nome=f'A{i}', sobrenome='Bench', data_nascimento=date(2010, 1, 1),
+                         pg=rnd.choice(pgs), ano=ANO_BENCHMARK) for i in range(options['adolescentes'])),
+            batch_size=1000,
+        )
+        adolescentes = Adolescente.objects.filter(ano=ANO_BENCHMARK).values_list('id', flat=True)
+        Presenca.objects.bulk_create(
+            (Presenca(adolescente_id=a, dia_id=d, presente=rnd.random() < options['taxa'])
+             for a in adolescentes for d in dias),
+            batch_size=5000,
+        )
+        self.stdout.write(
+            f"📊 {options['pgs']} PGs × {options['dias']} dias × {options['adolescentes']} adolescentes "
+            f"criados em {time.perf_counter() - inicio:.1f}s"
+        )
+
+    def _legado(self, eventos):
+        return list(PequenoGrupo.objects.filter(ano=ANO_BENCHMARK).annotate(
+            total_presentes=Count('adolescentes__presenca',
+                                  filter=Q(adolescentes__presenca__presente=True,
+                                           adolescentes__presenca__dia__in=eventos)),
+            total_eventos=Count('adolescentes__presenca__dia',
+                                filter=Q(adolescentes__presenca__dia__in=eventos), distinct=True),
+        ).values('id', 'total_presentes', 'total_eventos'))
+
+    def _medir(self, nome, funcao, repeticoes):
+        tempos = []
+        for _ in range(repeticoes):
+            with CaptureQueriesContext(connection) as queries:
+                inicio = time.perf_counter()
+                funcao()
+                tempos.append(time.perf_counter() - inicio)
+        tempos.sort()
+        self.stdout.write(
+            f'⏱️  {nome}: mediana {tempos[len(tempos) // 2] * 1000:.1f} ms, '
+            f'melhor {tempos[0] * 1000:.1f} ms, {len(queries)} queries'
+        )
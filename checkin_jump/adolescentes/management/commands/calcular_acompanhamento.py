@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from adolescentes.models import DiaEvento
+from adolescentes.sequencias import (
+    gerar_lista_acompanhamento, MIN_PRESENCAS_ACOMPANHAMENTO, FALTAS_ACOMPANHAMENTO,
+)
+
+
+class Command(BaseCommand):
+    help = 'Pré-calcula a lista de acompanhamento (quem vinha e sumiu). Feito para rodar no cron, 1x por noite'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ano',
+            type=int,
+            action='append',
+            help='Ano a calcular (pode repetir). Padrão: todos os anos com eventos',
+        )
+        parser.add_argument(
+            '--min-presencas',
+            type=int,
+            default=MIN_PRESENCAS_ACOMPANHAMENTO,
+            help=f'Presenças mínimas no ano (padrão: {MIN_PRESENCAS_ACOMPANHAMENTO})',
+        )
+        parser.add_argument(
+            '--faltas',
+            type=int,
+            default=FALTAS_ACOMPANHAMENTO,
+            help=f'Faltas seguidas até o último evento (padrão: {FALTAS_ACOMPANHAMENTO})',
+        )
+
+    def handle(self, *args, **options):
+        anos = options['ano'] or sorted(set(DiaEvento.objects.values_list('ano', flat=True)))
+        for ano in anos:
+            _, total = gerar_lista_acompanhamento(ano, options['min_presencas'], options['faltas'])
+            self.stdout.write(f'📋 {ano}: {total} adolescente(s) para acompanhar')
+        self.stdout.write(self.style.SUCCESS('✅ Listas de acompanhamento atualizadas'))
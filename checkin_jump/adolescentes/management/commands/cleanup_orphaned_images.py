@@ -1,10 +1,27 @@
+import json
 import os
-from django.core.management.base import BaseCommand
-from django.conf import settings
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from adolescentes import miniaturas
+from adolescentes.cache_utils import invalidar_dados
 from adolescentes.models import Adolescente
+from adolescentes.verificacao_fotos import listar_arquivos
+
+BATCH_SIZE = 200
+ARQUIVO_ESTADO = '.cleanup_orphaned_images.json'
+
 
 class Command(BaseCommand):
-    help = 'Limpa referências órfãs de imagens que não existem mais no sistema de arquivos'
+    help = (
+        'Limpa referências órfãs de fotos (arquivo ausente no storage) e lista os '
+        'arquivos de fotos que nenhum adolescente referencia. Funciona com storage '
+        'local e Cloudinary'
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -17,69 +34,89 @@ class Command(BaseCommand):
             action='store_true',
             help='Mostra informações detalhadas sobre o processo',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Consultas simultâneas ao storage (padrão: 8)',
+        )
+        parser.add_argument(
+            '--apagar-arquivos',
+            action='store_true',
+            help='Apaga do storage os arquivos que nenhum adolescente referencia (só os com data de modificação conhecida)',
+        )
+        parser.add_argument(
+            '--idade-minima',
+            type=float,
+            default=24,
+            help='Só considera sem referência arquivos com mais de N horas (uploads em andamento). Padrão: 24',
+        )
+        parser.add_argument(
+            '--retomar',
+            action='store_true',
+            help='Continua uma execução interrompida a partir do arquivo de estado',
+        )
+        parser.add_argument(
+            '--estado',
+            default=ARQUIVO_ESTADO,
+            help=f'Arquivo de progresso para --retomar (padrão: {ARQUIVO_ESTADO})',
+        )
+        parser.add_argument(
+            '--relatorio',
+            help='Grava o relatório completo em JSON neste caminho',
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
-        verbose = options['verbose']
-        
+        storage = Adolescente._meta.get_field('foto').storage
+
         self.stdout.write(
             self.style.SUCCESS('🔍 Iniciando limpeza de referências órfãs de imagens...')
         )
-        
+        self.stdout.write(f'🗄️  Storage: {type(storage).__name__}')
         if dry_run:
             self.stdout.write(
                 self.style.WARNING('⚠️  Modo DRY-RUN ativo - nenhuma alteração será feita')
             )
-        
-        # Buscar todos os adolescentes que têm foto definida
-        adolescentes_com_foto = Adolescente.objects.exclude(foto='').exclude(foto__isnull=True)
-        total_com_foto = adolescentes_com_foto.count()
-        
-        self.stdout.write(f'📊 Encontrados {total_com_foto} adolescentes com referência de foto')
-        
-        orphaned_count = 0
-        cleaned_count = 0
-        
-        for adolescente in adolescentes_com_foto:
-            try:
-                # Verificar se o arquivo existe fisicamente
-                file_path = os.path.join(settings.MEDIA_ROOT, adolescente.foto.name)
-                
-                if not os.path.exists(file_path):
-                    orphaned_count += 1
-                    
-                    if verbose:
-                        self.stdout.write(
-                            f'🔗 Referência órfã encontrada: {adolescente.nome} {adolescente.sobrenome} -> {adolescente.foto.name}'
-                        )
-                    
-                    if not dry_run:
-                        # Limpar a referência órfã
-                        adolescente.foto = None
-                        adolescente.save(update_fields=['foto'])
-                        cleaned_count += 1
-                        
-                        if verbose:
-                            self.stdout.write(
-                                self.style.SUCCESS(f'✅ Limpeza realizada para: {adolescente.nome} {adolescente.sobrenome}')
-                            )
-                
-                elif verbose:
-                    self.stdout.write(
-                        f'✅ Arquivo OK: {adolescente.nome} {adolescente.sobrenome} -> {adolescente.foto.name}'
-                    )
-                    
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f'❌ Erro ao processar {adolescente.nome} {adolescente.sobrenome}: {str(e)}')
-                )
-        
+
+        estado = self._carregar_estado(options) if options['retomar'] else None
+        if estado is None:
+            estado = {'dry_run': dry_run, 'ultimo_id': 0, 'verificadas': 0, 'orfas': [], 'limpas': 0, 'erros': []}
+        elif estado['dry_run'] != dry_run:
+            raise CommandError('O estado salvo é de uma execução com outro --dry-run')
+        else:
+            self.stdout.write(f'⏩ Retomando após o id {estado["ultimo_id"]} ({estado["verificadas"]} já verificadas)')
+
+        self._verificar_referencias(storage, estado, options)
+        sem_referencia, apagados = self._verificar_arquivos(storage, options)
+
+        relatorio = {
+            'gerado_em': timezone.now().isoformat(),
+            'dry_run': dry_run,
+            'storage': type(storage).__name__,
+            'referencias_verificadas': estado['verificadas'],
+            'referencias_orfas': estado['orfas'],
+            'referencias_limpas': estado['limpas'],
+            'arquivos_sem_referencia': sem_referencia,
+            'arquivos_apagados': apagados,
+            'erros': estado['erros'],
+        }
+        if options['relatorio']:
+            with open(options['relatorio'], 'w', encoding='utf-8') as arquivo:
+                json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+        if os.path.exists(options['estado']):
+            os.remove(options['estado'])
+
         # Relatório final
+        orphaned_count = len(estado['orfas'])
         self.stdout.write('\n' + '='*50)
         self.stdout.write(self.style.SUCCESS('📋 RELATÓRIO FINAL:'))
-        self.stdout.write(f'📊 Total de adolescentes com foto: {total_com_foto}')
+        self.stdout.write(f'📊 Referências de foto verificadas: {estado["verificadas"]}')
         self.stdout.write(f'🔗 Referências órfãs encontradas: {orphaned_count}')
-        
+        self.stdout.write(f'🗂️  Arquivos sem referência: {len(sem_referencia)}')
+        if estado['erros']:
+            self.stdout.write(self.style.ERROR(f'❌ Erros ao consultar o storage: {len(estado["erros"])}'))
+
         if dry_run:
             self.stdout.write(
                 self.style.WARNING(f'⚠️  Referências que SERIAM limpas: {orphaned_count}')
@@ -89,12 +126,178 @@ class Command(BaseCommand):
             )
         else:
             self.stdout.write(
-                self.style.SUCCESS(f'✅ Referências limpas com sucesso: {cleaned_count}')
+                self.style.SUCCESS(f'✅ Referências limpas com sucesso: {estado["limpas"]}')
             )
-        
-        if orphaned_count == 0:
+            if options['apagar_arquivos']:
+                self.stdout.write(self.style.SUCCESS(f'🗑️  Arquivos apagados: {apagados}'))
+            elif sem_referencia:
+                self.stdout.write(self.style.WARNING('💡 Use --apagar-arquivos para remover os arquivos sem referência'))
+
+        if orphaned_count == 0 and not sem_referencia:
             self.stdout.write(
                 self.style.SUCCESS('🎉 Nenhuma referência órfã encontrada! Sistema limpo.')
             )
-        
+        if options['relatorio']:
+            self.stdout.write(f'📝 Relatório JSON: {options["relatorio"]}')
+
         self.stdout.write('='*50)
+        return 0
+
+    # --- Estado (retomada) ---
+
+    def _carregar_estado(self, options):
+        try:
+            with open(options['estado'], encoding='utf-8') as arquivo:
+                return json.load(arquivo)
+        except FileNotFoundError:
+            self.stdout.write(self.style.WARNING('⚠️  Nenhum estado salvo: começando do início'))
+            return None
+
+    def _salvar_estado(self, estado, options):
+        temporario = f'{options["estado"]}.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(estado, arquivo, ensure_ascii=False)
+        os.replace(temporario, options['estado'])
+
+    # --- Referências no banco -> arquivos ---
+
+    def _verificar_referencias(self, storage, estado, options):
+        adolescentes = (
+            Adolescente.objects.exclude(foto='').exclude(foto__isnull=True)
+            .filter(id__gt=estado['ultimo_id'])
+            .only('id', 'nome', 'sobrenome', 'foto', *miniaturas.CAMPOS)
+            .order_by('id')
+        )
+        total = adolescentes.count()
+        self.stdout.write(f'📊 Encontrados {total} adolescentes com referência de foto')
+
+        def existe(adolescente):
+            try:
+                return storage.exists(adolescente.foto.name), None
+            except Exception as e:
+                return None, str(e)
+
+        processadas = 0
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+            ultimo_id = estado['ultimo_id']
+            while True:
+                lote = list(adolescentes.filter(id__gt=ultimo_id)[:BATCH_SIZE])
+                if not lote:
+                    break
+                orfas = []
+                for adolescente, (encontrado, erro) in zip(lote, executor.map(existe, lote)):
+                    descricao = f'{adolescente.nome} {adolescente.sobrenome} -> {adolescente.foto.name}'
+                    if erro is not None:
+                        estado['erros'].append({'id': adolescente.id, 'foto': adolescente.foto.name, 'erro': erro})
+                        self.stdout.write(self.style.ERROR(f'❌ Erro ao processar {descricao}: {erro}'))
+                    elif not encontrado:
+                        orfas.append(adolescente)
+                        estado['orfas'].append({
+                            'id': adolescente.id,
+                            'nome': f'{adolescente.nome} {adolescente.sobrenome}',
+                            'foto': adolescente.foto.name,
+                        })
+                        if options['verbose']:
+                            self.stdout.write(f'🔗 Referência órfã encontrada: {descricao}')
+                    elif options['verbose']:
+                        self.stdout.write(f'✅ Arquivo OK: {descricao}')
+
+                if orfas and not options['dry_run']:
+                    self._limpar(orfas, storage)
+                    estado['limpas'] += len(orfas)
+
+                ultimo_id = lote[-1].id
+                processadas += len(lote)
+                estado['ultimo_id'] = ultimo_id
+                estado['verificadas'] += len(lote)
+                self._salvar_estado(estado, options)
+                self.stdout.write(f'   ... {processadas}/{total}')
+
+    def _limpar(self, orfas, storage):
+        """Remove as referências (e as miniaturas, que perderam a original) em lote."""
+        miniaturas_orfas = []
+        for adolescente in orfas:
+            miniaturas_orfas += [getattr(adolescente, campo).name for campo in miniaturas.CAMPOS if getattr(adolescente, campo)]
+            adolescente.foto = None
+            for campo in miniaturas.CAMPOS:
+                setattr(adolescente, campo, None)
+            for campo, valor in miniaturas.metadados(False).items():
+                setattr(adolescente, campo, valor)
+        Adolescente.objects.bulk_update(
+            orfas, ['foto', *miniaturas.CAMPOS, *miniaturas.CAMPOS_METADADOS], batch_size=BATCH_SIZE,
+        )
+        # bulk_update não dispara sinais
+        invalidar_dados()
+        miniaturas.remover_arquivos(miniaturas_orfas, storage)
+
+    # --- Arquivos -> referências no banco ---
+
+    def _verificar_arquivos(self, storage, options):
+        referenciados = set()
+        for nomes in Adolescente.objects.values_list('foto', *miniaturas.CAMPOS).iterator(chunk_size=2000):
+            referenciados.update(nome for nome in nomes if nome)
+        pastas = {
+            Adolescente._meta.get_field('foto').upload_to.rstrip('/'),
+            miniaturas.PASTA,
+        }
+        # Backends como o Cloudinary prefixam os nomes: usa as pastas reais das referências
+        pastas.update(posixpath.dirname(nome) for nome in referenciados)
+
+        self.stdout.write(f'🗂️  Procurando arquivos sem referência em: {", ".join(sorted(pastas))}')
+        candidatos = [nome for nome in listar_arquivos(storage, sorted(pastas)) if nome not in referenciados]
+        limite = timezone.now() - timedelta(hours=options['idade_minima'])
+
+        def descrever(nome):
+            try:
+                modificado = storage.get_modified_time(nome)
+            except (NotImplementedError, OSError):
+                modificado = None
+            try:
+                tamanho = storage.size(nome)
+            except (NotImplementedError, OSError):
+                tamanho = None
+            return nome, modificado, tamanho
+
+        sem_referencia = []
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+            for nome, modificado, tamanho in executor.map(descrever, candidatos):
+                if modificado is not None and modificado > limite:
+                    continue  # pode ser um upload cujo cadastro ainda não foi gravado
+                sem_referencia.append({
+                    'nome': nome,
+                    'bytes': tamanho,
+                    'modificado_em': modificado.isoformat() if modificado else None,
+                })
+                if options['verbose']:
+                    self.stdout.write(f'🗂️  Sem referência: {nome}')
+
+        apagados = 0
+        if options['apagar_arquivos'] and not options['dry_run']:
+            # Sem data de modificação não há como saber se é um upload em andamento
+            nomes = [arquivo['nome'] for arquivo in sem_referencia if arquivo['modificado_em']]
+            sem_data = len(sem_referencia) - len(nomes)
+            if sem_data:
+                self.stdout.write(self.style.WARNING(
+                    f'⚠️  {sem_data} arquivo(s) sem data de modificação no storage não serão apagados'
+                ))
+            # Confere de novo: uma foto pode ter sido cadastrada durante a varredura
+            ainda_referenciados = set()
+            for inicio in range(0, len(nomes), BATCH_SIZE):
+                parte = nomes[inicio:inicio + BATCH_SIZE]
+                for campo in ('foto', *miniaturas.CAMPOS):
+                    ainda_referenciados.update(
+                        Adolescente.objects.filter(**{f'{campo}__in': parte}).values_list(campo, flat=True)
+                    )
+            apagar = [nome for nome in nomes if nome not in ainda_referenciados]
+
+            def apagar_arquivo(nome):
+                try:
+                    storage.delete(nome)
+                    return True
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'❌ Não foi possível apagar {nome}: {e}'))
+                    return False
+
+            with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+                apagados = sum(executor.map(apagar_arquivo, apagar))
+        return sem_referencia, apagados
@@ -0,0 +1,106 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
+
+from adolescentes import miniaturas
+from adolescentes.models import Adolescente
+
+BATCH_SIZE = 200
+
+
+def _iniciar_processo():
+    # Processos criados por spawn (macOS/Windows) começam sem o Django configurado
+    django.setup()
+
+
+def _processar(tarefa):
+    """Gera as variantes de uma foto (roda no processo filho, sem acessar o banco)."""
+    pk, nome = tarefa
+    storage = Adolescente._meta.get_field('foto').storage
+    try:
+        return pk, miniaturas.gerar_variantes(nome, storage), None
+    except Exception as e:
+        return pk, None, f'{type(e).__name__}: {e}'
+
+
+class Command(BaseCommand):
+    help = 'Gera as miniaturas (avatar e preview) e os metadados das fotos já cadastradas, em paralelo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ano',
+            type=int,
+            action='append',
+            help='Ano dos adolescentes (pode repetir). Padrão: todos',
+        )
+        parser.add_argument(
+            '--refazer',
+            action='store_true',
+            help='Gera de novo também as fotos que já têm miniaturas',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=min(4, os.cpu_count() or 1),
+            help='Processos em paralelo (1 = no próprio processo)',
+        )
+
+    def handle(self, *args, **options):
+        adolescentes = Adolescente.objects.exclude(foto='').exclude(foto__isnull=True).order_by('id')
+        if options['ano']:
+            adolescentes = adolescentes.filter(ano__in=options['ano'])
+        if not options['refazer']:
+            adolescentes = adolescentes.filter(Q(foto_avatar__isnull=True) | Q(foto_avatar=''))
+        atuais = {
+            pk: (foto, [nome for nome in antigas if nome])
+            for pk, foto, *antigas in adolescentes.values_list('id', 'foto', *miniaturas.CAMPOS)
+        }
+        tarefas = [(pk, foto) for pk, (foto, _) in atuais.items()]
+        self.stdout.write(f'🖼️  {len(tarefas)} foto(s) para processar com {max(options["workers"], 1)} processo(s)')
+
+        storage = Adolescente._meta.get_field('foto').storage
+        pendentes = []
+        geradas = falhas = 0
+
+        def gravar():
+            Adolescente.objects.bulk_update(pendentes, [*miniaturas.CAMPOS, *miniaturas.CAMPOS_METADADOS], batch_size=BATCH_SIZE)
+            for adolescente in pendentes:
+                novas = {getattr(adolescente, campo).name for campo in miniaturas.CAMPOS}
+                miniaturas.remover_arquivos([nome for nome in atuais[adolescente.pk][1] if nome not in novas], storage)
+            pendentes.clear()
+
+        if options['workers'] > 1:
+            # Os filhos não usam o banco: não podem herdar as conexões abertas
+            connections.close_all()
+            executor = ProcessPoolExecutor(max_workers=options['workers'], initializer=_iniciar_processo)
+            resultados = executor.map(_processar, tarefas, chunksize=8)
+        else:
+            executor = None
+            resultados = map(_processar, tarefas)
+
+        try:
+            for processadas, (pk, gravados, erro) in enumerate(resultados, start=1):
+                if erro:
+                    falhas += 1
+                    self.stdout.write(self.style.WARNING(f'⚠️  #{pk} {atuais[pk][0]}: {erro}'))
+                else:
+                    geradas += 1
+                    pendentes.append(Adolescente(pk=pk, **gravados))
+                if len(pendentes) >= BATCH_SIZE:
+                    gravar()
+                if processadas % BATCH_SIZE == 0:
+                    self.stdout.write(f'   ... {processadas}/{len(tarefas)}')
+            if pendentes:
+                gravar()
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {geradas} foto(s) com miniaturas geradas'))
+        if falhas:
+            self.stdout.write(self.style.WARNING(f'⚠️  {falhas} foto(s) não puderam ser lidas'))
+        return 0
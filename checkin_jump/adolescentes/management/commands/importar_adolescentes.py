@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from adolescentes.importacao import EXTENSOES, importar_adolescentes, ler_planilha, validar_adolescentes
+
+
+class Command(BaseCommand):
+    help = 'Importa adolescentes de uma planilha (.csv ou .xlsx) para um ano'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo')
+        parser.add_argument('--ano', type=int, required=True)
+        parser.add_argument('--dry-run', action='store_true', help='Só valida e mostra o relatório, sem gravar')
+
+    def handle(self, *args, **options):
+        caminho = options['arquivo']
+        if not caminho.lower().endswith(EXTENSOES):
+            raise CommandError('O arquivo deve ser .csv ou .xlsx')
+
+        inicio = time.perf_counter()
+        with open(caminho, 'rb') as arquivo:
+            resultado = validar_adolescentes(ler_planilha(arquivo, caminho), options['ano'])
+        self.stdout.write(
+            f'📄 {resultado.total} linha(s): {len(resultado.validos)} válida(s), '
+            f'{len(resultado.duplicados)} duplicada(s), {len(resultado.erros)} com erro '
+            f'({time.perf_counter() - inicio:.1f}s)'
+        )
+        for linha, mensagem in resultado.erros:
+            self.stdout.write(f'  ❌ linha {linha}: {mensagem}')
+        for linha, nome, motivo in resultado.duplicados:
+            self.stdout.write(f'  ⚠️  linha {linha}: {nome} ({motivo})')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('🔎 Simulação: nada foi gravado'))
+            return
+        importar_adolescentes(resultado)
+        self.stdout.write(self.style.SUCCESS(f'✅ {resultado.criados} adolescente(s) importado(s)'))
@@ -0,0 +1,127 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from adolescentes import miniaturas, otimizacao_fotos
+from adolescentes.cache_utils import invalidar_dados
+from adolescentes.models import Adolescente
+
+
+def _iniciar_processo():
+    # Processos criados por spawn (macOS/Windows) começam sem o Django configurado
+    django.setup()
+
+
+def _processar(tarefa):
+    """
+    Reduz uma foto e grava a nova versão e as miniaturas (roda no processo
+    filho, sem acessar o banco). Retorna (pk, bytes antes, bytes depois,
+    gravados, erro); ``gravados`` é None em --dry-run ou se a foto já estava
+    otimizada (aí antes == depois).
+    """
+    pk, nome, dry_run = tarefa
+    storage = Adolescente._meta.get_field('foto').storage
+    try:
+        with storage.open(nome, 'rb') as arquivo:
+            conteudo = arquivo.read()
+        otimizado = otimizacao_fotos.otimizar(conteudo, forcar=False)
+        if otimizado is None or dry_run:
+            return pk, len(conteudo), len(otimizado or conteudo), None, None
+        novo = storage.save(otimizacao_fotos.nome_otimizado(nome), ContentFile(otimizado))
+        gravados = miniaturas.gerar_variantes(novo, storage)
+        gravados['foto'] = novo
+        return pk, len(conteudo), len(otimizado), gravados, None
+    except Exception as e:
+        return pk, None, None, None, f'{type(e).__name__}: {e}'
+
+
+class Command(BaseCommand):
+    help = (
+        'Reduz as fotos já gravadas (orientação EXIF aplicada, sem metadados, '
+        'lado máximo FOTOS_LADO_MAXIMO), refaz as miniaturas e apaga as originais'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ano',
+            type=int,
+            action='append',
+            help='Ano dos adolescentes (pode repetir). Padrão: todos',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Só calcula a economia, sem gravar nada',
+        )
+        parser.add_argument(
+            '--manter-originais',
+            action='store_true',
+            help='Não apaga do storage as fotos originais substituídas',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=min(4, os.cpu_count() or 1),
+            help='Processos em paralelo (1 = no próprio processo)',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        adolescentes = Adolescente.objects.exclude(foto='').exclude(foto__isnull=True).order_by('id')
+        if options['ano']:
+            adolescentes = adolescentes.filter(ano__in=options['ano'])
+        atuais = {
+            pk: (foto, [nome for nome in antigas if nome])
+            for pk, foto, *antigas in adolescentes.values_list('id', 'foto', *miniaturas.CAMPOS)
+        }
+        tarefas = [(pk, foto, dry_run) for pk, (foto, _) in atuais.items()]
+        self.stdout.write(f'🖼️  {len(tarefas)} foto(s) para conferir com {max(options["workers"], 1)} processo(s)')
+        if dry_run:
+            self.stdout.write(self.style.WARNING('⚠️  Modo DRY-RUN ativo - nenhuma alteração será feita'))
+
+        storage = Adolescente._meta.get_field('foto').storage
+        if options['workers'] > 1:
+            # Os filhos não usam o banco: não podem herdar as conexões abertas
+            connections.close_all()
+            executor = ProcessPoolExecutor(max_workers=options['workers'], initializer=_iniciar_processo)
+            resultados = executor.map(_processar, tarefas, chunksize=4)
+        else:
+            executor = None
+            resultados = map(_processar, tarefas)
+
+        otimizadas = falhas = bytes_antes = bytes_depois = 0
+        try:
+            for processadas, (pk, antes, depois, gravados, erro) in enumerate(resultados, start=1):
+                foto, antigas = atuais[pk]
+                if processadas % 50 == 0:
+                    self.stdout.write(f'   ... {processadas}/{len(tarefas)}')
+                if erro:
+                    falhas += 1
+                    self.stdout.write(self.style.WARNING(f'⚠️  #{pk} {foto}: {erro}'))
+                    continue
+                if gravados is not None:
+                    # Só troca se a foto não mudou durante o processamento
+                    if not Adolescente.objects.filter(pk=pk, foto=foto).update(**gravados):
+                        miniaturas.remover_arquivos([gravados['foto'], *(gravados[campo] for campo in miniaturas.CAMPOS)], storage)
+                        continue
+                    miniaturas.remover_arquivos(antigas + ([] if options['manter_originais'] else [foto]), storage)
+                bytes_antes += antes
+                bytes_depois += depois
+                otimizadas += antes != depois or gravados is not None
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        if otimizadas and not dry_run:
+            # queryset.update não dispara sinais
+            invalidar_dados()
+
+        economia = (bytes_antes - bytes_depois) / (1024 * 1024)
+        verbo = 'seriam otimizadas' if dry_run else 'otimizadas'
+        self.stdout.write(self.style.SUCCESS(f'✅ {otimizadas} foto(s) {verbo} ({economia:.1f} MB a menos)'))
+        if falhas:
+            self.stdout.write(self.style.WARNING(f'⚠️  {falhas} foto(s) não puderam ser lidas'))
+        return 0
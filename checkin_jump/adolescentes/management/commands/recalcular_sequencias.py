@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from adolescentes.cache_utils import invalidar_dados
+from adolescentes.models import DiaEvento
+from adolescentes.sequencias import atualizar_sequencias
+
+
+class Command(BaseCommand):
+    help = 'Recalcula do zero as sequências de presença/faltas dos adolescentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ano',
+            type=int,
+            action='append',
+            help='Ano a recalcular (pode repetir). Padrão: todos os anos com eventos',
+        )
+
+    def handle(self, *args, **options):
+        anos = options['ano'] or sorted(set(DiaEvento.objects.values_list('ano', flat=True)))
+        for ano in anos:
+            alterados = atualizar_sequencias(ano)
+            self.stdout.write(f'📊 {ano}: {alterados} adolescente(s) atualizado(s)')
+        invalidar_dados()
+        self.stdout.write(self.style.SUCCESS('✅ Sequências recalculadas'))
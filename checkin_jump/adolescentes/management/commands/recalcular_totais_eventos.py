@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from adolescentes.cache_utils import invalidar_dados
+from adolescentes.models import EventoEspecial
+from adolescentes.totais_eventos import recalcular_totais
+
+
+class Command(BaseCommand):
+    help = 'Confere e corrige os contadores de visitantes dos eventos especiais'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ano',
+            type=int,
+            action='append',
+            help='Ano a conferir (pode repetir). Padrão: todos os eventos',
+        )
+
+    def handle(self, *args, **options):
+        eventos = EventoEspecial.objects.all()
+        if options['ano']:
+            eventos = eventos.filter(ano__in=options['ano'])
+        divergentes = recalcular_totais(eventos)
+        for evento, antes, depois in divergentes:
+            self.stdout.write(
+                f'🔧 {evento}: visitantes/presentes/migrados '
+                f'{"/".join(map(str, antes))} → {"/".join(map(str, depois))}'
+            )
+        if divergentes:
+            invalidar_dados()
+        self.stdout.write(self.style.SUCCESS(f'✅ {len(divergentes)} evento(s) corrigido(s)'))
+        return 0
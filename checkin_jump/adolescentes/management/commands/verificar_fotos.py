@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+from django.utils import timezone
+
+from adolescentes.models import Adolescente
+from adolescentes.verificacao_fotos import verificar_fotos
+
+
+class Command(BaseCommand):
+    help = (
+        'Confere no storage as fotos dos adolescentes e atualiza disponibilidade, '
+        'dimensões e tamanho (agende periodicamente, ex.: cron diário)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horas',
+            type=float,
+            default=24,
+            help='Reverifica fotos conferidas há mais de N horas (padrão: 24)',
+        )
+        parser.add_argument(
+            '--limite',
+            type=int,
+            help='Máximo de fotos por execução (as verificadas há mais tempo primeiro)',
+        )
+        parser.add_argument(
+            '--ano',
+            type=int,
+            action='append',
+            help='Ano dos adolescentes (pode repetir). Padrão: todos',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Consultas simultâneas ao storage (padrão: 8)',
+        )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(hours=options['horas'])
+        adolescentes = (
+            Adolescente.objects.exclude(foto='').exclude(foto__isnull=True)
+            .filter(Q(foto_verificada_em__isnull=True) | Q(foto_verificada_em__lt=limite))
+            .only('id', 'foto', 'foto_largura', 'foto_altura')
+            .order_by(F('foto_verificada_em').asc(nulls_first=True), 'id')
+        )
+        if options['ano']:
+            adolescentes = adolescentes.filter(ano__in=options['ano'])
+        if options['limite']:
+            adolescentes = adolescentes[:options['limite']]
+
+        adolescentes = list(adolescentes)
+        self.stdout.write(f'🔎 {len(adolescentes)} foto(s) para verificar')
+        resultado = verificar_fotos(
+            adolescentes,
+            workers=options['workers'],
+            ao_progredir=lambda feitas, total: self.stdout.write(f'   ... {feitas}/{total}'),
+        )
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {resultado.verificadas} foto(s) verificada(s)'))
+        if resultado.indisponiveis:
+            self.stdout.write(self.style.WARNING(f'⚠️  {resultado.indisponiveis} foto(s) não encontrada(s) no storage'))
+        if resultado.falhas:
+            self.stdout.write(self.style.WARNING(f'⚠️  {resultado.falhas} foto(s) sem resposta do storage (tentar de novo)'))
+        return 0
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from adolescentes.cache_utils import invalidar_dados
+from adolescentes.convidadores import resolver_visitantes
+from adolescentes.models import VisitanteEvento
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Vincula o "convidado por" (texto) dos visitantes de eventos especiais a Convidadores'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ano',
+            type=int,
+            action='append',
+            help='Ano dos eventos (pode repetir). Padrão: todos',
+        )
+        parser.add_argument(
+            '--refazer',
+            action='store_true',
+            help='Resolve de novo também os visitantes que já têm convidador',
+        )
+
+    def handle(self, *args, **options):
+        visitantes = (
+            VisitanteEvento.objects.filter(convidado_por__isnull=False)
+            .exclude(convidado_por='')
+            .select_related('evento')
+            .only('id', 'convidado_por', 'convidador', 'evento__ano')
+            .order_by('evento__ano', 'id')
+        )
+        if options['ano']:
+            visitantes = visitantes.filter(evento__ano__in=options['ano'])
+        if not options['refazer']:
+            visitantes = visitantes.filter(convidador__isnull=True)
+
+        visitantes = list(visitantes)
+        self.stdout.write(f'🔎 {len(visitantes)} visitante(s) para resolver')
+        alterados = resolver_visitantes(visitantes)
+        VisitanteEvento.objects.bulk_update(alterados, ['convidador'], batch_size=BATCH_SIZE)
+        if alterados:
+            invalidar_dados()
+        self.stdout.write(self.style.SUCCESS(f'✅ {len(alterados)} visitante(s) vinculado(s)'))
+        return 0
@@ -0,0 +1,161 @@
+"""
+Migração de visitantes de eventos especiais para o cadastro de Adolescentes.
+
+Tudo é feito por conjuntos, com um número fixo de queries por lote: os
+candidatos vêm numa única query (travados), os adolescentes novos são
+inseridos com ``bulk_create`` e os visitantes marcados com um ``bulk_update``.
+Ids inválidos, já migrados ou de outro evento viram erros por linha em vez de
+abortar o lote. Quem já está cadastrado no ano (mesmo nome, sobrenome e
+nascimento) é apenas vinculado, sem criar duplicado.
+
+Opcionalmente os adolescentes migrados recebem presença num DiaEvento.
+"""
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+
+from .cache_utils import invalidar_dados
+from .importacao import chave_duplicado
+from .models import Adolescente, Presenca, VisitanteEvento
+from .sequencias import atualizar_sequencias
+from .totais_eventos import ajustar_totais
+
+TAMANHO_LOTE = 500
+
+
+@dataclass
+class ResultadoMigracao:
+    criados: int = 0
+    vinculados: int = 0
+    checkins: int = 0
+    erros: list = field(default_factory=list)  # [(id, nome, motivo)]
+
+    @property
+    def migrados(self):
+        return self.criados + self.vinculados
+
+
+def _ids_validos(ids, resultado):
+    validos = []
+    for valor in ids:
+        try:
+            validos.append(int(valor))
+        except (TypeError, ValueError):
+            resultado.erros.append((valor, '', 'Identificador inválido'))
+    return list(dict.fromkeys(validos))
+
+
+def _adolescente_do_visitante(visitante, ano):
+    return Adolescente(
+        nome=visitante.nome,
+        sobrenome=visitante.sobrenome,
+        data_nascimento=visitante.data_nascimento,
+        telefone=visitante.telefone,
+        ano=ano,
+    )
+
+
+def _gravar_adolescentes(novos, ano, tamanho_lote):
+    """
+    Insere os adolescentes e garante que todos tenham ``pk``. Bancos com
+    RETURNING (Postgres, SQLite recente) já devolvem os ids no bulk_create; nos
+    demais os ids são buscados pela chave (nome, sobrenome, nascimento), que é
+    única entre os novos do ano.
+    """
+    Adolescente.objects.bulk_create(novos, batch_size=tamanho_lote)
+    if connection.features.can_return_rows_from_bulk_insert:
+        return
+    ids = {
+        chave_duplicado(nome, sobrenome, nascimento): pk
+        for pk, nome, sobrenome, nascimento in Adolescente.objects.filter(
+            ano=ano, data_nascimento__in={a.data_nascimento for a in novos},
+        ).order_by('id').values_list('id', 'nome', 'sobrenome', 'data_nascimento')
+    }
+    for adolescente in novos:
+        adolescente.pk = ids[chave_duplicado(adolescente.nome, adolescente.sobrenome, adolescente.data_nascimento)]
+
+
+def _registrar_checkins(adolescente_ids, dia):
+    """Marca presença no dia (cria ou corrige) e atualiza as sequências afetadas."""
+    existentes = {
+        presenca.adolescente_id: presenca
+        for presenca in Presenca.objects.filter(dia=dia, adolescente_id__in=adolescente_ids).select_for_update()
+    }
+    corrigir = [presenca for presenca in existentes.values() if not presenca.presente]
+    for presenca in corrigir:
+        presenca.presente = True
+    criar = [Presenca(adolescente_id=pk, dia=dia, presente=True) for pk in adolescente_ids if pk not in existentes]
+    # As primeiras presenças do dia dão falta nele a todos os outros do ano
+    primeiras_do_dia = bool(criar) and not existentes and not Presenca.objects.filter(dia=dia).exists()
+    if corrigir:
+        Presenca.objects.bulk_update(corrigir, ['presente'])
+    if criar:
+        Presenca.objects.bulk_create(criar, ignore_conflicts=True)
+    afetados = [presenca.adolescente_id for presenca in corrigir] + [presenca.adolescente_id for presenca in criar]
+    atualizar_sequencias(dia.ano, None if primeiras_do_dia else afetados)
+    return len(afetados)
+
+
+def migrar_visitantes(evento, ids, ano, dia=None, tamanho_lote=TAMANHO_LOTE):
+    """
+    Migra os visitantes ``ids`` do ``evento`` para os adolescentes do ``ano``
+    e, se ``dia`` for informado, faz o check-in deles nesse DiaEvento.
+    """
+    resultado = ResultadoMigracao()
+    ids = _ids_validos(ids, resultado)
+    if not ids:
+        return resultado
+
+    with transaction.atomic():
+        visitantes = {
+            visitante.id: visitante
+            for visitante in VisitanteEvento.objects.filter(id__in=ids, evento=evento).select_for_update()
+        }
+        existentes = {
+            chave_duplicado(nome, sobrenome, nascimento): pk
+            for pk, nome, sobrenome, nascimento in Adolescente.objects.filter(
+                ano=ano, data_nascimento__in={v.data_nascimento for v in visitantes.values()},
+            ).order_by('id').values_list('id', 'nome', 'sobrenome', 'data_nascimento')
+        }
+
+        novos = {}  # chave -> Adolescente a criar
+        marcar = []  # (visitante, chave)
+        for visitante_id in ids:
+            visitante = visitantes.get(visitante_id)
+            if visitante is None:
+                resultado.erros.append((visitante_id, '', 'Visitante não encontrado neste evento'))
+                continue
+            if visitante.migrado:
+                resultado.erros.append((visitante_id, visitante.nome_completo(), 'Já migrado'))
+                continue
+            chave = chave_duplicado(visitante.nome, visitante.sobrenome, visitante.data_nascimento)
+            if chave not in existentes and chave not in novos:
+                adolescente = _adolescente_do_visitante(visitante, ano)
+                try:
+                    adolescente.full_clean(exclude=['foto'], validate_unique=False, validate_constraints=False)
+                except ValidationError as e:
+                    resultado.erros.append((visitante_id, visitante.nome_completo(), '; '.join(e.messages)))
+                    continue
+                novos[chave] = adolescente
+            marcar.append((visitante, chave))
+
+        if novos:
+            _gravar_adolescentes(list(novos.values()), ano, tamanho_lote)
+        resultado.criados = len(novos)
+        resultado.vinculados = len(marcar) - len(novos)
+
+        for visitante, chave in marcar:
+            visitante.migrado = True
+            visitante.adolescente_migrado_id = existentes[chave] if chave in existentes else novos[chave].pk
+        if marcar:
+            VisitanteEvento.objects.bulk_update([v for v, _ in marcar], ['migrado', 'adolescente_migrado'], batch_size=tamanho_lote)
+            # bulk_update não dispara os sinais dos contadores
+            ajustar_totais(evento.id, migrados=len(marcar))
+
+        if dia is not None and marcar:
+            adolescente_ids = list(dict.fromkeys(v.adolescente_migrado_id for v, _ in marcar))
+            resultado.checkins = _registrar_checkins(adolescente_ids, dia)
+
+    invalidar_dados()
+    return resultado
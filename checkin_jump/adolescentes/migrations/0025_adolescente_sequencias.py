@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-19 16:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adolescentes', '0024_eventoespecial_visitanteevento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adolescente',
+            name='ausencias_seguidas',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, help_text='Faltas seguidas até o último evento'),
+        ),
+        migrations.AddField(
+            model_name='adolescente',
+            name='melhor_sequencia',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Maior sequência de presenças no ano'),
+        ),
+        migrations.AddField(
+            model_name='adolescente',
+            name='sequencia_atual',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Presenças seguidas até o último evento'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2 on 2026-10-19 16:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adolescentes', '0025_adolescente_sequencias'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListaAcompanhamento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ano', models.PositiveIntegerField(unique=True)),
+                ('calculado_em', models.DateTimeField(auto_now=True)),
+                ('min_presencas', models.PositiveIntegerField(help_text='Presenças mínimas no ano para entrar na lista')),
+                ('faltas_minimas', models.PositiveIntegerField(help_text='Faltas seguidas mínimas até o último evento')),
+                ('total_eventos', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Lista de Acompanhamento',
+                'verbose_name_plural': 'Listas de Acompanhamento',
+                'ordering': ['-ano'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ItemAcompanhamento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_presencas', models.PositiveIntegerField()),
+                ('ausencias_seguidas', models.PositiveIntegerField()),
+                ('ultima_presenca', models.DateField(blank=True, null=True)),
+                ('adolescente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='adolescentes.adolescente')),
+                ('imperio', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='adolescentes.imperio')),
+                ('pg', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='adolescentes.pequenogrupo')),
+                ('lista', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='itens', to='adolescentes.listaacompanhamento')),
+            ],
+            options={
+                'ordering': ['-ausencias_seguidas', 'adolescente__nome'],
+                'unique_together': {('lista', 'adolescente')},
+            },
+        ),
+    ]
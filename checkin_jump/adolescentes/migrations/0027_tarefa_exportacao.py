@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-19 16:12
+
+import adolescentes.models
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adolescentes', '0026_lista_acompanhamento'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TarefaExportacao',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('tipo', models.CharField(max_length=50)),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('chave', models.CharField(db_index=True, help_text='Hash de tipo + parâmetros + versão dos dados', max_length=32)),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('processando', 'Processando'), ('concluida', 'Concluída'), ('erro', 'Erro')], default='pendente', max_length=12)),
+                ('arquivo', models.FileField(blank=True, null=True, storage=adolescentes.models.storage_exportacoes, upload_to='exportacoes/')),
+                ('nome_arquivo', models.CharField(max_length=200)),
+                ('total_linhas', models.PositiveIntegerField(default=0)),
+                ('erro', models.TextField(blank=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('concluido_em', models.DateTimeField(blank=True, null=True)),
+                ('criado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Tarefa de Exportação',
+                'verbose_name_plural': 'Tarefas de Exportação',
+                'ordering': ['-criado_em'],
+            },
+        ),
+    ]
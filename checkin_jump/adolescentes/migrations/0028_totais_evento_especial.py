@@ -0,0 +1,50 @@
+# Generated by Django 5.2 on 2026-10-19 16:23
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def preencher_totais(apps, schema_editor):
+    """Preenche os contadores dos eventos existentes a partir dos visitantes"""
+    EventoEspecial = apps.get_model('adolescentes', 'EventoEspecial')
+    VisitanteEvento = apps.get_model('adolescentes', 'VisitanteEvento')
+
+    def contagem(**filtro):
+        return Coalesce(Subquery(
+            VisitanteEvento.objects.filter(evento=OuterRef('pk'), **filtro)
+            .order_by().values('evento').annotate(total=Count('id')).values('total'),
+            output_field=models.IntegerField(),
+        ), 0)
+
+    EventoEspecial.objects.update(
+        total_visitantes=contagem(),
+        total_presentes=contagem(presente=True),
+        total_migrados=contagem(migrado=True),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adolescentes', '0027_tarefa_exportacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventoespecial',
+            name='total_migrados',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='eventoespecial',
+            name='total_presentes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='eventoespecial',
+            name='total_visitantes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(preencher_totais, migrations.RunPython.noop),
+    ]
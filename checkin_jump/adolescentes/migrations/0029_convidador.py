@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-19 16:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adolescentes', '0028_totais_evento_especial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Convidador',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=200)),
+                ('chave', models.CharField(help_text='Nome normalizado (sem acentos/caixa)', max_length=200)),
+                ('fonetica', models.CharField(db_index=True, help_text='Chave fonética do nome', max_length=200)),
+                ('ano', models.PositiveIntegerField(db_index=True, default=2026)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('adolescente', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='convidadores', to='adolescentes.adolescente')),
+            ],
+            options={
+                'verbose_name': 'Convidador',
+                'verbose_name_plural': 'Convidadores',
+                'ordering': ['nome'],
+                'unique_together': {('chave', 'ano')},
+            },
+        ),
+        migrations.AddField(
+            model_name='visitanteevento',
+            name='convidador',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='convidados', to='adolescentes.convidador'),
+        ),
+    ]
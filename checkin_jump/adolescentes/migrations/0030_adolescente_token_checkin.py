@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-19 18:02
+
+import secrets
+
+from django.db import migrations, models
+
+import adolescentes.models
+
+
+def gerar_tokens(apps, schema_editor):
+    """Um token distinto por adolescente já cadastrado (o default só vale para novos)"""
+    Adolescente = apps.get_model('adolescentes', 'Adolescente')
+    adolescentes = list(Adolescente.objects.filter(token_checkin__isnull=True).only('id'))
+    for adolescente in adolescentes:
+        adolescente.token_checkin = secrets.token_urlsafe(16)
+    Adolescente.objects.bulk_update(adolescentes, ['token_checkin'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adolescentes', '0029_convidador'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adolescente',
+            name='token_checkin',
+            field=models.CharField(editable=False, max_length=32, null=True),
+        ),
+        migrations.RunPython(gerar_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='adolescente',
+            name='token_checkin',
+            field=models.CharField(default=adolescentes.models.gerar_token_checkin, editable=False, max_length=32, unique=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 16:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adolescentes', '0030_adolescente_token_checkin'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adolescente',
+            name='foto_avatar',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='fotos/miniaturas/'),
+        ),
+        migrations.AddField(
+            model_name='adolescente',
+            name='foto_preview',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='fotos/miniaturas/'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2 on 2026-10-19 16:41
+
+from django.db import migrations, models
+
+
+def marcar_fotos_existentes(apps, schema_editor):
+    """
+    Fotos já cadastradas continuam aparecendo (como antes, sem conferir o
+    storage); sem data de verificação, são as primeiras que verificar_fotos confere.
+    """
+    Adolescente = apps.get_model('adolescentes', 'Adolescente')
+    Adolescente.objects.exclude(foto='').exclude(foto__isnull=True).update(foto_disponivel=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adolescentes', '0031_miniaturas_foto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adolescente',
+            name='foto_altura',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='adolescente',
+            name='foto_bytes',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='adolescente',
+            name='foto_disponivel',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='adolescente',
+            name='foto_largura',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='adolescente',
+            name='foto_verificada_em',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(marcar_fotos_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+from adolescentes.convidadores import resolver_visitantes
+
+
+def vincular_convidadores(apps, schema_editor):
+    """
+    Resolve o "convidado por" dos visitantes cadastrados antes da 0029: sem
+    isso os rankings (que agregam por convidador) ignorariam os eventos antigos
+    até alguém rodar vincular_convidadores.
+    """
+    VisitanteEvento = apps.get_model('adolescentes', 'VisitanteEvento')
+    visitantes = list(
+        VisitanteEvento.objects.filter(convidado_por__isnull=False, convidador__isnull=True)
+        .exclude(convidado_por='')
+        .select_related('evento')
+        .order_by('evento__ano', 'id')
+    )
+    alterados = resolver_visitantes(visitantes, apps)
+    VisitanteEvento.objects.bulk_update(alterados, ['convidador'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adolescentes', '0032_metadados_foto'),
+    ]
+
+    operations = [
+        migrations.RunPython(vincular_convidadores, migrations.RunPython.noop),
+    ]
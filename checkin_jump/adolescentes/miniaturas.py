@@ -0,0 +1,157 @@
+"""
+Variantes reduzidas de ``Adolescente.foto`` para as listagens.
+
+Cada foto nova ganha duas versões JPEG gravadas no mesmo storage da original
+(local ou Cloudinary), em ``fotos/miniaturas/``:
+
+- ``avatar``: quadrado de 192 px recortado no centro (avatares de 36 a 96 px,
+  inclusive em telas 2x);
+- ``preview``: lado maior de 800 px, sem recorte (foto ampliada no modal).
+
+Os templates pedem um tamanho em pixels e recebem a menor variante que o cobre
+(``foto_url`` em ``image_utils``); sem variante gerada, a original é usada.
+Na mesma leitura são anotados os metadados da original (largura, altura,
+bytes, disponível, quando foi verificada), que os templates usam sem consultar
+o storage. A geração não toca no banco (``gerar_variantes``), então pode rodar
+em outro processo; ``atualizar_miniaturas`` grava tudo com um ``update``.
+"""
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .models import Adolescente
+
+logger = logging.getLogger(__name__)
+
+PASTA = 'fotos/miniaturas'
+QUALIDADE = 82
+# (variante, campo no modelo, lado em px, recorta quadrado), da menor para a maior
+VARIANTES = (
+    ('avatar', 'foto_avatar', 192, True),
+    ('preview', 'foto_preview', 800, False),
+)
+CAMPOS = tuple(campo for _, campo, _, _ in VARIANTES)
+CAMPOS_METADADOS = ('foto_disponivel', 'foto_largura', 'foto_altura', 'foto_bytes', 'foto_verificada_em')
+# Orientações EXIF que giram a imagem em 90°
+_ORIENTACOES_DEITADAS = {5, 6, 7, 8}
+# Variantes cobrem imagens exibidas até metade do seu lado (telas de alta densidade)
+DENSIDADE = 2
+
+
+def nome_variante(nome, variante):
+    raiz = os.path.splitext(os.path.basename(nome))[0]
+    return f'{PASTA}/{raiz}_{variante}.jpg'
+
+
+def _reduzir(imagem, lado, recortar):
+    if recortar:
+        return ImageOps.fit(imagem, (lado, lado), Image.LANCZOS)
+    reduzida = imagem.copy()
+    reduzida.thumbnail((lado, lado), Image.LANCZOS)
+    return reduzida
+
+
+def _jpeg(imagem):
+    saida = BytesIO()
+    imagem.save(saida, format='JPEG', quality=QUALIDADE, optimize=True, progressive=True)
+    return saida.getvalue()
+
+
+def metadados(disponivel, largura=None, altura=None, tamanho=None):
+    """Valores dos campos de metadados da foto, verificados agora."""
+    return {
+        'foto_disponivel': disponivel,
+        'foto_largura': largura,
+        'foto_altura': altura,
+        'foto_bytes': tamanho,
+        'foto_verificada_em': timezone.now(),
+    }
+
+
+def dimensoes(imagem):
+    """(largura, altura) como a foto é exibida, já considerando a orientação EXIF."""
+    largura, altura = imagem.size
+    if imagem.getexif().get(0x0112) in _ORIENTACOES_DEITADAS:
+        return altura, largura
+    return largura, altura
+
+
+def gerar_variantes(nome, storage):
+    """
+    Lê a foto ``nome`` do ``storage`` e grava as variantes ao lado dela.
+    Retorna {campo: valor} com os nomes gravados e os metadados da original.
+    Não acessa o banco.
+    """
+    with storage.open(nome, 'rb') as arquivo:
+        tamanho = getattr(arquivo, 'size', None)
+        imagem = Image.open(arquivo)
+        largura, altura = dimensoes(imagem)
+        imagem.draft('RGB', (VARIANTES[-1][2] * 2, VARIANTES[-1][2] * 2))  # JPEG: decodifica já reduzido
+        imagem = ImageOps.exif_transpose(imagem).convert('RGB')
+    gravados = metadados(True, largura, altura, tamanho)
+    for variante, campo, lado, recortar in VARIANTES:
+        conteudo = ContentFile(_jpeg(_reduzir(imagem, lado, recortar)))
+        gravados[campo] = storage.save(nome_variante(nome, variante), conteudo)
+    return gravados
+
+
+def remover_arquivos(nomes, storage):
+    for nome in nomes:
+        try:
+            storage.delete(nome)
+        except Exception:
+            logger.warning('Não foi possível remover a miniatura %s', nome, exc_info=True)
+
+
+def atualizar_miniaturas(adolescente):
+    """
+    Gera as variantes e os metadados da foto atual do adolescente (ou limpa
+    tudo, se a foto foi removida) e grava sem disparar sinais.
+    """
+    antigas = [getattr(adolescente, campo).name for campo in CAMPOS if getattr(adolescente, campo)]
+    if not adolescente.foto and not antigas and not adolescente.foto_disponivel:
+        return
+    storage = adolescente.foto.storage
+    valores = {campo: None for campo in CAMPOS}
+    if not adolescente.foto:
+        valores.update(metadados(False), foto_verificada_em=None)
+    else:
+        try:
+            valores.update(gerar_variantes(adolescente.foto.name, storage))
+        except Exception:
+            # Arquivo ausente ou que não é imagem: sem miniaturas; disponível se existir
+            logger.warning('Miniaturas não geradas para %s', adolescente.foto.name, exc_info=True)
+            try:
+                existe = storage.exists(adolescente.foto.name)
+            except Exception:
+                existe = False
+            valores.update(metadados(existe))
+    Adolescente.objects.filter(pk=adolescente.pk).update(**valores)
+    for campo, valor in valores.items():
+        setattr(adolescente, campo, valor)
+    novas = {valores[campo] for campo in CAMPOS}
+    remover_arquivos([nome for nome in antigas if nome not in novas], storage)
+
+
+def url_foto(adolescente, tamanho=None):
+    """
+    URL da menor variante que cobre ``tamanho`` px de exibição (a original se
+    nenhuma cobrir ou se ainda não foram geradas). None sem foto ou se o
+    arquivo não está disponível. Não consulta o storage.
+    """
+    if not adolescente.foto or not adolescente.foto_disponivel:
+        return None
+    arquivo = adolescente.foto
+    if tamanho:
+        for _, campo, lado, _ in VARIANTES:
+            if lado >= int(tamanho) * DENSIDADE and getattr(adolescente, campo):
+                arquivo = getattr(adolescente, campo)
+                break
+    try:
+        return arquivo.url
+    except (ValueError, AttributeError):
+        return None
@@ -1,4 +1,9 @@
-from django.db import models
+import secrets
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import default_storage, storages
+from django.db import models, transaction
 from django.contrib.auth.models import User
 
 class PequenoGrupo(models.Model):
@@ -38,10 +43,25 @@ class Imperio(models.Model):
         unique_together = [('nome', 'ano')]
         ordering = ['nome']
 
+def gerar_token_checkin():
+    """Token aleatório (não sequencial) gravado no QR do crachá."""
+    return secrets.token_urlsafe(16)
+
+
 class Adolescente(models.Model):
     nome = models.CharField(max_length=100)
     sobrenome = models.CharField(max_length=100)
     foto = models.ImageField(upload_to='fotos/', blank=True, null=True)
+    # Versões reduzidas da foto para as listagens (geradas por miniaturas.py)
+    foto_avatar = models.ImageField(upload_to='fotos/miniaturas/', blank=True, null=True, editable=False)
+    foto_preview = models.ImageField(upload_to='fotos/miniaturas/', blank=True, null=True, editable=False)
+    # Metadados da foto original: gravados no upload e conferidos pelo comando
+    # verificar_fotos, para as páginas não consultarem o storage a cada exibição
+    foto_disponivel = models.BooleanField(default=False, db_index=True, editable=False)
+    foto_largura = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    foto_altura = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    foto_bytes = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    foto_verificada_em = models.DateTimeField(blank=True, null=True, db_index=True, editable=False)
     data_nascimento = models.DateField()
     telefone = models.CharField(max_length=20, blank=True, null=True, help_text="Telefone do adolescente")
     GENERO_CHOICES = [
@@ -54,6 +74,12 @@ class Adolescente(models.Model):
     nome_responsavel = models.CharField(max_length=200, blank=True, null=True, help_text="Nome do pai/mãe ou responsável")
     telefone_responsavel = models.CharField(max_length=20, blank=True, null=True, help_text="Telefone do responsável")
     ano = models.PositiveIntegerField(default=2026, db_index=True)
+    # Sequências calculadas sobre os DiaEventos do ano (mantidas por sequencias.py)
+    sequencia_atual = models.PositiveIntegerField(default=0, editable=False, help_text="Presenças seguidas até o último evento")
+    melhor_sequencia = models.PositiveIntegerField(default=0, editable=False, help_text="Maior sequência de presenças no ano")
+    ausencias_seguidas = models.PositiveIntegerField(default=0, db_index=True, editable=False, help_text="Faltas seguidas até o último evento")
+    # Lido pelo scanner de crachás: índice único, busca direta sem varrer nomes
+    token_checkin = models.CharField(max_length=32, unique=True, default=gerar_token_checkin, editable=False)
 
     class Meta:
         permissions = [
@@ -64,6 +90,14 @@ class Adolescente(models.Model):
 
     def __str__(self):
         return f"{self.nome} {self.sobrenome}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Foto como estava no banco, para só refazer as miniaturas quando ela muda
+        if 'foto' in field_names:
+            instance._foto_original = instance.foto.name or ''
+        return instance
     
     def ultimas_presencas(self):
         return self.presenca_set.order_by('-dia__data')[:5]
@@ -160,6 +194,10 @@ class EventoEspecial(models.Model):
     descricao = models.TextField(blank=True, null=True, help_text="Descrição opcional do evento")
     criado_em = models.DateTimeField(auto_now_add=True)
     criado_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    # Contadores dos visitantes, mantidos por totais_eventos.py
+    total_visitantes = models.PositiveIntegerField(default=0, editable=False)
+    total_presentes = models.PositiveIntegerField(default=0, editable=False)
+    total_migrados = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         unique_together = [('nome', 'data', 'ano')]
@@ -169,14 +207,40 @@ class EventoEspecial(models.Model):
 
     def __str__(self):
         return f"{self.nome} - {self.data.strftime('%d/%m/%Y')}"
-    
-    def total_visitantes(self):
-        """Retorna o total de visitantes cadastrados para este evento"""
-        return self.visitantes.count()
-    
-    def total_presentes(self):
-        """Retorna o total de visitantes presentes no evento"""
-        return self.visitantes.filter(presente=True).count()
+
+    def save(self, *args, **kwargs):
+        # Os contadores só mudam por incremento (totais_eventos.py): editar o
+        # evento não pode sobrescrevê-los com valores carregados antes
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                campo.attname for campo in self._meta.concrete_fields
+                if not campo.primary_key and not campo.attname.startswith('total_')
+            ]
+        super().save(*args, **kwargs)
+
+
+class Convidador(models.Model):
+    """
+    Quem convida visitantes para os eventos especiais de um ano. O texto livre
+    ``VisitanteEvento.convidado_por`` é resolvido para um Convidador
+    (convidadores.py) por nome normalizado/fonético, vinculando ao Adolescente
+    correspondente quando houver.
+    """
+    nome = models.CharField(max_length=200)
+    chave = models.CharField(max_length=200, help_text="Nome normalizado (sem acentos/caixa)")
+    fonetica = models.CharField(max_length=200, db_index=True, help_text="Chave fonética do nome")
+    ano = models.PositiveIntegerField(default=2026, db_index=True)
+    adolescente = models.ForeignKey(Adolescente, on_delete=models.SET_NULL, null=True, blank=True, related_name='convidadores')
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = [('chave', 'ano')]
+        ordering = ['nome']
+        verbose_name = "Convidador"
+        verbose_name_plural = "Convidadores"
+
+    def __str__(self):
+        return f"{self.nome} ({self.ano})"
 
 
 class VisitanteEvento(models.Model):
@@ -186,6 +250,7 @@ class VisitanteEvento(models.Model):
     data_nascimento = models.DateField()
     telefone = models.CharField(max_length=20, blank=True, null=True)
     convidado_por = models.CharField(max_length=200, blank=True, null=True, help_text="Quem convidou este visitante")
+    convidador = models.ForeignKey(Convidador, on_delete=models.SET_NULL, null=True, blank=True, related_name='convidados', editable=False)
     presente = models.BooleanField(default=True, help_text="Marcou presença no evento")
     migrado = models.BooleanField(default=False, help_text="Se já foi movido para a tabela de Adolescentes")
     adolescente_migrado = models.ForeignKey(Adolescente, on_delete=models.SET_NULL, null=True, blank=True, help_text="Adolescente criado após migração")
@@ -206,3 +271,107 @@ class VisitanteEvento(models.Model):
     
     def nome_completo(self):
         return f"{self.nome} {self.sobrenome}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valores como estavam no banco, para ajustar os contadores do evento
+        if {'evento_id', 'presente', 'migrado'} <= set(field_names):
+            instance._contagem_original = instance.contagem()
+        if 'convidado_por' in field_names:
+            instance._convidado_por_original = instance.convidado_por
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Os contadores do evento são ajustados pela diferença para o que está no
+        # banco (sinal de post_save). Relê a linha com trava: duas edições do
+        # mesmo visitante carregado antes não aplicam a mesma diferença duas vezes.
+        with transaction.atomic():
+            if not self._state.adding and self.pk is not None:
+                no_banco = (
+                    VisitanteEvento.objects.select_for_update().filter(pk=self.pk)
+                    .values_list('evento_id', 'presente', 'migrado').first()
+                )
+                if no_banco is not None:
+                    evento_id, presente, migrado = no_banco
+                    self._contagem_original = (evento_id, 1, int(presente), int(migrado))
+            super().save(*args, **kwargs)
+
+    def contagem(self):
+        """(evento_id, visitantes, presentes, migrados) com que este visitante contribui."""
+        return (self.evento_id, 1, int(self.presente), int(self.migrado))
+
+
+class ListaAcompanhamento(models.Model):
+    """Lista de acompanhamento (adolescentes que sumiram) pré-calculada por ano."""
+    ano = models.PositiveIntegerField(unique=True)
+    calculado_em = models.DateTimeField(auto_now=True)
+    min_presencas = models.PositiveIntegerField(help_text="Presenças mínimas no ano para entrar na lista")
+    faltas_minimas = models.PositiveIntegerField(help_text="Faltas seguidas mínimas até o último evento")
+    total_eventos = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-ano']
+        verbose_name = "Lista de Acompanhamento"
+        verbose_name_plural = "Listas de Acompanhamento"
+
+    def __str__(self):
+        return f"Acompanhamento {self.ano} ({self.calculado_em:%d/%m/%Y %H:%M})"
+
+
+class ItemAcompanhamento(models.Model):
+    lista = models.ForeignKey(ListaAcompanhamento, on_delete=models.CASCADE, related_name='itens')
+    adolescente = models.ForeignKey(Adolescente, on_delete=models.CASCADE, related_name='+')
+    pg = models.ForeignKey(PequenoGrupo, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    imperio = models.ForeignKey(Imperio, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    total_presencas = models.PositiveIntegerField()
+    ausencias_seguidas = models.PositiveIntegerField()
+    ultima_presenca = models.DateField(null=True, blank=True)
+
+    class Meta:
+        unique_together = [('lista', 'adolescente')]
+        ordering = ['-ausencias_seguidas', 'adolescente__nome']
+
+    def __str__(self):
+        return f"{self.adolescente} - {self.ausencias_seguidas} faltas"
+
+
+def storage_exportacoes():
+    """Storage dos arquivos exportados: ``STORAGES['exportacoes']`` se configurado, senão o padrão."""
+    if 'exportacoes' in settings.STORAGES:
+        return storages['exportacoes']
+    return default_storage
+
+
+class TarefaExportacao(models.Model):
+    """Exportação gerada em segundo plano; o arquivo fica no storage padrão."""
+    STATUS_CHOICES = [
+        ("pendente", "Pendente"),
+        ("processando", "Processando"),
+        ("concluida", "Concluída"),
+        ("erro", "Erro"),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    tipo = models.CharField(max_length=50)
+    parametros = models.JSONField(default=dict, blank=True)
+    chave = models.CharField(max_length=32, db_index=True, help_text="Hash de tipo + parâmetros + versão dos dados")
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default="pendente")
+    arquivo = models.FileField(upload_to='exportacoes/', storage=storage_exportacoes, blank=True, null=True)
+    nome_arquivo = models.CharField(max_length=200)
+    total_linhas = models.PositiveIntegerField(default=0)
+    erro = models.TextField(blank=True)
+    criado_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-criado_em']
+        verbose_name = "Tarefa de Exportação"
+        verbose_name_plural = "Tarefas de Exportação"
+
+    def __str__(self):
+        return f"{self.nome_arquivo} ({self.get_status_display()})"
+
+    @property
+    def finalizada(self):
+        return self.status in ("concluida", "erro")
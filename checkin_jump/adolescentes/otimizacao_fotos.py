@@ -0,0 +1,170 @@
+"""
+Reprocessamento das fotos enviadas antes de irem para o storage.
+
+Os celulares dos pais enviam JPEGs de 12 MP (e conversões de HEIC) com vários
+MB, orientação só no EXIF e metadados como GPS. ``otimizar`` aplica a
+orientação, descarta os metadados (mantém só o perfil de cor), limita o lado
+maior a ``FOTOS_LADO_MAXIMO`` e recodifica em ``FOTOS_FORMATO`` (JPEG ou WebP).
+
+No cadastro, o ``AdolescenteForm`` valida o upload mas não o atribui à foto:
+a view chama ``enfileirar_upload``, que guarda os bytes e, depois do commit,
+entrega a um pool de threads do processo (como as exportações de
+``tarefas.py``). A thread grava a versão reduzida e só então troca a foto do
+adolescente, o que dispara as miniaturas pelo sinal de sempre. Até lá a
+foto anterior (ou nenhuma) continua sendo exibida.
+
+O comando ``otimizar_fotos`` aplica o mesmo tratamento às fotos já gravadas.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from .miniaturas import remover_arquivos
+from .models import Adolescente
+
+logger = logging.getLogger(__name__)
+
+EXTENSOES = {'JPEG': 'jpg', 'WEBP': 'webp'}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def lado_maximo():
+    return getattr(settings, 'FOTOS_LADO_MAXIMO', 1600)
+
+
+def formato():
+    return getattr(settings, 'FOTOS_FORMATO', 'JPEG').upper()
+
+
+def qualidade():
+    return getattr(settings, 'FOTOS_QUALIDADE', 85)
+
+
+def _sem_transparencia(imagem):
+    if imagem.mode in ('RGBA', 'LA', 'PA') or 'transparency' in imagem.info:
+        imagem = imagem.convert('RGBA')
+        fundo = Image.new('RGB', imagem.size, 'white')
+        fundo.paste(imagem, mask=imagem.getchannel('A'))
+        return fundo
+    return imagem.convert('RGB')
+
+
+def ja_otimizada(imagem):
+    """True se a imagem já está no formato, no tamanho e sem metadados (EXIF)."""
+    return (
+        imagem.format == formato()
+        and max(imagem.size) <= lado_maximo()
+        and not imagem.info.get('exif')
+        and not imagem.getexif()
+    )
+
+
+def otimizar(arquivo, forcar=True):
+    """
+    Lê a imagem de ``arquivo`` (bytes ou arquivo aberto) e retorna os bytes
+    reprocessados. Com ``forcar=False`` retorna None se ela já estiver
+    otimizada (evita recodificar — e perder qualidade — a cada execução).
+    Levanta as exceções do Pillow para arquivos que não são imagem.
+    """
+    if isinstance(arquivo, bytes):
+        arquivo = BytesIO(arquivo)
+    imagem = Image.open(arquivo)
+    if not forcar and ja_otimizada(imagem):
+        return None
+    lado = lado_maximo()
+    imagem.draft('RGB', (lado, lado))  # JPEG: decodifica já reduzido quando possível
+    icc = imagem.info.get('icc_profile')
+    imagem = _sem_transparencia(ImageOps.exif_transpose(imagem))
+    imagem.thumbnail((lado, lado), Image.LANCZOS)
+
+    saida = BytesIO()
+    opcoes = {'quality': qualidade()}
+    if icc:
+        opcoes['icc_profile'] = icc  # perfil de cor não é metadado pessoal: sem ele as cores mudam
+    if formato() == 'WEBP':
+        opcoes['method'] = 6
+    else:
+        opcoes.update(optimize=True, progressive=True)
+    imagem.save(saida, format=formato(), **opcoes)
+    return saida.getvalue()
+
+
+def nome_otimizado(nome):
+    """Nome para a versão reprocessada de ``nome``, na pasta de upload das fotos."""
+    raiz = os.path.splitext(os.path.basename(nome))[0] or 'foto'
+    campo = Adolescente._meta.get_field('foto')
+    return campo.generate_filename(None, f'{raiz}.{EXTENSOES[formato()]}')
+
+
+def gravar_otimizada(conteudo, nome, storage):
+    """Reprocessa ``conteudo`` e grava no ``storage``; retorna o nome gravado."""
+    try:
+        otimizado = otimizar(conteudo)
+    except Exception:
+        # O form já validou a imagem: se ainda assim o Pillow falhar, grava como veio
+        logger.warning('Não foi possível reprocessar a foto %s', nome, exc_info=True)
+        return storage.save(Adolescente._meta.get_field('foto').generate_filename(None, nome), ContentFile(conteudo))
+    return storage.save(nome_otimizado(nome), ContentFile(otimizado))
+
+
+def aplicar_upload(adolescente_id, conteudo, nome):
+    """Grava a foto enviada já reprocessada e a associa ao adolescente."""
+    storage = Adolescente._meta.get_field('foto').storage
+    gravado = gravar_otimizada(conteudo, nome, storage)
+    adolescente = Adolescente.objects.filter(pk=adolescente_id).first()
+    if adolescente is None:
+        # Excluído enquanto a foto era processada
+        storage.delete(gravado)
+        return None
+    anterior = adolescente.foto.name if adolescente.foto else None
+    adolescente.foto = gravado
+    # O sinal de post_save gera as miniaturas e invalida o cache
+    adolescente.save(update_fields=['foto'])
+    if anterior and anterior != gravado:
+        # A original substituída não é mais referenciada (o mesmo que otimizar_fotos faz)
+        remover_arquivos([anterior], storage)
+    return adolescente
+
+
+def obter_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'FOTOS_WORKERS', 2),
+                thread_name_prefix='fotos',
+            )
+        return _executor
+
+
+def _aplicar_em_thread(adolescente_id, conteudo, nome):
+    close_old_connections()
+    try:
+        aplicar_upload(adolescente_id, conteudo, nome)
+    except Exception:
+        logger.exception('Falha ao gravar a foto do adolescente %s', adolescente_id)
+    finally:
+        close_old_connections()
+
+
+def enfileirar_upload(adolescente, arquivo):
+    """
+    Agenda o reprocessamento de ``arquivo`` (upload já validado) como foto do
+    ``adolescente``. Os bytes são lidos agora: o arquivo temporário do upload
+    não sobrevive à requisição.
+    """
+    arquivo.seek(0)
+    conteudo = arquivo.read()
+    nome = os.path.basename(arquivo.name or 'foto.jpg')
+    adolescente_id = adolescente.pk
+    # Só enfileira depois do commit: a thread precisa enxergar o adolescente
+    transaction.on_commit(lambda: obter_executor().submit(_aplicar_em_thread, adolescente_id, conteudo, nome))
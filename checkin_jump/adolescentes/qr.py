@@ -0,0 +1,277 @@
+"""
+Gerador de QR Code (modo byte, correção de erros nível M, versões 1 a 10)
+renderizado com Pillow, para os crachás de check-in.
+
+Implementa só o necessário para textos curtos como ``JUMP:<token>``: escolha
+da menor versão que comporta os dados, Reed-Solomon em GF(256), posicionamento
+dos módulos e escolha da máscara de menor penalidade (ISO/IEC 18004).
+"""
+from PIL import Image
+
+# Nível M por versão: (codewords de correção por bloco, [(blocos, codewords de dados por bloco)])
+_BLOCOS_M = {
+    1: (10, [(1, 16)]),
+    2: (16, [(1, 28)]),
+    3: (26, [(1, 44)]),
+    4: (18, [(2, 32)]),
+    5: (24, [(2, 43)]),
+    6: (16, [(4, 27)]),
+    7: (18, [(4, 31)]),
+    8: (22, [(2, 38), (2, 39)]),
+    9: (22, [(3, 36), (2, 37)]),
+    10: (26, [(4, 43), (1, 44)]),
+}
+_ALINHAMENTO = {
+    1: [], 2: [6, 18], 3: [6, 22], 4: [6, 26], 5: [6, 30],
+    6: [6, 34], 7: [6, 22, 38], 8: [6, 24, 42], 9: [6, 26, 46], 10: [6, 28, 50],
+}
+_FORMATO_M = 0  # bits do nível M na informação de formato
+_MASCARAS = (
+    lambda x, y: (x + y) % 2 == 0,
+    lambda x, y: y % 2 == 0,
+    lambda x, y: x % 3 == 0,
+    lambda x, y: (x + y) % 3 == 0,
+    lambda x, y: (x // 3 + y // 2) % 2 == 0,
+    lambda x, y: x * y % 2 + x * y % 3 == 0,
+    lambda x, y: (x * y % 2 + x * y % 3) % 2 == 0,
+    lambda x, y: ((x + y) % 2 + x * y % 3) % 2 == 0,
+)
+
+
+# --- Reed-Solomon ---
+
+def _multiplicar(x, y):
+    """Multiplicação em GF(2^8) com o polinômio 0x11D."""
+    z = 0
+    for i in reversed(range(8)):
+        z = (z << 1) ^ ((z >> 7) * 0x11D)
+        z ^= ((y >> i) & 1) * x
+    return z
+
+
+def _divisor(grau):
+    resultado = [0] * (grau - 1) + [1]
+    raiz = 1
+    for _ in range(grau):
+        for j in range(grau):
+            resultado[j] = _multiplicar(resultado[j], raiz)
+            if j + 1 < grau:
+                resultado[j] ^= resultado[j + 1]
+        raiz = _multiplicar(raiz, 0x02)
+    return resultado
+
+
+def _correcao(dados, divisor):
+    resto = [0] * len(divisor)
+    for byte in dados:
+        fator = byte ^ resto.pop(0)
+        resto.append(0)
+        for i, coeficiente in enumerate(divisor):
+            resto[i] ^= _multiplicar(coeficiente, fator)
+    return resto
+
+
+# --- Codificação ---
+
+def _capacidade(versao):
+    _, grupos = _BLOCOS_M[versao]
+    return sum(blocos * tamanho for blocos, tamanho in grupos)
+
+
+def _codewords(dados, versao):
+    """Dados + correção, já intercalados por bloco."""
+    bits = []
+
+    def anexar(valor, quantidade):
+        bits.extend((valor >> i) & 1 for i in reversed(range(quantidade)))
+
+    anexar(0b0100, 4)
+    anexar(len(dados), 8 if versao < 10 else 16)
+    for byte in dados:
+        anexar(byte, 8)
+    capacidade = _capacidade(versao) * 8
+    anexar(0, min(4, capacidade - len(bits)))
+    anexar(0, -len(bits) % 8)
+    palavras = [int(''.join(map(str, bits[i:i + 8])), 2) for i in range(0, len(bits), 8)]
+    for preenchimento in (0xEC, 0x11) * capacidade:
+        if len(palavras) * 8 >= capacidade:
+            break
+        palavras.append(preenchimento)
+
+    grau, grupos = _BLOCOS_M[versao]
+    divisor = _divisor(grau)
+    blocos = []
+    inicio = 0
+    for quantidade, tamanho in grupos:
+        for _ in range(quantidade):
+            bloco = palavras[inicio:inicio + tamanho]
+            blocos.append((bloco, _correcao(bloco, divisor)))
+            inicio += tamanho
+
+    resultado = []
+    for i in range(max(len(bloco) for bloco, _ in blocos)):
+        resultado.extend(bloco[i] for bloco, _ in blocos if i < len(bloco))
+    for i in range(grau):
+        resultado.extend(correcao[i] for _, correcao in blocos)
+    return resultado
+
+
+class _Matriz:
+    def __init__(self, versao):
+        self.versao = versao
+        self.tamanho = versao * 4 + 17
+        self.modulos = [[False] * self.tamanho for _ in range(self.tamanho)]
+        self.funcao = [[False] * self.tamanho for _ in range(self.tamanho)]
+        self._padroes_fixos()
+
+    def marcar(self, x, y, escuro):
+        self.modulos[y][x] = escuro
+        self.funcao[y][x] = True
+
+    def _padroes_fixos(self):
+        n = self.tamanho
+        for i in range(n):
+            self.marcar(6, i, i % 2 == 0)
+            self.marcar(i, 6, i % 2 == 0)
+        for cx, cy in ((3, 3), (n - 4, 3), (3, n - 4)):
+            for dy in range(-4, 5):
+                for dx in range(-4, 5):
+                    x, y = cx + dx, cy + dy
+                    if 0 <= x < n and 0 <= y < n:
+                        self.marcar(x, y, max(abs(dx), abs(dy)) not in (2, 4))
+        posicoes = _ALINHAMENTO[self.versao]
+        ultima = len(posicoes) - 1
+        for i, cx in enumerate(posicoes):
+            for j, cy in enumerate(posicoes):
+                if (i, j) in ((0, 0), (0, ultima), (ultima, 0)):
+                    continue
+                for dy in range(-2, 3):
+                    for dx in range(-2, 3):
+                        self.marcar(cx + dx, cy + dy, max(abs(dx), abs(dy)) != 1)
+        self.formato(0)
+        if self.versao >= 7:
+            resto = self.versao
+            for _ in range(12):
+                resto = (resto << 1) ^ ((resto >> 11) * 0x1F25)
+            bits = self.versao << 12 | resto
+            for i in range(18):
+                escuro = (bits >> i) & 1 == 1
+                a, b = n - 11 + i % 3, i // 3
+                self.marcar(a, b, escuro)
+                self.marcar(b, a, escuro)
+
+    def formato(self, mascara):
+        n = self.tamanho
+        dados = _FORMATO_M << 3 | mascara
+        resto = dados
+        for _ in range(10):
+            resto = (resto << 1) ^ ((resto >> 9) * 0x537)
+        bits = (dados << 10 | resto) ^ 0x5412
+
+        def bit(i):
+            return (bits >> i) & 1 == 1
+
+        for i in range(6):
+            self.marcar(8, i, bit(i))
+        self.marcar(8, 7, bit(6))
+        self.marcar(8, 8, bit(7))
+        self.marcar(7, 8, bit(8))
+        for i in range(9, 15):
+            self.marcar(14 - i, 8, bit(i))
+        for i in range(8):
+            self.marcar(n - 1 - i, 8, bit(i))
+        for i in range(8, 15):
+            self.marcar(8, n - 15 + i, bit(i))
+        self.marcar(8, n - 8, True)
+
+    def posicionar(self, codewords):
+        n = self.tamanho
+        i = 0
+        total = len(codewords) * 8
+        direita = n - 1
+        while direita >= 1:
+            if direita == 6:
+                direita = 5
+            for vertical in range(n):
+                for j in range(2):
+                    x = direita - j
+                    subindo = ((direita + 1) & 2) == 0
+                    y = n - 1 - vertical if subindo else vertical
+                    if not self.funcao[y][x] and i < total:
+                        self.modulos[y][x] = (codewords[i >> 3] >> (7 - (i & 7))) & 1 == 1
+                        i += 1
+            direita -= 2
+
+    def mascarar(self, mascara):
+        condicao = _MASCARAS[mascara]
+        for y in range(self.tamanho):
+            for x in range(self.tamanho):
+                if not self.funcao[y][x] and condicao(x, y):
+                    self.modulos[y][x] = not self.modulos[y][x]
+
+    def penalidade(self):
+        n = self.tamanho
+        m = self.modulos
+        pontos = 0
+        linhas = [m[y] for y in range(n)] + [[m[y][x] for y in range(n)] for x in range(n)]
+        padrao = [True, False, True, True, True, False, True]
+        for linha in linhas:
+            corrida = 1
+            for i in range(1, n + 1):
+                if i < n and linha[i] == linha[i - 1]:
+                    corrida += 1
+                    continue
+                if corrida >= 5:
+                    pontos += corrida - 2
+                corrida = 1
+            for i in range(n - 6):
+                if linha[i:i + 7] == padrao:
+                    antes = linha[max(0, i - 4):i]
+                    depois = linha[i + 7:i + 11]
+                    if (len(antes) == 4 and not any(antes)) or (len(depois) == 4 and not any(depois)):
+                        pontos += 40
+        for y in range(n - 1):
+            for x in range(n - 1):
+                if m[y][x] == m[y][x + 1] == m[y + 1][x] == m[y + 1][x + 1]:
+                    pontos += 3
+        escuros = sum(map(sum, m))
+        pontos += abs(escuros * 20 - n * n * 10) // (n * n) * 10
+        return pontos
+
+
+def gerar_matriz(texto, versao=None, mascara=None):
+    """Matriz de módulos (lista de linhas de bool, sem a borda) para o texto."""
+    dados = texto.encode('utf-8') if isinstance(texto, str) else bytes(texto)
+    if versao is None:
+        for candidata in _BLOCOS_M:
+            cabecalho = 4 + (8 if candidata < 10 else 16)
+            if cabecalho + len(dados) * 8 <= _capacidade(candidata) * 8:
+                versao = candidata
+                break
+        else:
+            raise ValueError('Texto longo demais para o QR Code')
+    codewords = _codewords(dados, versao)
+
+    melhor = None
+    for candidata in range(8) if mascara is None else [mascara]:
+        matriz = _Matriz(versao)
+        matriz.posicionar(codewords)
+        matriz.mascarar(candidata)
+        matriz.formato(candidata)
+        pontos = matriz.penalidade() if mascara is None else 0
+        if melhor is None or pontos < melhor[0]:
+            melhor = (pontos, matriz)
+    return melhor[1].modulos
+
+
+def imagem_qr(texto, escala=8, borda=4):
+    """Imagem (modo "1") do QR Code, com ``borda`` módulos de margem branca."""
+    modulos = gerar_matriz(texto)
+    lado = len(modulos) + borda * 2
+    imagem = Image.new('1', (lado, lado), 1)
+    pixels = imagem.load()
+    for y, linha in enumerate(modulos):
+        for x, escuro in enumerate(linha):
+            if escuro:
+                pixels[x + borda, y + borda] = 0
+    return imagem.resize((lado * escala, lado * escala), Image.NEAREST)
@@ -0,0 +1,125 @@
+"""
+Sequências de presença por adolescente (streaks).
+
+Para cada adolescente guardamos, considerando os DiaEventos do ano já
+ocorridos em ordem cronológica:
+
+- ``sequencia_atual``: presenças seguidas terminando no último evento;
+- ``melhor_sequencia``: maior sequência de presenças do ano;
+- ``ausencias_seguidas``: faltas seguidas terminando no último evento.
+
+Os valores são recalculados apenas para os adolescentes afetados quando as
+presenças de um dia são corrigidas, e para o ano inteiro quando as primeiras
+presenças de um dia são gravadas (os ausentes ganham uma falta) ou quando um
+DiaEvento é criado ou removido. Como os dias costumam ser criados com
+antecedência, um dia sem nenhum check-in só passa a contar quando o comando
+``recalcular_sequencias`` roda depois dele — agende-o diariamente (cron).
+"""
+from datetime import date
+
+import numpy as np
+from django.db import transaction
+
+from .analytics import carregar_matriz
+from .models import Adolescente, ListaAcompanhamento, ItemAcompanhamento
+
+CAMPOS = ('sequencia_atual', 'melhor_sequencia', 'ausencias_seguidas')
+BATCH_SIZE = 500
+
+# Critérios padrão da lista de acompanhamento (quem já vinha e sumiu)
+MIN_PRESENCAS_ACOMPANHAMENTO = 3
+FALTAS_ACOMPANHAMENTO = 3
+
+
+def calcular_sequencias(presente):
+    """
+    Recebe a matriz booleana (adolescentes × dias, em ordem cronológica) e
+    retorna os arrays (sequencia_atual, melhor_sequencia, ausencias_seguidas).
+    """
+    n, d = presente.shape
+    if d == 0:
+        zeros = np.zeros(n, dtype=np.int64)
+        return zeros, zeros.copy(), zeros.copy()
+
+    invertida = presente[:, ::-1]
+    # argmin/argmax em bool devolvem o primeiro False/True a partir do fim
+    atual = np.where(invertida.all(axis=1), d, invertida.argmin(axis=1))
+    ausencias = np.where(invertida.any(axis=1), invertida.argmax(axis=1), d)
+
+    # Comprimento da sequência corrente em cada coluna: contagem acumulada
+    # menos o valor acumulado na última falta
+    acumulado = np.cumsum(presente, axis=1)
+    ultima_falta = np.maximum.accumulate(np.where(presente, 0, acumulado), axis=1)
+    melhor = (acumulado - ultima_falta).max(axis=1)
+    return atual, melhor, ausencias
+
+
+def atualizar_sequencias(ano, adolescente_ids=None):
+    """
+    Recalcula e grava as sequências do ano (ou só dos ``adolescente_ids``).
+    Apenas as linhas que mudaram são escritas. Retorna quantas foram atualizadas.
+    """
+    if adolescente_ids is not None and not adolescente_ids:
+        return 0
+    matriz = carregar_matriz(ano, adolescente_ids=adolescente_ids, ate=date.today())
+    if not len(matriz.adolescente_ids):
+        return 0
+    atual, melhor, ausencias = calcular_sequencias(matriz.presente)
+    novos = {
+        int(adolescente_id): (int(atual[i]), int(melhor[i]), int(ausencias[i]))
+        for i, adolescente_id in enumerate(matriz.adolescente_ids)
+    }
+
+    alterados = []
+    existentes = Adolescente.objects.filter(ano=ano)
+    if adolescente_ids is not None:
+        existentes = existentes.filter(id__in=list(novos))
+    for adolescente in existentes.only('id', *CAMPOS).iterator(chunk_size=2000):
+        valores = novos.get(adolescente.id)
+        if valores is not None and (adolescente.sequencia_atual, adolescente.melhor_sequencia, adolescente.ausencias_seguidas) != valores:
+            adolescente.sequencia_atual, adolescente.melhor_sequencia, adolescente.ausencias_seguidas = valores
+            alterados.append(adolescente)
+    if alterados:
+        Adolescente.objects.bulk_update(alterados, CAMPOS, batch_size=BATCH_SIZE)
+    return len(alterados)
+
+
+def gerar_lista_acompanhamento(ano, min_presencas=MIN_PRESENCAS_ACOMPANHAMENTO,
+                               faltas_minimas=FALTAS_ACOMPANHAMENTO):
+    """
+    Recalcula a lista de acompanhamento do ano a partir da matriz de presenças:
+    adolescentes com pelo menos ``min_presencas`` presenças que faltaram aos
+    últimos ``faltas_minimas`` eventos. Substitui a lista anterior do ano.
+    """
+    matriz = carregar_matriz(ano, ate=date.today())
+    _, _, ausencias = calcular_sequencias(matriz.presente)
+    totais = matriz.presente.sum(axis=1)
+    ultima = matriz.ultima_visita()
+    selecionados = np.flatnonzero((totais >= min_presencas) & (ausencias >= faltas_minimas))
+
+    with transaction.atomic():
+        lista, _ = ListaAcompanhamento.objects.update_or_create(
+            ano=ano,
+            defaults={
+                'min_presencas': min_presencas,
+                'faltas_minimas': faltas_minimas,
+                'total_eventos': len(matriz.dia_ids),
+            },
+        )
+        lista.itens.all().delete()
+        ItemAcompanhamento.objects.bulk_create(
+            (
+                ItemAcompanhamento(
+                    lista=lista,
+                    adolescente_id=int(matriz.adolescente_ids[i]),
+                    pg_id=int(matriz.pg_ids[i]) or None,
+                    imperio_id=int(matriz.imperio_ids[i]) or None,
+                    total_presencas=int(totais[i]),
+                    ausencias_seguidas=int(ausencias[i]),
+                    ultima_presenca=matriz.datas[ultima[i]].item() if ultima[i] >= 0 else None,
+                )
+                for i in selecionados
+            ),
+            batch_size=BATCH_SIZE,
+        )
+    return lista, len(selecionados)
@@ -0,0 +1,111 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+
+from .cache_utils import invalidar_dados
+from .convidadores import ResolvedorConvidadores
+from .miniaturas import atualizar_miniaturas
+from .sequencias import atualizar_sequencias
+from .totais_eventos import aplicar_diferenca, recalcular_totais
+from .models import (
+    Adolescente, PequenoGrupo, Imperio, DiaEvento, Presenca,
+    ContagemAuditorio, ContagemVisitantes, EventoEspecial, VisitanteEvento,
+)
+
+# Modelos cujas escritas alteram estatísticas em cache (dashboard, relatórios).
+# Atualizações em massa (bulk_create/bulk_update/queryset.update) não disparam
+# sinais: as views que as usam chamam invalidar_dados() explicitamente.
+# Eventos especiais entram porque as exportações em segundo plano reaproveitam
+# arquivos pela versão dos dados.
+MODELOS_MONITORADOS = (
+    Adolescente, PequenoGrupo, Imperio, DiaEvento, Presenca,
+    ContagemAuditorio, ContagemVisitantes, EventoEspecial, VisitanteEvento,
+)
+
+
+def invalidar_cache_estatisticas(sender, **kwargs):
+    invalidar_dados()
+
+
+for _modelo in MODELOS_MONITORADOS:
+    post_save.connect(invalidar_cache_estatisticas, sender=_modelo,
+                      dispatch_uid=f'invalidar_cache_save_{_modelo.__name__}')
+    post_delete.connect(invalidar_cache_estatisticas, sender=_modelo,
+                        dispatch_uid=f'invalidar_cache_delete_{_modelo.__name__}')
+
+
+# Sequências de presença: uma presença gravada afeta só o seu adolescente,
+# exceto a primeira do dia (os demais passam a ter falta nele);
+# criar/remover um DiaEvento desloca as sequências de todo o ano.
+def atualizar_sequencias_presenca(sender, instance, origin=None, created=False, **kwargs):
+    # Em cascata (exclusão do dia ou do adolescente) quem recalcula é a origem
+    if origin is not None and not isinstance(origin, Presenca) and getattr(origin, 'model', None) is not Presenca:
+        return
+    if created and not Presenca.objects.filter(dia_id=instance.dia_id).exclude(pk=instance.pk).exists():
+        atualizar_sequencias(instance.dia.ano)
+    else:
+        atualizar_sequencias(instance.dia.ano, [instance.adolescente_id])
+
+
+def atualizar_sequencias_dia(sender, instance, created=True, **kwargs):
+    if created:
+        atualizar_sequencias(instance.ano)
+
+
+post_save.connect(atualizar_sequencias_presenca, sender=Presenca, dispatch_uid='sequencias_presenca_save')
+post_delete.connect(atualizar_sequencias_presenca, sender=Presenca, dispatch_uid='sequencias_presenca_delete')
+post_save.connect(atualizar_sequencias_dia, sender=DiaEvento, dispatch_uid='sequencias_dia_save')
+post_delete.connect(atualizar_sequencias_dia, sender=DiaEvento, dispatch_uid='sequencias_dia_delete')
+
+
+# Contadores de visitantes do evento: ajusta pela diferença entre o que o
+# visitante contava no banco (relido com trava em VisitanteEvento.save) e o
+# que conta agora.
+def atualizar_totais_visitante_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    atual = instance.contagem()
+    if created:
+        aplicar_diferenca(None, atual)
+    elif hasattr(instance, '_contagem_original'):
+        aplicar_diferenca(instance._contagem_original, atual)
+    else:
+        # Carregado sem os campos contados (ex.: .only()): recalcula o evento
+        recalcular_totais(EventoEspecial.objects.filter(pk=instance.evento_id))
+    instance._contagem_original = atual
+
+
+def atualizar_totais_visitante_delete(sender, instance, origin=None, **kwargs):
+    # Excluindo o próprio evento não há contador a ajustar
+    if isinstance(origin, EventoEspecial) or getattr(origin, 'model', None) is EventoEspecial:
+        return
+    aplicar_diferenca(getattr(instance, '_contagem_original', instance.contagem()), None)
+
+
+post_save.connect(atualizar_totais_visitante_save, sender=VisitanteEvento, dispatch_uid='totais_visitante_save')
+post_delete.connect(atualizar_totais_visitante_delete, sender=VisitanteEvento, dispatch_uid='totais_visitante_delete')
+
+
+# Convidador: resolve o texto de "convidado por" quando ele muda (ou ainda não
+# foi resolvido). Gravações em massa chamam convidadores.resolver_visitantes.
+def resolver_convidador_visitante(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    inalterado = instance.convidado_por == getattr(instance, '_convidado_por_original', None)
+    if inalterado and (instance.convidador_id or not instance.convidado_por):
+        return
+    instance.convidador = ResolvedorConvidadores(instance.evento.ano).resolver(instance.convidado_por, instance.evento_id)
+
+
+pre_save.connect(resolver_convidador_visitante, sender=VisitanteEvento, dispatch_uid='convidador_visitante')
+
+
+# Miniaturas da foto: refeitas quando a foto muda (ou ainda não foram geradas)
+def atualizar_miniaturas_adolescente(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and 'foto' not in update_fields):
+        return
+    nome = instance.foto.name or ''
+    if nome != getattr(instance, '_foto_original', '') or (nome and not instance.foto_avatar):
+        atualizar_miniaturas(instance)
+    instance._foto_original = nome
+
+
+post_save.connect(atualizar_miniaturas_adolescente, sender=Adolescente, dispatch_uid='miniaturas_adolescente')
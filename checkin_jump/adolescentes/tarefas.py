@@ -0,0 +1,145 @@
+"""
+Exportações em segundo plano.
+
+Exportações grandes não cabem no timeout do worker síncrono do gunicorn: a view
+registra uma TarefaExportacao, um pool de threads do próprio processo gera o
+arquivo no storage (MEDIA_ROOT ou Cloudinary) e o usuário acompanha pela página
+da tarefa até o download. Pedidos idênticos na mesma versão dos dados
+(data_version) reaproveitam a tarefa — e o arquivo — já existente.
+
+Cada tipo de exportação registra um gerador com ``@gerador('tipo')``: recebe os
+parâmetros (JSON) da tarefa e devolve ``(linhas, planilha, bom)``.
+"""
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from . import exports
+from .cache_utils import get_data_version, hash_partes
+from .models import Adolescente, EventoEspecial, TarefaExportacao
+
+logger = logging.getLogger(__name__)
+
+# Tarefas pendentes/processando há mais tempo que isso são consideradas perdidas
+# (o processo que as executava foi reiniciado)
+TEMPO_MAXIMO = timedelta(minutes=30)
+
+GERADORES = {}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def limite_sincrono():
+    """Exportações com até esse número de linhas continuam sendo geradas na requisição."""
+    return getattr(settings, 'EXPORTACAO_LIMITE_SINCRONO', 2000)
+
+
+def gerador(tipo):
+    def registrar(funcao):
+        GERADORES[tipo] = funcao
+        return funcao
+    return registrar
+
+
+def obter_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'EXPORTACAO_WORKERS', 2),
+                thread_name_prefix='exportacao',
+            )
+        return _executor
+
+
+def solicitar_exportacao(tipo, parametros, nome_arquivo, usuario=None):
+    """
+    Retorna a tarefa para (tipo, parametros) na versão atual dos dados, criando
+    e enfileirando uma nova se não houver uma reaproveitável.
+    """
+    chave = hash_partes([tipo, parametros, get_data_version()])
+    limite = timezone.now() - TEMPO_MAXIMO
+    for tarefa in TarefaExportacao.objects.filter(chave=chave).exclude(status='erro'):
+        if tarefa.status == 'concluida':
+            if tarefa.arquivo and tarefa.arquivo.storage.exists(tarefa.arquivo.name):
+                return tarefa
+        elif tarefa.criado_em >= limite:
+            return tarefa
+        TarefaExportacao.objects.filter(pk=tarefa.pk).update(
+            status='erro', erro='Tarefa expirada ou arquivo removido', concluido_em=timezone.now(),
+        )
+
+    tarefa = TarefaExportacao.objects.create(
+        tipo=tipo,
+        parametros=parametros,
+        chave=chave,
+        nome_arquivo=nome_arquivo,
+        criado_por=usuario if usuario is not None and usuario.is_authenticated else None,
+    )
+    # Só enfileira depois do commit: a thread precisa enxergar a tarefa
+    transaction.on_commit(lambda: obter_executor().submit(_executar_em_thread, tarefa.pk))
+    return tarefa
+
+
+def _executar_em_thread(tarefa_id):
+    close_old_connections()
+    try:
+        executar_tarefa(tarefa_id)
+    finally:
+        close_old_connections()
+
+
+def executar_tarefa(tarefa_id):
+    """Gera o arquivo da tarefa (se ainda estiver pendente) e grava no storage."""
+    if not TarefaExportacao.objects.filter(pk=tarefa_id, status='pendente').update(status='processando'):
+        return
+    tarefa = TarefaExportacao.objects.get(pk=tarefa_id)
+    try:
+        linhas, planilha, bom = GERADORES[tarefa.tipo](tarefa.parametros)
+        formato = tarefa.parametros.get('formato', 'csv')
+        contador = {'linhas': 0}
+
+        def contar(linhas):
+            for linha in linhas:
+                contador['linhas'] += 1
+                yield linha
+
+        with tempfile.TemporaryFile() as destino:
+            for parte in exports.conteudo_exportacao(contar(linhas), formato, bom, planilha):
+                destino.write(parte)
+            destino.seek(0)
+            tarefa.arquivo.save(f'{tarefa.pk}/{tarefa.nome_arquivo}', File(destino), save=False)
+        tarefa.total_linhas = max(contador['linhas'] - 1, 0)
+        tarefa.status = 'concluida'
+    except Exception as e:
+        logger.exception('Falha na exportação %s', tarefa_id)
+        tarefa.status = 'erro'
+        tarefa.erro = str(e)
+    tarefa.concluido_em = timezone.now()
+    tarefa.save(update_fields=['arquivo', 'total_linhas', 'status', 'erro', 'concluido_em'])
+    return tarefa
+
+
+# --- Geradores ---
+
+@gerador('adolescentes_admin')
+def _adolescentes_admin(parametros):
+    queryset = Adolescente.objects.filter(pk__in=parametros['ids']).order_by('nome', 'sobrenome')
+    tipado = parametros.get('formato') == 'xlsx'
+    return exports.linhas_adolescentes_admin(queryset, tipado), 'Adolescentes', False
+
+
+@gerador('estatisticas_convites')
+def _estatisticas_convites(parametros):
+    evento = EventoEspecial.objects.get(pk=parametros['evento_id'])
+    tipado = parametros.get('formato') == 'xlsx'
+    estatisticas = exports.estatisticas_convites(evento).iterator(chunk_size=exports.CHUNK_SIZE)
+    return exports.linhas_estatisticas_convites(estatisticas, tipado), 'Convites', True
@@ -1,10 +1,18 @@
+from functools import lru_cache
+
 from django import template
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from adolescentes.miniaturas import url_foto
+from adolescentes.models import Adolescente
 
 register = template.Library()
 
+@lru_cache(maxsize=None)
 def _is_cloud_storage():
-    """Verifica se está usando storage na nuvem (Cloudinary)."""
+    """Verifica se está usando storage na nuvem (Cloudinary). Decidido uma vez por processo."""
     default_storage = getattr(settings, 'DEFAULT_FILE_STORAGE', '')
     if default_storage.startswith('cloudinary'):
         return True
@@ -14,11 +22,27 @@ def _is_cloud_storage():
     backend = (storages_cfg.get('default') or {}).get('BACKEND', '')
     return str(backend).startswith('cloudinary')
 
+@receiver(setting_changed)
+def _storage_alterado(setting, **kwargs):
+    # Só acontece em testes (override_settings)
+    if setting in ('DEFAULT_FILE_STORAGE', 'STORAGES'):
+        _is_cloud_storage.cache_clear()
+
 def _file_available(file_field):
-    """Verifica se o arquivo está disponível (local ou cloud)."""
+    """
+    Verifica se o arquivo está disponível (local ou cloud).
+
+    A foto do Adolescente usa os metadados gravados no upload e conferidos por
+    ``verificar_fotos`` (sem acessar o storage). Outros campos caem na checagem
+    pelo storage.
+    """
     if not file_field or not file_field.name:
         return False
 
+    instancia = getattr(file_field, 'instance', None)
+    if isinstance(instancia, Adolescente) and file_field.field.name == 'foto':
+        return instancia.foto_disponivel
+
     # Em storage cloud (Cloudinary), exists() pode não refletir disponibilidade real.
     # Se a URL puder ser resolvida, consideramos disponível.
     if _is_cloud_storage():
@@ -62,6 +86,17 @@ def safe_image_url(file_field):
     except (ValueError, AttributeError):
         return None
 
+@register.filter
+def foto_url(adolescente, tamanho=None):
+    """
+    URL da foto do adolescente na menor variante que cobre ``tamanho`` px
+    (ex.: ``adolescente|foto_url:96``). Sem tamanho, a original. None sem foto
+    ou com o arquivo indisponível.
+    """
+    if not adolescente:
+        return None
+    return url_foto(adolescente, tamanho)
+
 @register.simple_tag
 def image_or_placeholder(file_field, placeholder_class="avatar-initials", initials=""):
     """
@@ -69,8 +104,9 @@ def image_or_placeholder(file_field, placeholder_class="avatar-initials", initia
     Funciona com storage local e Cloudinary.
     """
     if _file_available(file_field):
-        try:
-            return f'<img src="{file_field.url}" class="avatar avatar-sm" alt="Foto">'
-        except (ValueError, AttributeError):
-            pass
+        # Campo de um Adolescente: serve o avatar reduzido quando existir
+        instancia = getattr(file_field, 'instance', None)
+        url = url_foto(instancia, 36) if isinstance(instancia, Adolescente) else safe_image_url(file_field)
+        if url:
+            return f'<img src="{url}" class="avatar avatar-sm" alt="Foto">'
     return f'<span class="avatar avatar-sm {placeholder_class}">{initials}</span>'
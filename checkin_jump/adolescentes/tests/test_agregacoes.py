@@ -0,0 +1,127 @@
+import io
+from datetime import date, timedelta
+
+import pytest
+from django.contrib.auth.models import User, Permission
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+
+from adolescentes.agregacoes import media_movel, media_presenca_por_grupo, serie_presencas
+from adolescentes.models import Adolescente, DiaEvento, Presenca, PequenoGrupo, Imperio
+
+
+@pytest.fixture(autouse=True)
+def limpar_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_media_por_grupo_normaliza_pelos_eventos_da_janela():
+    dias = [DiaEvento.objects.create(data=date(2026, 3, 1) + timedelta(weeks=i), ano=2026) for i in range(4)]
+    pg_a = PequenoGrupo.objects.create(nome="PG A", ano=2026)
+    pg_b = PequenoGrupo.objects.create(nome="PG B", ano=2026)
+    imperio = Imperio.objects.create(nome="Imp", ano=2026)
+    ana = Adolescente.objects.create(nome="Ana", sobrenome="S", data_nascimento="2010-01-01", pg=pg_a, imperio=imperio)
+    bia = Adolescente.objects.create(nome="Bia", sobrenome="S", data_nascimento="2010-01-01", pg=pg_a, imperio=imperio)
+    caio = Adolescente.objects.create(nome="Caio", sobrenome="S", data_nascimento="2010-01-01", pg=pg_b)
+    for dia in dias:
+        Presenca.objects.create(adolescente=ana, dia=dia, presente=True)
+    Presenca.objects.create(adolescente=bia, dia=dias[0], presente=True)
+    Presenca.objects.create(adolescente=bia, dia=dias[1], presente=False)
+    # PG B só teve registro em um dia: a média continua dividida pelos 4 eventos
+    Presenca.objects.create(adolescente=caio, dia=dias[0], presente=True)
+
+    eventos = DiaEvento.objects.filter(ano=2026)
+    por_pg = media_presenca_por_grupo(2026, "pg", eventos)
+    assert por_pg == [
+        {"id": pg_a.id, "nome": "PG A", "membros": 2, "presencas": 5, "media": 1.2, "taxa": 62.5},
+        {"id": pg_b.id, "nome": "PG B", "membros": 1, "presencas": 1, "media": 0.2, "taxa": 25.0},
+    ]
+    por_imperio = media_presenca_por_grupo(2026, "imperio", eventos.filter(data__lte=dias[1].data))
+    assert por_imperio == [
+        {"id": imperio.id, "nome": "Imp", "membros": 2, "presencas": 3, "media": 1.5, "taxa": 75.0},
+    ]
+    assert media_presenca_por_grupo(2026, "pg", DiaEvento.objects.none())[0]["media"] == 0.0
+
+
+@pytest.mark.django_db
+def test_media_por_grupo_mantem_grupos_sem_integrantes(django_assert_num_queries):
+    dia = DiaEvento.objects.create(data=date(2026, 3, 1), ano=2026)
+    cheio = PequenoGrupo.objects.create(nome="PG Cheio", ano=2026)
+    vazio = PequenoGrupo.objects.create(nome="PG Vazio", ano=2026)
+    PequenoGrupo.objects.create(nome="PG 2025", ano=2025)
+    Imperio.objects.create(nome="Imp Vazio", ano=2026)
+    ana = Adolescente.objects.create(nome="Ana", sobrenome="S", data_nascimento="2010-01-01", pg=cheio)
+    Presenca.objects.create(adolescente=ana, dia=dia, presente=True)
+
+    eventos = DiaEvento.objects.filter(ano=2026)
+    with django_assert_num_queries(2):
+        por_pg = media_presenca_por_grupo(2026, "pg", eventos)
+    assert [(g["nome"], g["membros"], g["presencas"], g["media"], g["taxa"]) for g in por_pg] == [
+        ("PG Cheio", 1, 1, 1.0, 100.0),
+        ("PG Vazio", 0, 0, 0.0, 0.0),
+    ]
+    assert por_pg[1]["id"] == vazio.id
+    assert media_presenca_por_grupo(2026, "imperio", eventos) == [
+        {"id": Imperio.objects.get().id, "nome": "Imp Vazio", "membros": 0, "presencas": 0, "media": 0.0, "taxa": 0.0},
+    ]
+
+
+@pytest.mark.django_db
+def test_benchmark_medias_grupos_desfaz_dados():
+    saida = io.StringIO()
+    call_command("benchmark_medias_grupos", "--pgs", "3", "--dias", "2", "--adolescentes", "10",
+                 "--repeticoes", "1", stdout=saida)
+    assert "queries" in saida.getvalue()
+    assert not Adolescente.objects.exists()
+
+
+@pytest.mark.django_db
+def test_benchmark_recusa_banco_que_nao_e_de_teste(monkeypatch):
+    from django.db import connection
+    monkeypatch.setattr(connection, "vendor", "postgresql")
+    monkeypatch.setitem(connection.settings_dict, "NAME", "checkin_jump")
+    with pytest.raises(CommandError, match="--confirmar"):
+        call_command("benchmark_medias_grupos", "--adolescentes", "10", stdout=io.StringIO())
+    assert not PequenoGrupo.objects.exists()
+
+
+def test_media_movel():
+    assert media_movel([1, 2, 3, 4], 2) == [None, 1.5, 2.5, 3.5]
+    assert media_movel([5, 7], 1) == [5.0, 7.0]
+
+
+@pytest.mark.django_db
+def test_serie_presencas_por_mes_e_trimestre_entre_anos(client):
+    datas = [date(2025, 11, 2), date(2025, 11, 9), date(2025, 12, 7), date(2026, 1, 4), date(2026, 2, 1)]
+    dias = [DiaEvento.objects.create(data=d, ano=d.year) for d in datas]
+    ana = Adolescente.objects.create(nome="Ana", sobrenome="S", data_nascimento="2010-01-01")
+    bia = Adolescente.objects.create(nome="Bia", sobrenome="S", data_nascimento="2010-01-01")
+    for dia in dias:
+        Presenca.objects.create(adolescente=ana, dia=dia, presente=True)
+    Presenca.objects.create(adolescente=bia, dia=dias[0], presente=True)
+    Presenca.objects.create(adolescente=bia, dia=dias[1], presente=False)
+
+    serie = serie_presencas("mes", data_inicio="2025-11-01", data_fim="2026-02-28", janela=2)
+    assert serie["labels"] == ["11/2025", "12/2025", "01/2026", "02/2026"]
+    assert serie["eventos"] == [2, 1, 1, 1]
+    assert serie["presentes"] == [3, 1, 1, 1]
+    assert serie["media"] == [1.5, 1.0, 1.0, 1.0]
+    assert serie["media_movel"] == [None, 1.2, 1.0, 1.0]
+
+    trimestres = serie_presencas("trimestre", ano=2025)
+    assert trimestres["labels"] == ["T4/2025"] and trimestres["eventos"] == [3]
+
+    user = User.objects.create_user(username="u", password="p")
+    user.user_permissions.add(Permission.objects.get(codename="view_dashboard"))
+    client.login(username="u", password="p")
+    url = reverse("dashboard_serie")
+    resp = client.get(url, {"periodo": "semana", "data_inicio": "2025-11-01", "data_fim": "2025-11-30"})
+    assert resp.json()["dados"]["presentes"] == [2, 1]
+    repetida = client.get(url, {"periodo": "semana", "data_inicio": "2025-11-01", "data_fim": "2025-11-30"},
+                          HTTP_IF_NONE_MATCH=resp["ETag"])
+    assert repetida.status_code == 304
+    assert client.get(url, {"data_inicio": "xx"}).status_code == 400
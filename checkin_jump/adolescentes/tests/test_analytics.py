@@ -0,0 +1,57 @@
+from datetime import date, timedelta
+
+import pytest
+from django.core.cache import cache
+
+from adolescentes import analytics
+from adolescentes.models import Adolescente, DiaEvento, Presenca, PequenoGrupo
+
+
+@pytest.fixture(autouse=True)
+def limpar_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _dias_semanais(n, inicio=date(2026, 3, 1)):
+    return [DiaEvento.objects.create(data=inicio + timedelta(weeks=i), ano=2026) for i in range(n)]
+
+
+@pytest.mark.django_db
+def test_matriz_e_coortes():
+    dias = _dias_semanais(10)
+    pg = PequenoGrupo.objects.create(nome="PG A", ano=2026)
+    fiel = Adolescente.objects.create(nome="Fiel", sobrenome="S", data_nascimento="2010-01-01", pg=pg)
+    sumido = Adolescente.objects.create(nome="Sumido", sobrenome="S", data_nascimento="2010-01-01")
+    Adolescente.objects.create(nome="Nunca", sobrenome="S", data_nascimento="2010-01-01")
+
+    for dia in dias:
+        Presenca.objects.create(adolescente=fiel, dia=dia, presente=True)
+    Presenca.objects.create(adolescente=sumido, dia=dias[0], presente=True)
+    Presenca.objects.create(adolescente=sumido, dia=dias[1], presente=False)
+
+    matriz = analytics.carregar_matriz(2026)
+    assert matriz.presente.shape == (3, 10)
+    assert matriz.presente.sum() == 11
+    assert list(matriz.primeira_visita()) == [0, 0, -1]
+    assert list(matriz.ultima_visita()) == [9, 0, -1]
+
+    coortes = analytics.coortes_primeira_visita(matriz)
+    assert len(coortes) == 1
+    marco = coortes[0]
+    assert marco["mes"] == "2026-03" and marco["novos"] == 2
+    assert marco["retorno"]["2"] == {"voltaram": 1, "elegiveis": 2, "taxa": 50.0}
+
+    curva = analytics.curva_retencao(matriz)
+    assert curva[0] == {"semana": 1, "elegiveis": 2, "taxa": 50.0}
+
+    por_pg = analytics.resumo_por_grupo(matriz, matriz.pg_ids, {pg.id: pg.nome})
+    assert por_pg[0]["nome"] == "PG A" and por_pg[0]["taxa_presenca"] == 100.0
+    assert por_pg[1]["nome"] == "Sem grupo" and por_pg[1]["membros"] == 2
+
+
+@pytest.mark.django_db
+def test_resumo_retencao_sem_dados():
+    resumo = analytics.resumo_retencao(2026)
+    assert resumo["coortes"] == [] and resumo["curva"] == []
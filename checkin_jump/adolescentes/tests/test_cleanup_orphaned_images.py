@@ -0,0 +1,138 @@
+import json
+import os
+import time
+from datetime import date
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management import CommandError, call_command
+from PIL import Image
+
+from adolescentes.management.commands import cleanup_orphaned_images
+from adolescentes.models import Adolescente
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    monkeypatch.chdir(tmp_path)
+    return settings.MEDIA_ROOT
+
+
+def _jpeg():
+    saida = BytesIO()
+    Image.new('RGB', (50, 50), 'blue').save(saida, format='JPEG')
+    return ContentFile(saida.getvalue())
+
+
+def _envelhecer(nome):
+    antigo = time.time() - 3 * 24 * 3600
+    os.utime(default_storage.path(nome), (antigo, antigo))
+
+
+def _adolescente(nome, foto):
+    return Adolescente(nome=nome, sobrenome='Silva', data_nascimento=date(2010, 1, 1), ano=2026, foto=foto)
+
+
+def _rodar(*args):
+    saida = StringIO()
+    call_command('cleanup_orphaned_images', *args, stdout=saida)
+    return saida.getvalue()
+
+
+@pytest.mark.django_db
+def test_limpa_referencias_orfas_em_lote_e_gera_relatorio(tmp_path):
+    existente = default_storage.save('fotos/ok.jpg', _jpeg())
+    solto = default_storage.save('fotos/solto.jpg', _jpeg())
+    novo = default_storage.save('fotos/upload_em_andamento.jpg', _jpeg())
+    _envelhecer(existente)
+    _envelhecer(solto)
+    ok, orfa = Adolescente.objects.bulk_create([
+        _adolescente('Ana', existente), _adolescente('Bia', 'fotos/sumiu.jpg'),
+    ])
+
+    saida = _rodar('--relatorio', 'relatorio.json', '--workers', '4')
+    ok.refresh_from_db()
+    orfa.refresh_from_db()
+    assert ok.foto.name == existente
+    assert not orfa.foto and not orfa.foto_disponivel
+    assert 'Referências limpas com sucesso: 1' in saida
+
+    relatorio = json.loads((tmp_path / 'relatorio.json').read_text(encoding='utf-8'))
+    assert [item['id'] for item in relatorio['referencias_orfas']] == [orfa.id]
+    # Arquivo recente (upload em andamento) fica de fora
+    assert [arquivo['nome'] for arquivo in relatorio['arquivos_sem_referencia']] == [solto]
+    assert relatorio['arquivos_apagados'] == 0
+    assert default_storage.exists(solto) and default_storage.exists(novo)
+    assert not os.path.exists(cleanup_orphaned_images.ARQUIVO_ESTADO)
+
+
+@pytest.mark.django_db
+def test_dry_run_nao_altera_nada():
+    Adolescente.objects.bulk_create([_adolescente('Bia', 'fotos/sumiu.jpg')])
+    saida = _rodar('--dry-run', '--apagar-arquivos')
+    assert 'SERIAM limpas: 1' in saida
+    assert Adolescente.objects.get().foto.name == 'fotos/sumiu.jpg'
+
+
+@pytest.mark.django_db
+def test_apaga_arquivos_sem_referencia():
+    solto = default_storage.save('fotos/miniaturas/x_avatar.jpg', _jpeg())
+    _envelhecer(solto)
+    saida = _rodar('--apagar-arquivos')
+    assert 'Arquivos apagados: 1' in saida
+    assert not default_storage.exists(solto)
+
+
+@pytest.mark.django_db
+def test_nao_apaga_arquivos_sem_data_de_modificacao(monkeypatch):
+    def sem_data(self, nome):
+        raise NotImplementedError
+
+    monkeypatch.setattr(FileSystemStorage, 'get_modified_time', sem_data)
+    solto = default_storage.save('fotos/solto.jpg', _jpeg())
+    saida = _rodar('--apagar-arquivos')
+    assert '1 arquivo(s) sem data de modificação' in saida
+    assert 'Arquivos apagados: 0' in saida
+    assert default_storage.exists(solto)
+
+
+@pytest.mark.django_db
+def test_retoma_do_ultimo_lote(monkeypatch):
+    monkeypatch.setattr(cleanup_orphaned_images, 'BATCH_SIZE', 2)
+    Adolescente.objects.bulk_create([_adolescente(f'A{i}', f'fotos/sumiu{i}.jpg') for i in range(5)])
+    ids = list(Adolescente.objects.order_by('id').values_list('id', flat=True))
+
+    # Storage cai no meio da varredura (terceiro lote)
+    chamadas = []
+    exists_original = FileSystemStorage.exists
+
+    def instavel(self, nome):
+        chamadas.append(nome)
+        if len(chamadas) > 4:
+            raise KeyboardInterrupt
+        return exists_original(self, nome)
+
+    monkeypatch.setattr(FileSystemStorage, 'exists', instavel)
+    with pytest.raises(KeyboardInterrupt):
+        _rodar('--dry-run')
+    with open(cleanup_orphaned_images.ARQUIVO_ESTADO, encoding='utf-8') as arquivo:
+        assert json.load(arquivo)['ultimo_id'] == ids[3]
+
+    monkeypatch.setattr(FileSystemStorage, 'exists', exists_original)
+    saida = _rodar('--dry-run', '--retomar', '--relatorio', 'r.json')
+    assert f'Retomando após o id {ids[3]}' in saida
+    with open('r.json', encoding='utf-8') as arquivo:
+        relatorio = json.load(arquivo)
+    assert relatorio['referencias_verificadas'] == 5
+    assert [item['id'] for item in relatorio['referencias_orfas']] == ids
+
+
+@pytest.mark.django_db
+def test_retomar_com_outro_dry_run_e_recusado():
+    with open(cleanup_orphaned_images.ARQUIVO_ESTADO, 'w', encoding='utf-8') as arquivo:
+        json.dump({'dry_run': True, 'ultimo_id': 0, 'verificadas': 0, 'orfas': [], 'limpas': 0, 'erros': []}, arquivo)
+    with pytest.raises(CommandError, match='dry-run'):
+        _rodar('--retomar')
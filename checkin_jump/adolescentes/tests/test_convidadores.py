@@ -0,0 +1,136 @@
+from datetime import date
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+
+from adolescentes import convidadores, exports
+from adolescentes.convidadores import chave_fonetica
+from adolescentes.models import Adolescente, Convidador, EventoEspecial, VisitanteEvento
+
+
+def criar_evento(nome="Conferência", ano=2026):
+    return EventoEspecial.objects.create(nome=nome, data=date(ano, 5, 1), ano=ano)
+
+
+def convidar(evento, convidado_por, nome="Visitante", **kwargs):
+    return VisitanteEvento.objects.create(
+        evento=evento, nome=nome, sobrenome="Silva", data_nascimento="2010-01-01", convidado_por=convidado_por, **kwargs,
+    )
+
+
+def test_chave_fonetica():
+    assert chave_fonetica("Thiago  Sousa") == chave_fonetica("tiago souza")
+    assert chave_fonetica("Luíz") == chave_fonetica("Luis")
+    assert chave_fonetica("Anna") == chave_fonetica("ana ")
+    assert chave_fonetica("Guilherme") == chave_fonetica("Guilerme") == "gilerme"
+    assert chave_fonetica("Henrique") == "enrike"
+    assert chave_fonetica("Gina") != chave_fonetica("Guina")
+
+
+@pytest.mark.django_db
+def test_resolucao_ao_salvar_unifica_grafias_e_vincula_adolescente():
+    adolescente = Adolescente.objects.create(nome="Ana", sobrenome="Clara Souza", data_nascimento="2010-01-01", ano=2026)
+    evento = criar_evento()
+    visitantes = [convidar(evento, texto) for texto in ("Ana Souza", "ana  souza", "Anna Sousa", "Ana", "Bruno")]
+
+    ids = {v.convidador_id for v in visitantes[:4]}
+    assert len(ids) == 1
+    ana = Convidador.objects.get(pk=ids.pop())
+    assert (ana.nome, ana.adolescente_id) == ("Ana Souza", adolescente.id)
+    assert visitantes[4].convidador.nome == "Bruno"
+
+    # Editar o texto re-resolve; mesmo nome em outro ano é outro convidador
+    bruno = visitantes[4]
+    bruno.convidado_por = ""
+    bruno.save()
+    assert bruno.convidador is None
+    assert convidar(criar_evento(ano=2025), "Ana Souza").convidador_id != ana.id
+
+
+@pytest.mark.django_db
+def test_primeiro_nome_nao_funde_sobrenomes_diferentes():
+    evento, outro = criar_evento(), criar_evento("Retiro")
+    ana = convidar(evento, "Ana").convidador
+    lima, souza = convidar(evento, "Ana Lima").convidador, convidar(evento, "Ana Souza").convidador
+    assert len({ana.id, lima.id, souza.id}) == 3
+    # Primeiro nome ambíguo no evento: fica com o "Ana" exato
+    assert convidar(evento, "ana").convidador_id == ana.id
+
+    # Em outro evento, só o primeiro nome resolve para o único candidato de lá
+    costa = convidar(outro, "Ana Costa").convidador
+    assert convidar(outro, "Ana").convidador_id == ana.id  # nome exato vence
+    Convidador.objects.filter(pk=ana.pk).delete()
+    assert convidar(outro, "Ana").convidador_id == costa.id
+
+    # Em lote, o primeiro nome considera os convidadores já resolvidos no mesmo evento
+    terceiro = criar_evento("Culto")
+    visitantes = [
+        VisitanteEvento(evento=terceiro, nome="V", sobrenome="S", data_nascimento="2010-01-01", convidado_por=texto)
+        for texto in ("Bia Lima", "Bia", "Bia Souza")
+    ]
+    convidadores.resolver_visitantes(visitantes)
+    assert len({v.convidador_id for v in visitantes}) == 2
+    assert visitantes[1].convidador_id == visitantes[0].convidador_id
+
+
+@pytest.mark.django_db
+def test_rankings_por_chave_inteira(django_assert_num_queries):
+    evento, outro = criar_evento(), criar_evento("Retiro")
+    convidar(evento, "Ana Souza")
+    convidar(evento, "ana souza", presente=False)
+    convidar(evento, "Bia")
+    convidar(outro, "Ana Souza")
+    convidar(outro, "")
+
+    with django_assert_num_queries(1):
+        do_evento = list(exports.estatisticas_convites(evento))
+    assert [(s["nome"], s["total_convidados"], s["total_presentes"]) for s in do_evento] == [("Ana Souza", 2, 1), ("Bia", 1, 1)]
+
+    with django_assert_num_queries(1):
+        do_ano = list(convidadores.ranking_ano(2026))
+    assert [(s["nome"], s["total_convidados"], s["total_eventos"]) for s in do_ano] == [("Ana Souza", 3, 2), ("Bia", 1, 1)]
+
+
+@pytest.mark.django_db
+def test_backfill_e_pagina_do_ranking(client):
+    evento = criar_evento()
+    convidar(evento, "Carla")
+    convidar(evento, "carla")
+    VisitanteEvento.objects.update(convidador=None)
+    Convidador.objects.all().delete()
+
+    saida = StringIO()
+    call_command("vincular_convidadores", stdout=saida)
+    assert "2 visitante(s) vinculado(s)" in saida.getvalue()
+    assert Convidador.objects.get().convidados.count() == 2
+
+    User.objects.create_user(username="u", password="p")
+    client.login(username="u", password="p")
+    resp = client.get(reverse("ranking_convidadores"))
+    assert resp.context["ranking"][0]["total_convidados"] == 2
+    resp = client.get(reverse("ranking_convidadores"), {"export": "csv"})
+    assert "Carla" in b"".join(resp.streaming_content).decode("utf-8-sig")
+
+
+@pytest.mark.django_db
+def test_migracao_vincula_visitantes_cadastrados_antes_dos_convidadores(settings):
+    from importlib import import_module
+
+    from django.db.migrations.loader import MigrationLoader
+
+    settings.MIGRATION_MODULES = {}  # --no-migrations desliga o grafo
+    nome = "0033_vincular_convidadores_existentes"
+    migracao = import_module(f"adolescentes.migrations.{nome}")
+    apps = MigrationLoader(None).project_state(("adolescentes", nome)).apps
+    evento = criar_evento()
+    antigos = [convidar(evento, texto) for texto in ("Ana Souza", "anna sousa", "Bruno")]
+    VisitanteEvento.objects.update(convidador=None)
+    Convidador.objects.all().delete()
+
+    migracao.vincular_convidadores(apps, None)
+    vinculados = [VisitanteEvento.objects.get(pk=v.pk).convidador for v in antigos]
+    assert vinculados[0] == vinculados[1] != vinculados[2]
+    assert [r["total_convidados"] for r in convidadores.ranking_ano(2026)] == [2, 1]
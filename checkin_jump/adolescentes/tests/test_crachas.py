@@ -0,0 +1,125 @@
+from datetime import date
+from io import BytesIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from adolescentes import crachas, qr
+from adolescentes.models import Adolescente, DiaEvento, PequenoGrupo, Presenca
+
+
+@pytest.fixture
+def logado(client, db):
+    User.objects.create_user(username="u", password="p")
+    client.login(username="u", password="p")
+    return client
+
+
+@pytest.fixture
+def dia(db):
+    return DiaEvento.objects.create(data=date(2026, 3, 7), ano=2026)
+
+
+@pytest.fixture
+def adolescente(db):
+    pg = PequenoGrupo.objects.create(nome="PG Leões", ano=2026)
+    return Adolescente.objects.create(nome="Ana", sobrenome="Souza", data_nascimento=date(2010, 1, 1), ano=2026, pg=pg)
+
+
+def _scan(client, dia, codigo):
+    return client.post(reverse("checkin_qr", args=[dia.id]), {"codigo": codigo}, content_type="application/json")
+
+
+def test_matriz_qr_tem_padroes_de_posicao():
+    modulos = qr.gerar_matriz("JUMP:" + "x" * 22)
+    n = len(modulos)
+    assert n == 29  # versão 3
+    for x0, y0 in ((0, 0), (n - 7, 0), (0, n - 7)):
+        assert all(modulos[y0][x0 + i] for i in range(7))
+        assert not any(modulos[y0 + 1][x0 + i] for i in range(1, 6))
+        assert modulos[y0 + 3][x0 + 3]
+    # Módulo escuro fixo e linha de sincronismo
+    assert modulos[n - 8][8]
+    assert [modulos[6][x] for x in range(8, n - 8)] == [x % 2 == 0 for x in range(8, n - 8)]
+
+
+def test_texto_longo_demais():
+    with pytest.raises(ValueError):
+        qr.gerar_matriz("x" * 300)
+
+
+def test_token_do_conteudo():
+    assert crachas.token_do_conteudo("JUMP:abc") == "abc"
+    assert crachas.token_do_conteudo(" abc ") == "abc"
+    assert crachas.token_do_conteudo("JUMP:") == ""
+    assert crachas.token_do_conteudo("x" * 40) == ""
+
+
+@pytest.mark.django_db
+def test_tokens_unicos_por_adolescente(adolescente):
+    outro = Adolescente.objects.create(nome="Bia", sobrenome="Lima", data_nascimento=date(2010, 1, 1), ano=2026)
+    assert adolescente.token_checkin and outro.token_checkin
+    assert adolescente.token_checkin != outro.token_checkin
+
+
+@pytest.mark.django_db
+def test_scan_marca_presenca_e_repete_sem_gravar(logado, dia, adolescente):
+    resp = _scan(logado, dia, crachas.conteudo_qr(adolescente))
+    dados = resp.json()
+    assert resp.status_code == 200
+    assert dados["nome"] == "Ana Souza" and dados["pg"] == "PG Leões"
+    assert dados["ja_presente"] is False and dados["total_presentes"] == 1
+    assert Presenca.objects.get(adolescente=adolescente, dia=dia).presente
+    adolescente.refresh_from_db()
+    assert adolescente.sequencia_atual == 1
+
+    with CaptureQueriesContext(connection) as queries:
+        dados = _scan(logado, dia, crachas.conteudo_qr(adolescente)).json()
+    assert dados["ja_presente"] is True
+    assert not any(q["sql"].startswith(("INSERT", "UPDATE")) for q in queries.captured_queries if "presenca" in q["sql"])
+
+
+@pytest.mark.django_db
+def test_scan_corrige_ausencia_existente(logado, dia, adolescente):
+    Presenca.objects.create(adolescente=adolescente, dia=dia, presente=False)
+    assert _scan(logado, dia, crachas.conteudo_qr(adolescente)).json()["ja_presente"] is False
+    assert Presenca.objects.filter(dia=dia).count() == 1
+    assert Presenca.objects.get(adolescente=adolescente, dia=dia).presente
+
+
+@pytest.mark.django_db
+def test_scan_rejeita_token_invalido_outro_ano_e_readonly(logado, dia, adolescente):
+    assert _scan(logado, dia, "JUMP:naoexiste").status_code == 404
+    assert _scan(logado, dia, "").status_code == 400
+
+    antigo = Adolescente.objects.create(nome="Caio", sobrenome="Reis", data_nascimento=date(2009, 1, 1), ano=2025)
+    assert _scan(logado, dia, crachas.conteudo_qr(antigo)).status_code == 404
+
+    dia_antigo = DiaEvento.objects.create(data=date(2025, 3, 8), ano=2025)
+    assert _scan(logado, dia_antigo, crachas.conteudo_qr(antigo)).status_code == 403
+    assert not Presenca.objects.exists()
+
+
+@pytest.mark.django_db
+def test_cracha_png_e_etag(logado, adolescente):
+    url = reverse("cracha_adolescente", args=[adolescente.id])
+    resp = logado.get(url)
+    assert resp.status_code == 200 and resp["Content-Type"] == "image/png"
+    assert Image.open(BytesIO(resp.content)).size == (crachas.LARGURA, crachas.ALTURA)
+
+    assert logado.get(url, HTTP_IF_NONE_MATCH=resp["ETag"]).status_code == 304
+    adolescente.nome = "Ana Clara"
+    adolescente.save()
+    assert logado.get(url, HTTP_IF_NONE_MATCH=resp["ETag"]).status_code == 200
+
+
+@pytest.mark.django_db
+def test_pagina_de_crachas_filtrada(logado, adolescente):
+    Adolescente.objects.create(nome="Bia", sobrenome="Lima", data_nascimento=date(2010, 1, 1), ano=2026)
+    resp = logado.get(reverse("imprimir_crachas"), {"busca": "Ana"})
+    assert resp.status_code == 200
+    assert list(resp.context["adolescentes"]) == [adolescente]
@@ -0,0 +1,135 @@
+import pytest
+from django.contrib.auth.models import User, Permission
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+
+from adolescentes import cache_utils, views
+from adolescentes.cache_utils import obter_ou_calcular, estatisticas_cache, montar_chave
+from adolescentes.models import Adolescente, DiaEvento, Presenca
+
+
+@pytest.fixture(autouse=True)
+def limpar_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def dashboard_client(db, client):
+    user = User.objects.create_user(username="lider", password="pass")
+    user.user_permissions.add(Permission.objects.get(codename="view_dashboard"))
+    client.login(username="lider", password="pass")
+    return client
+
+
+@pytest.mark.django_db
+def test_dashboard_usa_cache_e_invalida_na_escrita(dashboard_client):
+    dia = DiaEvento.objects.create(data=timezone.now().date())
+    a = Adolescente.objects.create(nome="Ana", sobrenome="S", data_nascimento="2010-01-01")
+    Presenca.objects.create(adolescente=a, dia=dia, presente=True)
+
+    url = reverse("dashboard")
+    r1 = dashboard_client.get(url)
+    r2 = dashboard_client.get(url)
+    assert r1.status_code == 200 and r2.status_code == 200
+    assert r2.context["ultimo_presentes"] == 1
+    stats = estatisticas_cache("dashboard")
+    assert stats["misses"] == 1 and stats["hits"] == 1
+
+    # Nova presença incrementa a versão dos dados -> recálculo
+    b = Adolescente.objects.create(nome="Bia", sobrenome="S", data_nascimento="2010-01-01")
+    Presenca.objects.create(adolescente=b, dia=dia, presente=True)
+    r3 = dashboard_client.get(url)
+    assert r3.context["ultimo_presentes"] == 2
+    assert r3.context["ultimo_evento"]["data"] == dia.data
+
+    r_stats = dashboard_client.get(reverse("dashboard_cache_stats"))
+    assert r_stats.json()["dashboard"]["misses"] == 2
+
+
+def test_obter_ou_calcular_serve_stale_durante_recalculo():
+    chamadas = []
+
+    def calcular():
+        chamadas.append(1)
+        return len(chamadas)
+
+    assert obter_ou_calcular("teste", ["x"], calcular) == 1
+    cache_utils.bump_data_version()
+
+    # Outro processo segura o lock de recálculo: devolve o valor anterior sem recalcular
+    cache.add(montar_chave("teste", ["x"]) + ":lock", 1)
+    assert obter_ou_calcular("teste", ["x"], calcular) == 1
+    assert len(chamadas) == 1
+    assert estatisticas_cache("teste")["stale"] == 1
+
+    cache.delete(montar_chave("teste", ["x"]) + ":lock")
+    assert obter_ou_calcular("teste", ["x"], calcular) == 2
+
+
+@pytest.mark.django_db
+def test_dashboard_widgets_json_com_etag(dashboard_client):
+    dia = DiaEvento.objects.create(data=timezone.now().date())
+    a = Adolescente.objects.create(nome="Ana", sobrenome="S", genero="F", data_nascimento="2010-01-01")
+    Presenca.objects.create(adolescente=a, dia=dia, presente=True)
+
+    for widget in ("genero", "pgs", "imperios", "evolucao", "contagens", "retencao"):
+        r = dashboard_client.get(reverse("dashboard_widget", args=[widget]))
+        assert r.status_code == 200
+        assert r.json()["ok"] is True
+        assert r["ETag"]
+
+    url = reverse("dashboard_widget", args=["evolucao"])
+    r1 = dashboard_client.get(url)
+    assert r1.json()["dados"]["data"] == [1]
+    r2 = dashboard_client.get(url, HTTP_IF_NONE_MATCH=r1["ETag"])
+    assert r2.status_code == 304
+
+    # Escrita muda a versão dos dados e, portanto, o ETag
+    Presenca.objects.filter(adolescente=a).update(presente=False)
+    cache_utils.invalidar_dados()
+    r3 = dashboard_client.get(url, HTTP_IF_NONE_MATCH=r1["ETag"])
+    assert r3.status_code == 200
+    assert r3.json()["dados"]["data"] == [0]
+
+    assert dashboard_client.get(reverse("dashboard_widget", args=["inexistente"])).status_code == 404
+
+
+@pytest.mark.django_db
+def test_etag_novo_nunca_acompanha_dados_stale(dashboard_client, monkeypatch):
+    monkeypatch.setattr(cache_utils, "LOCK_TIMEOUT", 0.3)
+    dia = DiaEvento.objects.create(data=timezone.now().date())
+    a = Adolescente.objects.create(nome="Ana", sobrenome="S", data_nascimento="2010-01-01")
+    Presenca.objects.create(adolescente=a, dia=dia, presente=True)
+    url = reverse("dashboard_widget", args=["evolucao"])
+    r1 = dashboard_client.get(url)
+    s1 = dashboard_client.get(reverse("dashboard_serie"))
+
+    Presenca.objects.filter(adolescente=a).update(presente=False)
+    cache_utils.invalidar_dados()
+    # Outra requisição segura o lock de recálculo; o valor antigo continua no cache
+    for nome, filtros in (
+        ("dashboard_evolucao", views._filtros_dashboard(r1.wsgi_request)),
+        ("dashboard_serie", views._filtros_serie(s1.wsgi_request)),
+    ):
+        cache.add(montar_chave(nome, list(filtros)) + ":lock", 1)
+
+    r2 = dashboard_client.get(url, HTTP_IF_NONE_MATCH=r1["ETag"])
+    assert r2.status_code == 200 and r2["ETag"] != r1["ETag"]
+    assert r2.json()["dados"]["data"] == [0]
+    s2 = dashboard_client.get(reverse("dashboard_serie"), HTTP_IF_NONE_MATCH=s1["ETag"])
+    assert s2.status_code == 200 and s2["ETag"] != s1["ETag"]
+    assert s2.json()["dados"] != s1.json()["dados"]
+    assert estatisticas_cache("dashboard_evolucao")["stale"] == 0
+    assert estatisticas_cache("dashboard_serie")["stale"] == 0
+
+
+def test_incrementos_simultaneos_geram_versoes_distintas(monkeypatch):
+    # Dois workers leem a mesma versão antes de gravar (DatabaseCache não trava o incr)
+    lida = cache_utils.get_data_version()
+    monkeypatch.setattr(cache_utils, "get_data_version", lambda: lida)
+    primeira = cache_utils.bump_data_version()
+    segunda = cache_utils.bump_data_version()
+    assert lida < primeira < segunda
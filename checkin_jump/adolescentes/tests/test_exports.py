@@ -0,0 +1,115 @@
+import csv
+import io
+from datetime import date, timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+
+from adolescentes import exports
+from adolescentes.models import Adolescente, DiaEvento, Presenca, PequenoGrupo
+
+
+@pytest.fixture
+def dados_periodo(db):
+    dias = [DiaEvento.objects.create(data=date(2026, 3, 1) + timedelta(weeks=i), ano=2026) for i in range(4)]
+    pg = PequenoGrupo.objects.create(nome="PG A", ano=2026)
+    ana = Adolescente.objects.create(nome="Ana", sobrenome="S", data_nascimento="2010-01-01", pg=pg)
+    bia = Adolescente.objects.create(nome="Bia", sobrenome="S", data_nascimento="2010-01-01")
+    Presenca.objects.create(adolescente=ana, dia=dias[0], presente=True)
+    Presenca.objects.create(adolescente=ana, dia=dias[2], presente=True)
+    Presenca.objects.create(adolescente=bia, dia=dias[1], presente=False)
+    return dias
+
+
+@pytest.mark.django_db
+def test_matriz_presencas_csv_em_streaming(client, dados_periodo):
+    User.objects.create_user(username="u", password="p")
+    client.login(username="u", password="p")
+    url = reverse("exportar_matriz_presencas")
+    resp = client.get(url, {"data_inicio": "2026-03-01", "data_fim": "2026-03-15"})
+    assert resp.status_code == 200
+    assert isinstance(resp, StreamingHttpResponse)
+    conteudo = b"".join(resp.streaming_content).decode("utf-8")
+    assert conteudo.startswith("\ufeff")
+    linhas = list(csv.reader(io.StringIO(conteudo.lstrip("\ufeff"))))
+    assert linhas[0] == ["Nome", "Sobrenome", "PG", "Império", "01/03/2026", "08/03/2026", "15/03/2026", "Total", "Taxa de Presença (%)"]
+    assert linhas[1] == ["Ana", "S", "PG A", "", "1", "0", "1", "2", "66.7"]
+    assert linhas[2] == ["Bia", "S", "", "", "0", "0", "0", "0", "0.0"]
+
+
+@pytest.mark.django_db
+def test_matriz_presencas_npz_em_blocos(dados_periodo):
+    for i in range(5):
+        Adolescente.objects.create(nome=f"Extra{i}", sobrenome="S", data_nascimento="2010-01-01")
+    dias = exports.dias_do_periodo(2026)
+    bruto = b"".join(exports.matriz_presencas_npz(2026, dias, linhas_por_bloco=3))
+    matriz = exports.ler_npz_matriz(bruto)
+
+    assert matriz["presente"].shape == (7, 4)
+    assert list(matriz["nome"][:2]) == ["Ana", "Bia"]
+    assert list(matriz["presente"][0]) == [True, False, True, False]
+    assert list(matriz["total"]) == [2, 0, 0, 0, 0, 0, 0]
+    assert str(matriz["dias_data"][0]) == "2026-03-01"
+
+
+def test_exportar_matriz_exige_login(client):
+    resp = client.get(reverse("exportar_matriz_presencas"))
+    assert resp.status_code == 302
+
+
+@pytest.mark.django_db
+def test_exportar_adolescentes_csv_em_streaming(client):
+    pg = PequenoGrupo.objects.create(nome="PG A", ano=2026)
+    Adolescente.objects.create(nome="Ana", sobrenome="S", data_nascimento="2010-02-03", genero="F", pg=pg, telefone="9999")
+    Adolescente.objects.create(nome="Ana", sobrenome="S", data_nascimento="2011-01-01", genero="F")
+    Adolescente.objects.create(nome="Bruno", sobrenome="T", data_nascimento="2010-01-01", genero="M")
+
+    resp = client.get(reverse("exportar_adolescentes_csv"), {"genero": "F"})
+    assert isinstance(resp, StreamingHttpResponse)
+    conteudo = b"".join(resp.streaming_content).decode("utf-8")
+    assert conteudo.startswith("\ufeff")
+    linhas = list(csv.reader(io.StringIO(conteudo.lstrip("\ufeff"))))
+    assert linhas[0] == ["Nome", "Sobrenome", "Data de Nascimento", "Sexo", "PG", "Império"]
+    assert sorted(linhas[1:]) == [
+        ["Ana", "S", "01/01/2011", "Feminino", "", ""],
+        ["Ana", "S", "03/02/2010", "Feminino", "PG A", ""],
+    ]
+
+    # Homônimos não se fundem no DISTINCT dos filtros de presença
+    resp = client.get(reverse("exportar_adolescentes_csv"),
+                      {"campos": ["telefone"], "presenca": "nunca"})
+    linhas = list(csv.reader(io.StringIO(b"".join(resp.streaming_content).decode("utf-8").lstrip("\ufeff"))))
+    assert linhas[0] == ["Nome", "Sobrenome", "Telefone"]
+    assert sorted(linhas[1:]) == [["Ana", "S", ""], ["Ana", "S", "9999"], ["Bruno", "T", ""]]
+
+
+@pytest.mark.django_db
+def test_zip_com_um_csv_por_dia_e_resumo(client, dados_periodo):
+    import zipfile
+
+    User.objects.create_user(username="u", password="p")
+    client.login(username="u", password="p")
+    resp = client.get(reverse("exportar_presencas_zip"), {"dias": [dados_periodo[1].id, dados_periodo[0].id]})
+    assert resp["Content-Type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(b"".join(resp.streaming_content))) as zf:
+        assert zf.namelist() == ["presencas_01_03_2026.csv", "presencas_08_03_2026.csv", "resumo.csv"]
+        dia1 = list(csv.reader(io.StringIO(zf.read("presencas_01_03_2026.csv").decode("utf-8").lstrip("\ufeff"))))
+        resumo = list(csv.reader(io.StringIO(zf.read("resumo.csv").decode("utf-8").lstrip("\ufeff"))))
+    assert dia1 == [["Data", "Nome", "Presente"], ["01/03/2026", "Ana S", "Sim"]]
+    assert resumo[1:] == [["01/03/2026", "", "1", "0", "1"], ["08/03/2026", "", "0", "1", "1"]]
+
+
+@pytest.mark.django_db
+def test_selecionar_dia_usa_totais_em_cache(client, dados_periodo, django_assert_num_queries):
+    from django.core.cache import cache
+
+    cache.clear()
+    DiaEvento.objects.create(data=date(2025, 3, 1), ano=2025)
+    resp = client.get(reverse("selecionar_dia_exportar"))
+    dias = list(resp.context["dias"])
+    assert [d.data for d in dias] == [d.data for d in reversed(dados_periodo)]
+    assert {d.data: d.total_presentes for d in dias}[date(2026, 3, 1)] == 1
+    with django_assert_num_queries(0):
+        assert exports.presentes_por_dia(2026) == {dados_periodo[0].id: 1, dados_periodo[2].id: 1}
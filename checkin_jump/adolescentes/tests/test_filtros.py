@@ -0,0 +1,82 @@
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from adolescentes.filtros import FiltroAdolescentes
+from adolescentes.models import Adolescente, PequenoGrupo
+
+
+@pytest.fixture(autouse=True)
+def limpar_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def adolescentes(db):
+    pg = PequenoGrupo.objects.create(nome="PG A", ano=2026)
+    Adolescente.objects.create(nome="Ana", sobrenome="Silva", data_nascimento="2010-01-01", genero="F", pg=pg)
+    Adolescente.objects.create(nome="Bia", sobrenome="Souza", data_nascimento="2011-01-01", genero="F")
+    Adolescente.objects.create(nome="Caio", sobrenome="Lima", data_nascimento="2010-05-05", genero="M")
+    Adolescente.objects.create(nome="Dani", sobrenome="Reis", data_nascimento="2010-01-01", genero="F", ano=2025)
+    return pg
+
+
+def test_filtro_normaliza_querystring():
+    filtro = FiltroAdolescentes.da_querystring("genero=F&ano_nascimento=abc&busca=+ana+&page=3", 2026)
+    assert filtro == FiltroAdolescentes(ano=2026, busca="ana", genero="F")
+    assert filtro.ativo
+    assert FiltroAdolescentes.da_querystring(filtro.querystring(), 2026) == filtro
+    assert not FiltroAdolescentes(ano=2026).ativo
+    assert FiltroAdolescentes(ano=2026).hash != FiltroAdolescentes(ano=2025).hash
+
+
+@pytest.mark.django_db
+def test_contagem_em_cache_por_versao_dos_dados(adolescentes, django_assert_num_queries):
+    filtro = FiltroAdolescentes.da_querystring({"genero": "F"}, 2026)
+    assert filtro.contar() == 2
+    with django_assert_num_queries(0):
+        assert filtro.contar() == 2
+
+    Adolescente.objects.create(nome="Eva", sobrenome="Dias", data_nascimento="2010-01-01", genero="F")
+    assert filtro.contar() == 3
+    assert sorted(filtro.queryset().values_list("nome", flat=True)) == ["Ana", "Bia", "Eva"]
+
+
+@pytest.mark.django_db
+def test_listagem_pagina_sem_repetir_count(client, adolescentes):
+    User.objects.create_user(username="u", password="p")
+    client.login(username="u", password="p")
+    url = reverse("listar_adolescentes")
+    client.get(url, {"ano_nascimento": "2010"})
+
+    with CaptureQueriesContext(connection) as queries:
+        resp = client.get(url, {"ano_nascimento": "2010"})
+    assert resp.context["total_adolescentes"] == 2
+    assert resp.context["adolescentes"].paginator.count == 2
+    assert not [q for q in queries.captured_queries if "COUNT(" in q["sql"]]
+
+
+@pytest.mark.django_db
+def test_exportacao_usa_os_mesmos_filtros(client, adolescentes):
+    Adolescente.objects.filter(nome="Ana").update(ausencias_seguidas=3)
+    resp = client.get(reverse("exportar_adolescentes_csv"), {"genero": "F", "sequencia": "faltas_3"})
+    conteudo = b"".join(resp.streaming_content).decode("utf-8")
+    assert "Ana" in conteudo and "Bia" not in conteudo
+
+
+@pytest.mark.django_db
+def test_bulk_add_pg_com_filtro_da_listagem(client, adolescentes):
+    User.objects.create_user(username="u", password="p")
+    client.login(username="u", password="p")
+    pg_b = PequenoGrupo.objects.create(nome="PG B", ano=2026)
+    resp = client.post(reverse("bulk_add_pg", args=[pg_b.id]),
+                       data=json.dumps({"filtro": "ano_nascimento=2010"}), content_type="application/json")
+    assert resp.json() == {"ok": True, "count": 2}
+    assert sorted(Adolescente.objects.filter(pg=pg_b).values_list("nome", flat=True)) == ["Ana", "Caio"]
@@ -0,0 +1,151 @@
+import io
+import time
+from datetime import date
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+
+from adolescentes import importacao, xlsx
+from adolescentes.models import Adolescente, EventoEspecial, Imperio, PequenoGrupo, VisitanteEvento
+
+
+@pytest.fixture(autouse=True)
+def limpar_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def grupos(db):
+    return PequenoGrupo.objects.create(nome="PG Águia", ano=2026), Imperio.objects.create(nome="Fogo", ano=2026)
+
+
+def csv_bytes(texto):
+    return io.BytesIO(("\ufeff" + texto).encode("utf-8"))
+
+
+@pytest.mark.django_db
+def test_valida_sem_queries_por_linha(grupos, django_assert_max_num_queries):
+    pg, imperio = grupos
+    Adolescente.objects.create(nome="Ana", sobrenome="Silva", data_nascimento="2010-01-01")
+    planilha = csv_bytes(
+        "Nome;Sobrenome;Data de Nascimento;Sexo;PG;Império\n"
+        "ana;SILVA;01/01/2010;F;;\n"
+        "Bruno;Souza;2010-02-02;Masculino;pg aguia;fogo\n"
+        "Bruno;Souza;02/02/2010;M;;\n"
+        "Caio;Lima;31/02/2010;M;;\n"
+        "Duda;Reis;01/01/2011;F;PG Inexistente;\n"
+        ";;;;;\n"
+        + "".join(f"Extra{i};Teste;01/01/2011;F;;\n" for i in range(300))
+    )
+    with django_assert_max_num_queries(3):
+        resultado = importacao.validar_adolescentes(importacao.ler_planilha(planilha, "lista.csv"), 2026)
+
+    assert resultado.total == 305
+    assert [(a.nome, a.pg_id, a.imperio_id, a.genero) for a in resultado.validos[:1]] == [("Bruno", pg.id, imperio.id, "M")]
+    assert len(resultado.validos) == 301
+    assert [(linha, motivo) for linha, _, motivo in resultado.duplicados] == [(2, "Já cadastrado no ano"), (4, "Repetido no arquivo")]
+    assert [linha for linha, _ in resultado.erros] == [5, 6]
+    assert "PG Inexistente" in resultado.erros[1][1]
+
+    importacao.importar_adolescentes(resultado, tamanho_lote=100)
+    assert Adolescente.objects.filter(ano=2026).count() == 302
+
+
+@pytest.mark.django_db
+def test_xlsx_exportado_pode_ser_reimportado(grupos):
+    linhas = [
+        ["Nome", "Sobrenome", "Data de Nascimento", "Sexo", "PG"],
+        ["Eva", "Dias", date(2010, 5, 6), "Feminino", "PG Águia"],
+    ]
+    planilha = io.BytesIO(b"".join(xlsx.linhas_xlsx(linhas)))
+    resultado = importacao.validar_adolescentes(importacao.ler_planilha(planilha, "lista.xlsx"), 2026)
+    assert not resultado.erros
+    assert resultado.validos[0].data_nascimento == date(2010, 5, 6)
+
+
+def test_colunas_obrigatorias():
+    resultado = importacao.validar_adolescentes(iter([["Nome", "Telefone"]]), 2026)
+    assert resultado.erros == [(1, "Colunas obrigatórias ausentes: sobrenome, data_nascimento")]
+
+
+@pytest.mark.django_db
+def test_fluxo_upload_simulacao_confirmacao(client, grupos, settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    User.objects.create_superuser("admin", "admin@example.com", "pass")
+    client.login(username="admin", password="pass")
+    url = reverse("importar_adolescentes")
+
+    arquivo = SimpleUploadedFile("lista.csv", "Nome,Sobrenome,Data de Nascimento\nAna,Silva,01/01/2010\n".encode())
+    resp = client.post(url, {"arquivo": arquivo})
+    assert resp.status_code == 200
+    assert len(resp.context["resultado"].validos) == 1
+    assert not Adolescente.objects.exists()
+
+    resp = client.post(url, {"confirmar": "1"})
+    assert resp.status_code == 302
+    assert Adolescente.objects.get().ano == 2026
+    assert not list((tmp_path / "importacoes").iterdir())
+
+
+@pytest.mark.django_db
+def test_cinco_mil_linhas_em_segundos(grupos):
+    planilha = csv_bytes("Nome,Sobrenome,Data de Nascimento,PG\n" + "".join(
+        f"Nome{i},Sobrenome{i},01/01/2010,PG Águia\n" for i in range(5000)
+    ))
+    inicio = time.perf_counter()
+    resultado = importacao.validar_adolescentes(importacao.ler_planilha(planilha, "lista.csv"), 2026)
+    importacao.importar_adolescentes(resultado)
+    assert Adolescente.objects.count() == 5000
+    assert time.perf_counter() - inicio < 20
+
+
+@pytest.mark.django_db
+def test_visitantes_convidado_por_duplicados_e_adolescentes(django_assert_max_num_queries):
+    evento = EventoEspecial.objects.create(nome="Conferência", data=date(2026, 5, 1), ano=2026)
+    VisitanteEvento.objects.create(evento=evento, nome="Eva", sobrenome="Melo", data_nascimento="2011-03-03", convidado_por="João Silva")
+    adolescente = Adolescente.objects.create(nome="Bia", sobrenome="Costa", data_nascimento="2010-05-05", ano=2025)
+    planilha = csv_bytes(
+        "Nome,Sobrenome,Nascimento,Quem convidou,Presente\n"
+        "Bia,Costa,05/05/2010,joao  silva,sim\n"
+        "Caio,Lima,06/06/2010,JOAO SILVA,\n"
+        "caio,LIMA,2010-06-06,Outro,\n"
+        "Eva,Melo,03/03/2011,,\n"
+        "Davi,Reis,2099-01-01,,\n"
+    )
+    with django_assert_max_num_queries(2):
+        resultado = importacao.validar_visitantes(importacao.ler_planilha(planilha, "convidados.csv"), evento)
+
+    assert [(v.nome, v.convidado_por, v.presente) for v in resultado.validos] == [
+        ("Bia", "João Silva", True), ("Caio", "João Silva", False),
+    ]
+    assert resultado.validos[0].adolescente_existente == {"id": adolescente.id, "ano": 2025}
+    assert resultado.validos[1].adolescente_existente is None
+    assert [(linha, motivo) for linha, _, motivo in resultado.duplicados] == [(4, "Repetido no arquivo"), (5, "Já cadastrado no evento")]
+    assert [linha for linha, _ in resultado.erros] == [6]
+
+    importacao.importar_visitantes(resultado, tamanho_lote=1)
+    assert evento.visitantes.filter(convidado_por="João Silva").count() == 3
+
+
+@pytest.mark.django_db
+def test_fluxo_importacao_visitantes(client, settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    User.objects.create_user(username="u", password="p")
+    client.login(username="u", password="p")
+    evento = EventoEspecial.objects.create(nome="Conferência", data=date(2026, 5, 1), ano=2026)
+    url = reverse("importar_visitantes_evento", args=[evento.id])
+
+    arquivo = SimpleUploadedFile("lista.csv", "Nome,Sobrenome,Data de Nascimento\nAna,Silva,01/01/2010\n".encode())
+    resp = client.post(url, {"arquivo": arquivo, "presentes": "on"})
+    assert resp.status_code == 200
+    assert len(resp.context["previa"]) == 1
+    assert not VisitanteEvento.objects.exists()
+
+    resp = client.post(url, {"confirmar": "1"})
+    assert resp.status_code == 302
+    assert evento.visitantes.get().presente is True
@@ -0,0 +1,68 @@
+from datetime import date
+
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from adolescentes import kiosk
+from adolescentes.models import EventoEspecial, VisitanteEvento
+
+
+@pytest.fixture
+def evento(db):
+    return EventoEspecial.objects.create(nome="Conferência", data=date(2026, 5, 1), ano=2026)
+
+
+@pytest.fixture
+def buffer(monkeypatch):
+    novo = kiosk.BufferVisitantes()
+    monkeypatch.setattr(kiosk, "buffer", novo)
+    yield novo
+    novo.descarregar()
+
+
+@pytest.fixture
+def logado(client, db):
+    User.objects.create_user(username="u", password="p")
+    client.login(username="u", password="p")
+    return client
+
+
+@pytest.mark.django_db
+def test_registro_enfileira_e_grava_em_lote(logado, evento, buffer, settings):
+    settings.KIOSK_BUFFER_TAMANHO = 3
+    settings.KIOSK_BUFFER_ESPERA = 60
+    url = reverse("kiosk_registrar_visitante", args=[evento.id])
+
+    for nome in ("Ana", "Bia"):
+        resp = logado.post(url, {"nome": nome, "sobrenome": "Silva", "data_nascimento": "01/02/2010"}, content_type="application/json")
+        assert resp.status_code == 202
+    assert resp.json()["pendentes"] == 2
+    assert resp.json()["total_visitantes"] == 2
+    assert not VisitanteEvento.objects.exists()
+
+    resp = logado.post(url, {"nome": "Caio", "sobrenome": "Lima", "data_nascimento": "01/02/2010"}, content_type="application/json")
+    assert resp.json()["pendentes"] == 0
+    assert VisitanteEvento.objects.filter(evento=evento, presente=True).count() == 3
+    evento.refresh_from_db()
+    assert (evento.total_visitantes, evento.total_presentes) == (3, 3)
+    assert logado.get(url).json()["total_visitantes"] == 3
+
+
+@pytest.mark.django_db
+def test_revalida_no_servidor(logado, evento, buffer):
+    url = reverse("kiosk_registrar_visitante", args=[evento.id])
+    resp = logado.post(url, {"nome": "Ana", "data_nascimento": "01/01/2099"}, content_type="application/json")
+    assert resp.status_code == 400
+    assert set(resp.json()["erros"]) == {"sobrenome", "data_nascimento"}
+    assert logado.post(url, "[]", content_type="application/json").status_code == 400
+    assert buffer.pendentes(evento.id) == 0
+
+
+@pytest.mark.django_db
+def test_buffer_desligado_grava_na_requisicao(logado, evento, buffer, settings):
+    settings.KIOSK_BUFFER_ESPERA = 0
+    url = reverse("kiosk_registrar_visitante", args=[evento.id])
+    logado.post(url, {"nome": "Ana", "sobrenome": "Silva", "data_nascimento": "2010-02-01"}, content_type="application/json")
+    assert VisitanteEvento.objects.get().nome == "Ana"
+    assert logado.get(reverse("kiosk_visitantes", args=[evento.id])).status_code == 200
@@ -0,0 +1,91 @@
+from datetime import date, timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.urls import reverse
+
+from adolescentes import migracao_visitantes
+from adolescentes.models import Adolescente, DiaEvento, EventoEspecial, Presenca, VisitanteEvento
+
+
+@pytest.fixture
+def evento(db):
+    return EventoEspecial.objects.create(nome="Conferência", data=date(2026, 5, 1), ano=2026)
+
+
+def criar_visitante(evento, nome, **kwargs):
+    return VisitanteEvento.objects.create(evento=evento, nome=nome, sobrenome="Silva", data_nascimento="2010-01-01", **kwargs)
+
+
+@pytest.mark.django_db
+def test_migracao_em_conjunto_com_erros_por_linha(evento, django_assert_max_num_queries):
+    outro = EventoEspecial.objects.create(nome="Retiro", data=date(2026, 6, 1), ano=2026)
+    existente = Adolescente.objects.create(nome="Bia", sobrenome="Silva", data_nascimento="2010-01-01", ano=2026)
+    visitantes = [criar_visitante(evento, f"Novo{i}") for i in range(50)]
+    bia = criar_visitante(evento, "bia")
+    ja_migrado = criar_visitante(evento, "Caio", migrado=True)
+    de_outro = criar_visitante(outro, "Davi")
+
+    ids = [v.id for v in visitantes] + [bia.id, ja_migrado.id, de_outro.id, 999999, "x"]
+    with django_assert_max_num_queries(10):
+        resultado = migracao_visitantes.migrar_visitantes(evento, ids, 2026)
+
+    assert (resultado.criados, resultado.vinculados) == (50, 1)
+    assert [motivo for _, _, motivo in resultado.erros] == [
+        "Identificador inválido", "Já migrado", "Visitante não encontrado neste evento", "Visitante não encontrado neste evento",
+    ]
+    assert Adolescente.objects.filter(ano=2026).count() == 51
+    bia.refresh_from_db()
+    assert bia.migrado and bia.adolescente_migrado_id == existente.id
+    assert VisitanteEvento.objects.filter(evento=evento, migrado=True, adolescente_migrado__isnull=False).count() == 51
+    evento.refresh_from_db()
+    assert evento.total_migrados == 52
+
+
+@pytest.mark.django_db
+def test_fallback_sem_returning_e_checkin(evento, monkeypatch):
+    monkeypatch.setattr(type(connection.features), "can_return_rows_from_bulk_insert", False)
+    dia = DiaEvento.objects.create(data=date(2026, 5, 3), ano=2026)
+    ana, eva = criar_visitante(evento, "Ana"), criar_visitante(evento, "Eva")
+
+    resultado = migracao_visitantes.migrar_visitantes(evento, [ana.id, eva.id], 2026, dia=dia)
+
+    assert resultado.checkins == 2
+    ana.refresh_from_db()
+    assert ana.adolescente_migrado.nome == "Ana"
+    assert set(Presenca.objects.filter(dia=dia, presente=True).values_list("adolescente__nome", flat=True)) == {"Ana", "Eva"}
+    assert ana.adolescente_migrado.sequencia_atual == 1
+
+
+@pytest.mark.django_db
+def test_checkin_da_migracao_em_dia_vazio_conta_falta_dos_ausentes(evento):
+    semana_passada = DiaEvento.objects.create(data=date.today() - timedelta(weeks=1), ano=2026)
+    bia = Adolescente.objects.create(nome="Bia", sobrenome="Lima", data_nascimento="2010-01-01", ano=2026)
+    Presenca.objects.create(adolescente=bia, dia=semana_passada, presente=True)
+    # Dia cadastrado antes (ainda no futuro): a criação dele não recalculou as faltas
+    hoje = DiaEvento.objects.create(data=date.today() + timedelta(days=1), ano=2026)
+    DiaEvento.objects.filter(pk=hoje.pk).update(data=date.today())
+    ana = criar_visitante(evento, "Ana")
+
+    migracao_visitantes.migrar_visitantes(evento, [ana.id], 2026, dia=hoje)
+
+    bia.refresh_from_db()
+    assert (bia.sequencia_atual, bia.ausencias_seguidas) == (0, 1)
+
+
+@pytest.mark.django_db
+def test_view_migrar_com_checkin(client, evento):
+    User.objects.create_superuser("admin", "admin@example.com", "pass")
+    client.login(username="admin", password="pass")
+    dia = DiaEvento.objects.create(data=date(2026, 5, 3), ano=2026)
+    ana = criar_visitante(evento, "Ana")
+    url = reverse("migrar_visitantes", args=[evento.id])
+
+    resp = client.post(url, {"visitantes": [ana.id], "dia": dia.id})
+    assert resp.status_code == 302
+    assert Presenca.objects.get(dia=dia).adolescente.nome == "Ana"
+
+    resp = client.post(url, {"visitantes": [ana.id]})
+    assert resp.status_code == 200
+    assert resp.context["erros"][0][2] == "Já migrado"
@@ -0,0 +1,117 @@
+from datetime import date
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.template import Context, Template
+from PIL import Image
+
+from adolescentes import miniaturas
+from adolescentes.models import Adolescente
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def _jpeg(largura=1200, altura=900):
+    saida = BytesIO()
+    Image.new('RGB', (largura, altura), 'red').save(saida, format='JPEG')
+    return ContentFile(saida.getvalue(), name='foto.jpg')
+
+
+def _adolescente(**kwargs):
+    return Adolescente(nome='Ana', sobrenome='Souza', data_nascimento=date(2010, 1, 1), ano=2026, **kwargs)
+
+
+@pytest.mark.django_db
+def test_upload_gera_variantes():
+    adolescente = _adolescente()
+    adolescente.foto.save('foto.jpg', _jpeg(), save=False)
+    adolescente.save()
+
+    adolescente.refresh_from_db()
+    with default_storage.open(adolescente.foto_avatar.name) as arquivo:
+        assert Image.open(arquivo).size == (192, 192)
+    with default_storage.open(adolescente.foto_preview.name) as arquivo:
+        assert Image.open(arquivo).size == (800, 600)
+    assert adolescente.foto_avatar.name.startswith('fotos/miniaturas/')
+
+
+@pytest.mark.django_db
+def test_trocar_e_remover_foto_apaga_variantes_antigas():
+    adolescente = _adolescente()
+    adolescente.foto.save('foto.jpg', _jpeg(), save=False)
+    adolescente.save()
+    antigo = adolescente.foto_avatar.name
+
+    adolescente = Adolescente.objects.get(pk=adolescente.pk)
+    adolescente.foto.save('nova.jpg', _jpeg(600, 600), save=True)
+    assert adolescente.foto_avatar.name != antigo
+    assert not default_storage.exists(antigo)
+
+    atual = adolescente.foto_avatar.name
+    adolescente = Adolescente.objects.get(pk=adolescente.pk)
+    adolescente.foto = None
+    adolescente.save()
+    assert not default_storage.exists(atual)
+    assert Adolescente.objects.filter(pk=adolescente.pk, foto_avatar__isnull=True, foto_preview__isnull=True).exists()
+
+
+@pytest.mark.django_db
+def test_salvar_sem_mudar_foto_nao_refaz(monkeypatch):
+    adolescente = _adolescente()
+    adolescente.foto.save('foto.jpg', _jpeg(), save=False)
+    adolescente.save()
+
+    chamadas = []
+    monkeypatch.setattr(miniaturas, 'gerar_variantes', lambda *a: chamadas.append(a) or {})
+    adolescente = Adolescente.objects.get(pk=adolescente.pk)
+    adolescente.telefone = '11999999999'
+    adolescente.save()
+    assert chamadas == []
+
+
+@pytest.mark.django_db
+def test_arquivo_invalido_nao_quebra_o_save():
+    adolescente = _adolescente()
+    adolescente.foto.save('foto.jpg', ContentFile(b'nao e imagem'), save=False)
+    adolescente.save()
+    adolescente.refresh_from_db()
+    assert not adolescente.foto_avatar
+
+
+@pytest.mark.django_db
+def test_filtro_escolhe_menor_variante_que_cobre():
+    adolescente = _adolescente()
+    adolescente.foto.save('foto.jpg', _jpeg(), save=False)
+    adolescente.save()
+
+    template = Template('{% load image_utils %}{{ a|foto_url:36 }}|{{ a|foto_url:400 }}|{{ a|foto_url:1000 }}')
+    avatar, preview, original = template.render(Context({'a': adolescente})).split('|')
+    assert avatar.endswith('_avatar.jpg')
+    assert preview.endswith('_preview.jpg')
+    assert original == adolescente.foto.url
+    assert miniaturas.url_foto(_adolescente()) is None
+
+
+@pytest.mark.django_db
+def test_comando_gera_miniaturas_das_fotos_existentes():
+    nome = default_storage.save('fotos/antiga.jpg', _jpeg())
+    com_foto = Adolescente.objects.bulk_create([_adolescente(foto=nome), _adolescente(foto='fotos/sumiu.jpg')])[0]
+
+    saida = StringIO()
+    call_command('gerar_miniaturas', '--workers', '1', stdout=saida)
+    com_foto.refresh_from_db()
+    assert com_foto.foto_avatar and default_storage.exists(com_foto.foto_preview.name)
+    assert '1 foto(s) com miniaturas geradas' in saida.getvalue()
+    assert '1 foto(s) não puderam ser lidas' in saida.getvalue()
+
+    # Já processadas ficam de fora sem --refazer
+    saida = StringIO()
+    call_command('gerar_miniaturas', '--workers', '1', stdout=saida)
+    assert '1 foto(s) para processar' in saida.getvalue()
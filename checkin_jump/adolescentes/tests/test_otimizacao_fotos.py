@@ -0,0 +1,151 @@
+from datetime import date
+from io import BytesIO, StringIO
+
+import pytest
+from django.contrib.auth.models import Permission, User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db.models.signals import pre_save
+from django.urls import reverse
+from PIL import Image
+
+from adolescentes import otimizacao_fotos
+from adolescentes.models import Adolescente
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.FOTOS_LADO_MAXIMO = 800
+    return tmp_path
+
+
+@pytest.fixture
+def editor(db, client):
+    user = User.objects.create_user(username="editor", password="pass")
+    user.user_permissions.add(*Permission.objects.filter(codename__in=["add_adolescente", "change_adolescente"]))
+    client.login(username="editor", password="pass")
+    return client
+
+
+class _Imediato:
+    """Executor que roda a tarefa na hora (a thread real usaria outra conexão)."""
+
+    def submit(self, funcao, *args):
+        otimizacao_fotos.aplicar_upload(*args)
+
+
+def _foto_celular(largura=2000, altura=1500):
+    """JPEG deitado com orientação EXIF 6 (girar 90°) e um metadado de GPS."""
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x8825] = {2: (23.0, 32.0, 0.0)}
+    saida = BytesIO()
+    Image.new('RGB', (largura, altura), 'red').save(saida, format='JPEG', quality=98, exif=exif)
+    return saida.getvalue()
+
+
+def test_otimizar_gira_reduz_e_remove_metadados():
+    conteudo = _foto_celular()
+    imagem = Image.open(BytesIO(otimizacao_fotos.otimizar(conteudo)))
+    assert imagem.format == 'JPEG'
+    assert imagem.size == (600, 800)
+    assert not imagem.getexif()
+    assert otimizacao_fotos.otimizar(otimizacao_fotos.otimizar(conteudo), forcar=False) is None
+
+
+def test_otimizar_em_webp_com_transparencia(settings):
+    settings.FOTOS_FORMATO = 'webp'
+    saida = BytesIO()
+    Image.new('RGBA', (1000, 500), (0, 0, 255, 0)).save(saida, format='PNG')
+    imagem = Image.open(BytesIO(otimizacao_fotos.otimizar(saida.getvalue())))
+    assert (imagem.format, imagem.mode, imagem.size) == ('WEBP', 'RGB', (800, 400))
+    assert otimizacao_fotos.nome_otimizado('fotos/IMG_1.HEIC.jpeg') == 'fotos/IMG_1.HEIC.webp'
+
+
+@pytest.mark.django_db
+def test_upload_e_reduzido_em_segundo_plano(editor, monkeypatch, django_capture_on_commit_callbacks):
+    monkeypatch.setattr(otimizacao_fotos, 'obter_executor', _Imediato)
+    dados = {
+        'nome': 'Ana', 'sobrenome': 'Souza', 'data_nascimento': '01/01/2010',
+        'foto': SimpleUploadedFile('IMG_0001.jpg', _foto_celular(), content_type='image/jpeg'),
+    }
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        resposta = editor.post(reverse('criar_adolescente'), dados)
+    assert resposta.status_code == 302
+    adolescente = Adolescente.objects.get()
+    # A original nunca chega ao storage: a foto só aparece depois do processamento
+    assert not adolescente.foto
+
+    for callback in callbacks:
+        callback()
+    adolescente.refresh_from_db()
+    assert adolescente.foto.name.startswith('fotos/IMG_0001')
+    assert (adolescente.foto_largura, adolescente.foto_altura) == (600, 800)
+    assert adolescente.foto_avatar and adolescente.foto_disponivel
+    with default_storage.open(adolescente.foto.name) as arquivo:
+        assert not Image.open(arquivo).getexif()
+
+
+@pytest.mark.django_db
+def test_editar_sem_nova_foto_mantem_a_atual(editor, monkeypatch):
+    monkeypatch.setattr(otimizacao_fotos, 'enfileirar_upload', pytest.fail)
+    adolescente = Adolescente(nome='Ana', sobrenome='Souza', data_nascimento=date(2010, 1, 1))
+    adolescente.foto.save('atual.jpg', ContentFile(_foto_celular(100, 80)))
+    editor.post(reverse('editar_adolescente', args=[adolescente.id]), {
+        'nome': 'Ana', 'sobrenome': 'Lima', 'data_nascimento': '01/01/2010',
+    })
+    atualizado = Adolescente.objects.get()
+    assert (atualizado.sobrenome, atualizado.foto.name) == ('Lima', adolescente.foto.name)
+
+
+@pytest.mark.django_db
+def test_nova_foto_apaga_a_anterior_e_edicao_concorrente_nao_reverte(editor, monkeypatch, django_capture_on_commit_callbacks):
+    monkeypatch.setattr(otimizacao_fotos, 'obter_executor', _Imediato)
+    adolescente = Adolescente(nome='Ana', sobrenome='Souza', data_nascimento=date(2010, 1, 1))
+    adolescente.foto.save('atual.jpg', ContentFile(_foto_celular(100, 80)))
+    anterior = adolescente.foto.name
+    url = reverse('editar_adolescente', args=[adolescente.id])
+    dados = {'nome': 'Ana', 'sobrenome': 'Souza', 'data_nascimento': '01/01/2010'}
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        editor.post(url, {**dados, 'foto': SimpleUploadedFile('nova.jpg', _foto_celular(), content_type='image/jpeg')})
+    processar = [callback for callback in callbacks if 'obter_executor' in callback.__code__.co_names]
+
+    # Segunda edição carrega o cadastro antes de a thread terminar e grava depois
+    def thread_termina_no_meio(sender, instance, **kwargs):
+        while processar:
+            processar.pop()()
+
+    pre_save.connect(thread_termina_no_meio, sender=Adolescente)
+    try:
+        editor.post(url, {**dados, 'sobrenome': 'Lima'})
+    finally:
+        pre_save.disconnect(thread_termina_no_meio, sender=Adolescente)
+
+    atualizado = Adolescente.objects.get()
+    assert atualizado.sobrenome == 'Lima'
+    assert atualizado.foto.name.startswith('fotos/nova')
+    assert not default_storage.exists(anterior)
+
+
+@pytest.mark.django_db
+def test_comando_reduz_fotos_gravadas():
+    grande = default_storage.save('fotos/grande.jpg', ContentFile(_foto_celular()))
+    pequena = default_storage.save('fotos/pequena.jpg', ContentFile(otimizacao_fotos.otimizar(_foto_celular())))
+    Adolescente.objects.bulk_create([
+        Adolescente(nome='Ana', sobrenome='Souza', data_nascimento=date(2010, 1, 1), foto=grande),
+        Adolescente(nome='Bia', sobrenome='Souza', data_nascimento=date(2010, 1, 1), foto=pequena),
+    ])
+
+    saida = StringIO()
+    call_command('otimizar_fotos', '--dry-run', '--workers', '1', stdout=saida)
+    assert '1 foto(s) seriam otimizadas' in saida.getvalue()
+    assert set(Adolescente.objects.values_list('foto', flat=True)) == {grande, pequena}
+
+    call_command('otimizar_fotos', '--workers', '1', stdout=StringIO())
+    ana = Adolescente.objects.get(nome='Ana')
+    assert ana.foto.name != grande and not default_storage.exists(grande)
+    assert (ana.foto_largura, ana.foto_altura) == (600, 800) and ana.foto_avatar
+    assert Adolescente.objects.get(nome='Bia').foto.name == pequena
@@ -0,0 +1,139 @@
+import io
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from django.contrib.auth.models import User, Permission
+from django.core.management import call_command
+from django.urls import reverse
+
+from adolescentes.models import Adolescente, DiaEvento, Presenca, PequenoGrupo, ListaAcompanhamento
+from adolescentes.sequencias import calcular_sequencias
+
+
+def test_calcular_sequencias_vetorizado():
+    presente = np.array([
+        [1, 1, 0, 1, 1, 1],
+        [1, 1, 1, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0],
+        [1, 1, 1, 1, 1, 1],
+    ], dtype=bool)
+    atual, melhor, ausencias = calcular_sequencias(presente)
+    assert list(atual) == [3, 0, 0, 6]
+    assert list(melhor) == [3, 3, 0, 6]
+    assert list(ausencias) == [0, 3, 6, 0]
+
+
+def _dias(n, ano=2026):
+    hoje = date.today()
+    return [DiaEvento.objects.create(data=hoje - timedelta(weeks=n - 1 - i), ano=ano) for i in range(n)]
+
+
+@pytest.mark.django_db
+def test_sequencias_atualizadas_no_checkin_e_no_rebuild(client):
+    dias = _dias(4)
+    pg = PequenoGrupo.objects.create(nome="PG A", ano=2026)
+    ana = Adolescente.objects.create(nome="Ana", sobrenome="S", data_nascimento="2010-01-01", pg=pg)
+    bia = Adolescente.objects.create(nome="Bia", sobrenome="S", data_nascimento="2010-01-01", pg=pg)
+    for dia in dias[:3]:
+        Presenca.objects.create(adolescente=ana, dia=dia, presente=True)
+    Presenca.objects.create(adolescente=bia, dia=dias[0], presente=True)
+
+    ana.refresh_from_db()
+    bia.refresh_from_db()
+    assert (ana.sequencia_atual, ana.melhor_sequencia, ana.ausencias_seguidas) == (0, 3, 1)
+    assert (bia.sequencia_atual, bia.melhor_sequencia, bia.ausencias_seguidas) == (0, 1, 3)
+
+    # Check-in em massa do último dia (bulk_create não dispara sinais)
+    user = User.objects.create_user(username="u", password="p")
+    client.login(username="u", password="p")
+    client.post(reverse("checkin_dia", args=[dias[3].id]), {"presentes": [str(ana.id)]})
+    ana.refresh_from_db()
+    assert (ana.sequencia_atual, ana.melhor_sequencia, ana.ausencias_seguidas) == (4, 4, 0)
+
+    # Correção do dia volta a sequência
+    Presenca.objects.filter(adolescente=ana, dia=dias[3]).update(presente=False)
+    call_command("recalcular_sequencias", "--ano", "2026", stdout=io.StringIO())
+    ana.refresh_from_db()
+    assert (ana.sequencia_atual, ana.melhor_sequencia, ana.ausencias_seguidas) == (0, 3, 1)
+
+    # Novo evento conta como falta para todos
+    DiaEvento.objects.create(data=date.today() + timedelta(days=-1), ano=2026)
+    bia.refresh_from_db()
+    assert bia.ausencias_seguidas == 4
+
+    # Filtro da lista e relatório do PG
+    resp = client.get(reverse("listar_adolescentes"), {"sequencia": "faltas_4"})
+    assert [a.nome for a in resp.context["adolescentes"]] == ["Bia"]
+    user.user_permissions.add(Permission.objects.get(codename="view_pgs_page"))
+    resp = client.get(reverse("acompanhamento_pg", args=[pg.id]), {"faltas": 2})
+    assert resp.status_code == 200
+    assert [a.nome for a in resp.context["acompanhamento"]] == ["Bia", "Ana"]
+
+
+@pytest.mark.django_db
+def test_checkin_do_dia_criado_antes_conta_falta_dos_ausentes(client):
+    dias = [DiaEvento.objects.create(data=date.today() - timedelta(weeks=semanas), ano=2026) for semanas in (2, 1)]
+    ana = Adolescente.objects.create(nome="Ana", sobrenome="S", data_nascimento="2010-01-01")
+    bia = Adolescente.objects.create(nome="Bia", sobrenome="S", data_nascimento="2010-01-01")
+    for dia in dias:
+        Presenca.objects.create(adolescente=bia, dia=dia, presente=True)
+    # Dia cadastrado com antecedência: ainda não entra na contagem
+    proximo = DiaEvento.objects.create(data=date.today() + timedelta(days=1), ano=2026)
+    DiaEvento.objects.filter(pk=proximo.pk).update(data=date.today())
+
+    User.objects.create_user(username="u", password="p")
+    client.login(username="u", password="p")
+    client.post(reverse("checkin_dia", args=[proximo.id]), {"presentes": [str(ana.id)]})
+    ana.refresh_from_db()
+    bia.refresh_from_db()
+    assert (ana.sequencia_atual, ana.ausencias_seguidas) == (1, 0)
+    assert (bia.sequencia_atual, bia.melhor_sequencia, bia.ausencias_seguidas) == (0, 2, 1)
+
+
+@pytest.mark.django_db
+def test_primeira_presenca_do_dia_por_sinal_recalcula_o_ano():
+    dia_anterior = DiaEvento.objects.create(data=date.today() - timedelta(weeks=1), ano=2026)
+    ana = Adolescente.objects.create(nome="Ana", sobrenome="S", data_nascimento="2010-01-01")
+    bia = Adolescente.objects.create(nome="Bia", sobrenome="S", data_nascimento="2010-01-01")
+    Presenca.objects.create(adolescente=bia, dia=dia_anterior, presente=True)
+    novo = DiaEvento.objects.create(data=date.today() + timedelta(days=1), ano=2026)
+    DiaEvento.objects.filter(pk=novo.pk).update(data=date.today())
+
+    Presenca.objects.create(adolescente=ana, dia=novo, presente=True)
+    bia.refresh_from_db()
+    assert (bia.sequencia_atual, bia.ausencias_seguidas) == (0, 1)
+
+
+@pytest.mark.django_db
+def test_lista_acompanhamento_precalculada(client):
+    dias = _dias(6)
+    pg = PequenoGrupo.objects.create(nome="PG A", ano=2026)
+    sumido = Adolescente.objects.create(nome="Sumido", sobrenome="S", data_nascimento="2010-01-01", pg=pg)
+    novato = Adolescente.objects.create(nome="Novato", sobrenome="S", data_nascimento="2010-01-01", pg=pg)
+    fiel = Adolescente.objects.create(nome="Fiel", sobrenome="S", data_nascimento="2010-01-01")
+    for dia in dias[:3]:
+        Presenca.objects.create(adolescente=sumido, dia=dia, presente=True)
+    Presenca.objects.create(adolescente=novato, dia=dias[0], presente=True)
+    for dia in dias:
+        Presenca.objects.create(adolescente=fiel, dia=dia, presente=True)
+
+    call_command("calcular_acompanhamento", "--ano", "2026", stdout=io.StringIO())
+    lista = ListaAcompanhamento.objects.get(ano=2026)
+    assert (lista.min_presencas, lista.faltas_minimas, lista.total_eventos) == (3, 3, 6)
+    item = lista.itens.get()
+    assert item.adolescente == sumido and item.pg == pg
+    assert (item.total_presencas, item.ausencias_seguidas, item.ultima_presenca) == (3, 3, dias[2].data)
+
+    # Recalcular substitui a lista anterior
+    call_command("calcular_acompanhamento", "--ano", "2026", "--min-presencas", "1", stdout=io.StringIO())
+    assert set(lista.itens.values_list("adolescente__nome", flat=True)) == {"Sumido", "Novato"}
+
+    user = User.objects.create_user(username="u", password="p")
+    user.user_permissions.add(Permission.objects.get(codename="view_pgs_page"))
+    client.login(username="u", password="p")
+    resp = client.get(reverse("lista_acompanhamento"))
+    assert [g["nome"] for g in resp.context["grupos"]] == ["PG A"]
+    resp = client.get(reverse("exportar_acompanhamento_csv"))
+    conteudo = b"".join(resp.streaming_content).decode("utf-8")
+    assert "Sumido" in conteudo and "Fiel" not in conteudo
@@ -0,0 +1,107 @@
+import csv
+import io
+from datetime import date
+
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from adolescentes import tarefas
+from adolescentes.cache_utils import invalidar_dados
+from adolescentes.models import Adolescente, EventoEspecial, PequenoGrupo, TarefaExportacao, VisitanteEvento
+
+
+@pytest.fixture
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.EXPORTACAO_LIMITE_SINCRONO = 1
+    return tmp_path
+
+
+@pytest.fixture
+def admin_client_logado(client):
+    User.objects.create_superuser("admin", "admin@example.com", "pass")
+    client.login(username="admin", password="pass")
+    return client
+
+
+def exportar_admin(client, formato="csv"):
+    ids = list(Adolescente.objects.values_list("id", flat=True))
+    return client.post(reverse("admin:adolescentes_adolescente_changelist"), {
+        "action": f"exportar_{formato}",
+        "index": 0,
+        "_selected_action": [str(i) for i in ids],
+    })
+
+
+@pytest.mark.django_db
+def test_admin_exporta_em_segundo_plano_e_reaproveita(admin_client_logado, media, django_capture_on_commit_callbacks):
+    pg = PequenoGrupo.objects.create(nome="PG A")
+    Adolescente.objects.create(nome="Bruno", sobrenome="Souza", data_nascimento="2010-02-02")
+    Adolescente.objects.create(nome="Ana", sobrenome="Silva", data_nascimento="2010-01-01", pg=pg)
+
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        resp = exportar_admin(admin_client_logado)
+    tarefa = TarefaExportacao.objects.get()
+    assert resp.status_code == 302
+    assert resp["Location"] == reverse("tarefa_exportacao", args=[tarefa.pk])
+    assert len(callbacks) == 1
+
+    status = admin_client_logado.get(reverse("tarefa_exportacao", args=[tarefa.pk]), {"formato": "json"}).json()
+    assert status["status"] == "pendente" and status["download_url"] is None
+
+    tarefas.executar_tarefa(tarefa.pk)
+    tarefa.refresh_from_db()
+    assert tarefa.status == "concluida" and tarefa.total_linhas == 2
+
+    resp = admin_client_logado.get(reverse("baixar_exportacao", args=[tarefa.pk]))
+    conteudo = b"".join(resp.streaming_content).decode("utf-8")
+    assert list(csv.reader(io.StringIO(conteudo))) == [
+        ["Nome", "Sobrenome", "PG", "Império", "Data de Nascimento"],
+        ["Ana", "Silva", "PG A", "", "2010-01-01"],
+        ["Bruno", "Souza", "", "", "2010-02-02"],
+    ]
+
+    # Mesmo pedido, mesma versão dos dados: reaproveita a tarefa sem enfileirar de novo
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        exportar_admin(admin_client_logado)
+    assert TarefaExportacao.objects.count() == 1 and not callbacks
+
+    invalidar_dados()
+    exportar_admin(admin_client_logado)
+    assert TarefaExportacao.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_estatisticas_convites_em_segundo_plano(client, media):
+    User.objects.create_user(username="u", password="p")
+    client.login(username="u", password="p")
+    evento = EventoEspecial.objects.create(nome="Conf", data=date(2026, 5, 1))
+    for convidado_por in ["Ana", "Ana", "Bia"]:
+        VisitanteEvento.objects.create(evento=evento, nome="V", sobrenome="S",
+                                       data_nascimento=date(2010, 1, 1), convidado_por=convidado_por)
+
+    resp = client.get(reverse("estatisticas_convites", args=[evento.id]), {"export": "csv"})
+    tarefa = TarefaExportacao.objects.get()
+    assert resp["Location"] == reverse("tarefa_exportacao", args=[tarefa.pk])
+    tarefas.executar_tarefa(tarefa.pk)
+
+    resp = client.get(reverse("baixar_exportacao", args=[tarefa.pk]))
+    conteudo = b"".join(resp.streaming_content).decode("utf-8")
+    linhas = list(csv.reader(io.StringIO(conteudo.lstrip("\ufeff"))))
+    assert linhas[1] == ["1", "Ana", "2", "2", "0", "100.0"]
+
+    # Outro usuário não enxerga a tarefa
+    User.objects.create_user(username="outro", password="p")
+    client.login(username="outro", password="p")
+    assert client.get(reverse("tarefa_exportacao", args=[tarefa.pk])).status_code == 404
+
+
+@pytest.mark.django_db
+def test_tarefa_com_erro_nao_e_reaproveitada(media):
+    tarefa = tarefas.solicitar_exportacao("estatisticas_convites", {"evento_id": 999}, "x.csv")
+    tarefas.executar_tarefa(tarefa.pk)
+    tarefa.refresh_from_db()
+    assert tarefa.status == "erro" and tarefa.erro
+    nova = tarefas.solicitar_exportacao("estatisticas_convites", {"evento_id": 999}, "x.csv")
+    assert nova.pk != tarefa.pk
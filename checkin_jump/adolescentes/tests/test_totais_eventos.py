@@ -0,0 +1,144 @@
+from datetime import date
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from adolescentes import totais_eventos
+from adolescentes.models import Adolescente, EventoEspecial, VisitanteEvento
+
+
+def criar_evento(nome="Conferência", **kwargs):
+    return EventoEspecial.objects.create(nome=nome, data=date(2026, 5, 1), ano=2026, **kwargs)
+
+
+def criar_visitante(evento, nome="Ana", **kwargs):
+    return VisitanteEvento.objects.create(evento=evento, nome=nome, sobrenome="Silva", data_nascimento="2010-01-01", **kwargs)
+
+
+def totais(evento):
+    evento.refresh_from_db()
+    return evento.total_visitantes, evento.total_presentes, evento.total_migrados
+
+
+@pytest.mark.django_db
+def test_contadores_acompanham_criacao_edicao_e_exclusao():
+    evento, outro = criar_evento(), criar_evento("Retiro")
+    ana = criar_visitante(evento)
+    bia = criar_visitante(evento, "Bia", presente=False)
+    assert totais(evento) == (2, 1, 0)
+
+    bia = VisitanteEvento.objects.get(pk=bia.pk)
+    bia.presente = True
+    bia.migrado = True
+    bia.adolescente_migrado = Adolescente.objects.create(nome="Bia", sobrenome="Silva", data_nascimento="2010-01-01")
+    bia.save()
+    bia.save()
+    assert totais(evento) == (2, 2, 1)
+
+    ana.evento = outro
+    ana.save()
+    assert totais(evento) == (1, 1, 1)
+    assert totais(outro) == (1, 1, 0)
+
+    VisitanteEvento.objects.filter(pk=bia.pk).delete()
+    assert totais(evento) == (0, 0, 0)
+
+    # Editar o evento não sobrescreve os contadores carregados antes
+    carregado = EventoEspecial.objects.get(pk=outro.pk)
+    criar_visitante(outro, "Caio")
+    carregado.descricao = "Editado"
+    carregado.save()
+    assert totais(outro) == (2, 2, 0)
+
+
+@pytest.mark.django_db
+def test_presenca_condicional_nao_conta_em_dobro():
+    evento = criar_evento()
+    visitante = criar_visitante(evento, presente=False)
+    assert totais_eventos.definir_presenca(visitante.pk, True) is True
+    assert totais_eventos.definir_presenca(visitante.pk, True) is False
+    assert totais(evento) == (1, 1, 0)
+    totais_eventos.definir_presenca(visitante.pk, False)
+    assert totais(evento) == (1, 0, 0)
+
+
+@pytest.mark.django_db
+def test_duas_edicoes_do_mesmo_visitante_carregado_antes_nao_contam_em_dobro():
+    evento = criar_evento()
+    visitante = criar_visitante(evento)
+    primeira, segunda = (VisitanteEvento.objects.get(pk=visitante.pk) for _ in range(2))
+    primeira.presente = segunda.presente = False
+    primeira.save()
+    segunda.save()
+    assert totais(evento) == (1, 0, 0)
+
+    segunda.presente = True
+    segunda.save()
+    assert totais(evento) == (1, 1, 0)
+
+
+@pytest.mark.django_db
+def test_comando_reconcilia_divergencias():
+    evento = criar_evento()
+    criar_visitante(evento)
+    EventoEspecial.objects.filter(pk=evento.pk).update(total_visitantes=7, total_presentes=0)
+
+    saida = StringIO()
+    call_command("recalcular_totais_eventos", stdout=saida)
+    assert "1 evento(s) corrigido(s)" in saida.getvalue()
+    assert totais(evento) == (1, 1, 0)
+    assert totais_eventos.recalcular_totais() == []
+
+
+@pytest.mark.django_db
+def test_lista_de_eventos_nao_cresce_com_eventos(client):
+    User.objects.create_user(username="u", password="p")
+    client.login(username="u", password="p")
+    url = reverse("lista_eventos_especiais")
+
+    def queries():
+        with CaptureQueriesContext(connection) as contexto:
+            resp = client.get(url)
+        return len(contexto), resp
+
+    criar_visitante(criar_evento("Evento 0"))
+    client.get(url)
+    uma, _ = queries()
+    for i in range(1, 6):
+        criar_visitante(criar_evento(f"Evento {i}"))
+    seis, resp = queries()
+    assert seis == uma
+    assert resp.content.decode().count("1 / 1") == 6
+
+
+@pytest.mark.django_db
+def test_presencas_em_lote_uma_update_por_estado(client, django_assert_max_num_queries):
+    User.objects.create_user(username="u", password="p")
+    client.login(username="u", password="p")
+    evento, outro = criar_evento(), criar_evento("Retiro")
+    ausentes = [criar_visitante(evento, f"A{i}", presente=False) for i in range(20)]
+    presente = criar_visitante(evento, "Bia", observacoes="não sobrescrever")
+    intruso = criar_visitante(outro, "Caio", presente=False)
+    VisitanteEvento.objects.filter(pk=presente.pk).update(observacoes="editado em paralelo")
+
+    lote = [{"id": v.id, "presente": True} for v in ausentes]
+    lote += [{"id": ausentes[0].id, "presente": True}, {"id": presente.id, "presente": False}, {"id": intruso.id, "presente": True}]
+    url = reverse("atualizar_presencas_visitantes", args=[evento.id])
+    # Uma UPDATE por estado + a do contador (e o SAVEPOINT/RELEASE do atomic)
+    with django_assert_max_num_queries(5):
+        totais_eventos.definir_presencas(evento.id, {item["id"]: item["presente"] for item in lote})
+    resp = client.post(url, {"presencas": lote}, content_type="application/json")
+
+    assert resp.json() == {"ok": True, "alterados": 0, "total_presentes": 20, "total_visitantes": 21}
+    assert totais(evento) == (21, 20, 0)
+    assert totais(outro) == (1, 0, 0)
+    presente.refresh_from_db()
+    assert presente.observacoes == "editado em paralelo"
+
+    resp = client.post(url, {"presencas": [{"id": "x"}]}, content_type="application/json")
+    assert resp.status_code == 400
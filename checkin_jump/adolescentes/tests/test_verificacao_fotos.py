@@ -0,0 +1,121 @@
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management import call_command
+from django.template import Context, Template
+from django.utils import timezone
+from PIL import Image
+
+from adolescentes.models import Adolescente
+from adolescentes.verificacao_fotos import verificar_fotos
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def _jpeg(largura=640, altura=480):
+    saida = BytesIO()
+    Image.new('RGB', (largura, altura), 'green').save(saida, format='JPEG')
+    return ContentFile(saida.getvalue())
+
+
+def _adolescente(**kwargs):
+    return Adolescente(nome='Ana', sobrenome='Souza', data_nascimento=date(2010, 1, 1), ano=2026, **kwargs)
+
+
+@pytest.mark.django_db
+def test_upload_grava_metadados():
+    adolescente = _adolescente()
+    adolescente.foto.save('foto.jpg', _jpeg(), save=False)
+    adolescente.save()
+    adolescente.refresh_from_db()
+    assert adolescente.foto_disponivel
+    assert (adolescente.foto_largura, adolescente.foto_altura) == (640, 480)
+    assert adolescente.foto_bytes == default_storage.size(adolescente.foto.name)
+    assert adolescente.foto_verificada_em is not None
+
+
+@pytest.mark.django_db
+def test_tags_nao_consultam_o_storage(monkeypatch):
+    adolescente = _adolescente()
+    adolescente.foto.save('foto.jpg', _jpeg(), save=False)
+    adolescente.save()
+    sumida = _adolescente(foto='fotos/sumida.jpg')
+
+    def proibido(*args, **kwargs):
+        raise AssertionError('storage consultado na renderização')
+
+    monkeypatch.setattr(FileSystemStorage, 'exists', proibido)
+    template = Template(
+        '{% load image_utils %}{{ a.foto|file_exists }}|{% image_or_placeholder a.foto initials="AS" %}|'
+        '{{ s.foto|file_exists }}|{% image_or_placeholder s.foto initials="AS" %}|{{ s|foto_url:36 }}'
+    )
+    existe, img, nao_existe, placeholder, url = template.render(Context({'a': adolescente, 's': sumida})).split('|')
+    assert existe == 'True' and '_avatar.jpg' in img
+    assert nao_existe == 'False' and 'avatar-initials' in placeholder and url == 'None'
+
+
+@pytest.mark.django_db
+def test_verificador_marca_ausentes_e_completa_dimensoes():
+    nome = default_storage.save('fotos/antiga.jpg', _jpeg(300, 200))
+    existente, ausente = Adolescente.objects.bulk_create([
+        _adolescente(foto=nome, foto_disponivel=True),
+        _adolescente(foto='fotos/sumiu.jpg', foto_disponivel=True),
+    ])
+
+    resultado = verificar_fotos(Adolescente.objects.all(), workers=4)
+    assert (resultado.verificadas, resultado.indisponiveis, resultado.falhas) == (2, 1, 0)
+    existente.refresh_from_db()
+    ausente.refresh_from_db()
+    assert existente.foto_disponivel and (existente.foto_largura, existente.foto_altura) == (300, 200)
+    assert existente.foto_bytes == default_storage.size(nome)
+    assert not ausente.foto_disponivel and ausente.foto_verificada_em is not None
+
+
+@pytest.mark.django_db
+def test_foto_trocada_durante_a_verificacao_nao_recebe_metadados_da_antiga():
+    Adolescente.objects.bulk_create([_adolescente(foto='fotos/sumiu.jpg', foto_disponivel=True)])
+    carregados = list(Adolescente.objects.all())
+    # Nova foto enviada depois de o verificador carregar o cadastro
+    nova = _adolescente()
+    nova.foto.save('nova.jpg', _jpeg(), save=False)
+    Adolescente.objects.update(foto=nova.foto.name, foto_disponivel=True, foto_largura=640, foto_altura=480)
+
+    resultado = verificar_fotos(carregados)
+    assert resultado.indisponiveis == 1
+    atual = Adolescente.objects.get()
+    assert atual.foto.name == nova.foto.name
+    assert atual.foto_disponivel and (atual.foto_largura, atual.foto_altura) == (640, 480)
+
+
+@pytest.mark.django_db
+def test_falha_do_storage_mantem_metadados(monkeypatch):
+    Adolescente.objects.bulk_create([_adolescente(foto='fotos/x.jpg', foto_disponivel=True)])
+
+    def fora_do_ar(self, nome):
+        raise ConnectionError('timeout')
+
+    monkeypatch.setattr(FileSystemStorage, 'exists', fora_do_ar)
+    resultado = verificar_fotos(Adolescente.objects.all())
+    assert resultado.falhas == 1
+    assert Adolescente.objects.get().foto_disponivel
+
+
+@pytest.mark.django_db
+def test_comando_so_reverifica_as_antigas():
+    recente, antiga = Adolescente.objects.bulk_create([
+        _adolescente(foto='fotos/a.jpg', foto_disponivel=True, foto_verificada_em=timezone.now()),
+        _adolescente(foto='fotos/b.jpg', foto_disponivel=True, foto_verificada_em=timezone.now() - timedelta(days=3)),
+    ])
+    saida = StringIO()
+    call_command('verificar_fotos', '--horas', '24', stdout=saida)
+    assert '1 foto(s) para verificar' in saida.getvalue()
+    recente.refresh_from_db()
+    antiga.refresh_from_db()
+    assert recente.foto_disponivel and not antiga.foto_disponivel
@@ -0,0 +1,81 @@
+import io
+import zipfile
+from datetime import date, datetime
+from xml.etree import ElementTree
+
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from adolescentes import xlsx
+from adolescentes.models import Adolescente, DiaEvento, PequenoGrupo, Presenca
+
+NS = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def ler_planilha(bruto):
+    with zipfile.ZipFile(io.BytesIO(bruto)) as zf:
+        assert zf.testzip() is None
+        assert "xl/workbook.xml" in zf.namelist()
+        raiz = ElementTree.fromstring(zf.read("xl/worksheets/sheet1.xml"))
+    return [list(row) for row in raiz.iter(f"{{{NS['m']}}}row")]
+
+
+def valor(celula):
+    if celula.get("t") == "inlineStr":
+        return celula.find("m:is/m:t", NS).text
+    v = celula.find("m:v", NS)
+    return v.text if v is not None else None
+
+
+def test_celulas_tipadas_em_varios_blocos():
+    linhas = [["Texto", "Data", "Número", "Vazio"]]
+    linhas += [[f"<a&b> {i}", date(2026, 3, 1), i, None] for i in range(7)]
+    linhas.append(["x\x01y", datetime(2026, 3, 1, 12, 0), 1.5, True])
+    partes = list(xlsx.linhas_xlsx(iter(linhas), "Pres:enças", linhas_por_escrita=2))
+    assert len(partes) > 1
+
+    linhas_xml = ler_planilha(b"".join(partes))
+    assert len(linhas_xml) == 9
+    assert linhas_xml[0][0].get("s") == str(xlsx.ESTILO_CABECALHO)
+    texto, data, numero, vazio = linhas_xml[1]
+    assert valor(texto) == "<a&b> 0"
+    assert data.get("s") == str(xlsx.ESTILO_DATA) and valor(data) == "46082"
+    assert numero.get("t") is None and valor(numero) == "0"
+    assert valor(vazio) is None
+    ultima = linhas_xml[-1]
+    assert valor(ultima[0]) == "xy"
+    assert ultima[1].get("s") == str(xlsx.ESTILO_DATA_HORA) and valor(ultima[1]) == "46082.5"
+    assert ultima[3].get("t") == "b" and valor(ultima[3]) == "1"
+
+
+@pytest.mark.django_db
+def test_exportar_adolescentes_xlsx_mantem_datas(client):
+    Adolescente.objects.create(nome="Ana", sobrenome="S", data_nascimento="2010-02-03", genero="F")
+    resp = client.get(reverse("exportar_adolescentes_csv"), {"formato": "xlsx", "campos": ["data_nascimento"]})
+    assert resp["Content-Type"] == xlsx.CONTENT_TYPE
+    assert resp["Content-Disposition"].endswith('adolescentes.xlsx"')
+    linhas = ler_planilha(b"".join(resp.streaming_content))
+    assert [valor(c) for c in linhas[0]] == ["Nome", "Sobrenome", "Data de Nascimento"]
+    nascimento = linhas[1][2]
+    assert nascimento.get("s") == str(xlsx.ESTILO_DATA)
+    assert int(valor(nascimento)) == (date(2010, 2, 3) - date(1899, 12, 30)).days
+
+
+@pytest.mark.django_db
+def test_exportar_matriz_e_dia_em_xlsx(client):
+    User.objects.create_user(username="u", password="p")
+    client.login(username="u", password="p")
+    dia = DiaEvento.objects.create(data=date(2026, 3, 1), ano=2026)
+    pg = PequenoGrupo.objects.create(nome="PG A", ano=2026)
+    ana = Adolescente.objects.create(nome="Ana", sobrenome="S", data_nascimento="2010-01-01", pg=pg)
+    Presenca.objects.create(adolescente=ana, dia=dia, presente=True)
+
+    resp = client.get(reverse("exportar_matriz_presencas"), {"formato": "xlsx"})
+    linhas = ler_planilha(b"".join(resp.streaming_content))
+    assert [valor(c) for c in linhas[1]] == ["Ana", "S", "PG A", None, "1", "1", "100.0"]
+
+    resp = client.get(reverse("exportar_presencas_csv"), {"dia_id": dia.id, "formato": "xlsx"})
+    linhas = ler_planilha(b"".join(resp.streaming_content))
+    assert linhas[1][0].get("s") == str(xlsx.ESTILO_DATA)
+    assert [valor(c) for c in linhas[1][1:]] == ["Ana S", "Sim"]
@@ -0,0 +1,118 @@
+"""
+Contadores de visitantes dos eventos especiais.
+
+``EventoEspecial`` guarda ``total_visitantes``, ``total_presentes`` e
+``total_migrados`` para que as listas de eventos não precisem contar os
+visitantes de cada um. Os contadores são ajustados por incrementos no próprio
+banco (``F() + n``), então escritas concorrentes não se sobrescrevem:
+
+- salvar/excluir um visitante ajusta pela diferença (sinais em signals.py);
+- gravações em massa (``bulk_create``/``queryset.update``) chamam
+  ``ajustar_totais`` ou ``registrar_criados`` explicitamente;
+- o comando ``recalcular_totais_eventos`` corrige qualquer divergência.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import EventoEspecial, VisitanteEvento
+
+CAMPOS = ('total_visitantes', 'total_presentes', 'total_migrados')
+
+
+def ajustar_totais(evento_id, visitantes=0, presentes=0, migrados=0):
+    """Soma os deltas aos contadores do evento numa única UPDATE."""
+    deltas = dict(zip(CAMPOS, (visitantes, presentes, migrados)))
+    valores = {campo: F(campo) + delta for campo, delta in deltas.items() if delta}
+    if valores:
+        EventoEspecial.objects.filter(pk=evento_id).update(**valores)
+
+
+def aplicar_diferenca(anterior, atual):
+    """
+    Ajusta os contadores entre duas ``VisitanteEvento.contagem()`` (qualquer uma
+    pode ser None: visitante criado ou excluído). Troca de evento subtrai de um
+    e soma no outro.
+    """
+    if anterior and atual and anterior[0] == atual[0]:
+        ajustar_totais(atual[0], *(novo - velho for novo, velho in zip(atual[1:], anterior[1:])))
+        return
+    if anterior:
+        ajustar_totais(anterior[0], *(-valor for valor in anterior[1:]))
+    if atual:
+        ajustar_totais(atual[0], *atual[1:])
+
+
+def registrar_criados(visitantes):
+    """Soma aos contadores os visitantes gravados com bulk_create."""
+    por_evento = defaultdict(lambda: [0, 0, 0])
+    for visitante in visitantes:
+        evento_id, *valores = visitante.contagem()
+        por_evento[evento_id] = [total + valor for total, valor in zip(por_evento[evento_id], valores)]
+    for evento_id, valores in por_evento.items():
+        ajustar_totais(evento_id, *valores)
+
+
+def definir_presencas(evento_id, presencas):
+    """
+    Aplica várias marcações ``{visitante_id: presente}`` do evento com uma
+    UPDATE condicional por estado: só as linhas que de fato mudam são escritas
+    (apenas a coluna ``presente``) e o contador do evento é ajustado pelo total
+    alterado na mesma transação. Cliques repetidos ou simultâneos não contam em
+    dobro. Retorna quantos visitantes mudaram.
+    """
+    por_estado = {True: [], False: []}
+    for visitante_id, presente in presencas.items():
+        por_estado[bool(presente)].append(visitante_id)
+
+    with transaction.atomic():
+        alterados = {
+            presente: VisitanteEvento.objects.filter(evento_id=evento_id, id__in=ids)
+            .exclude(presente=presente).update(presente=presente)
+            for presente, ids in por_estado.items() if ids
+        }
+        ajustar_totais(evento_id, presentes=alterados.get(True, 0) - alterados.get(False, 0))
+    return sum(alterados.values())
+
+
+def definir_presenca(visitante_id, presente):
+    """Marca/desmarca a presença de um visitante. Retorna True se mudou."""
+    evento_id = VisitanteEvento.objects.filter(pk=visitante_id).values_list('evento_id', flat=True).get()
+    return bool(definir_presencas(evento_id, {visitante_id: presente}))
+
+
+def recalcular_totais(eventos=None):
+    """
+    Recalcula os contadores a partir dos visitantes (uma query agrupada) e grava
+    só os eventos divergentes. Retorna a lista ``(evento, antes, depois)``.
+    """
+    if eventos is None:
+        eventos = EventoEspecial.objects.all()
+    divergentes = []
+    with transaction.atomic():
+        # Trava os eventos antes de contar: ajustes concorrentes esperam a correção
+        eventos = list(eventos.select_for_update().only('id', 'nome', 'data', *CAMPOS))
+        contagens = {
+            linha['evento']: (linha['visitantes'], linha['presentes'], linha['migrados'])
+            for linha in (
+                VisitanteEvento.objects.filter(evento__in=[evento.id for evento in eventos])
+                .values('evento')
+                .annotate(
+                    visitantes=Count('id'),
+                    presentes=Count('id', filter=Q(presente=True)),
+                    migrados=Count('id', filter=Q(migrado=True)),
+                )
+                .order_by()
+            )
+        }
+        for evento in eventos:
+            antes = tuple(getattr(evento, campo) for campo in CAMPOS)
+            depois = contagens.get(evento.id, (0, 0, 0))
+            if antes != depois:
+                for campo, valor in zip(CAMPOS, depois):
+                    setattr(evento, campo, valor)
+                divergentes.append((evento, antes, depois))
+        if divergentes:
+            EventoEspecial.objects.bulk_update([evento for evento, _, _ in divergentes], CAMPOS)
+    return divergentes
@@ -19,6 +19,9 @@ urlpatterns = [
     path("adolescentes/novo/", views.criar_adolescente, name="criar_adolescente"),
     path("adolescentes/editar/<int:id>/", views.editar_adolescente, name="editar_adolescente"),
     path("adolescentes/excluir/<int:id>/", views.excluir_adolescente, name="excluir_adolescente"),
+    path("adolescentes/importar/", views.importar_adolescentes, name="importar_adolescentes"),
+    path("adolescentes/<int:adolescente_id>/cracha.png", views.cracha_adolescente, name="cracha_adolescente"),
+    path("adolescentes/crachas/", views.imprimir_crachas, name="imprimir_crachas"),
     path("ajax/form/<int:adolescente_id>/", views.get_form_ajax, name="get_form_ajax"),
 
     # Check-in
@@ -27,12 +30,17 @@ urlpatterns = [
     path("checkin/<int:dia_id>/", views.checkin_dia, name="checkin_dia"),
     path('atualizar-presenca/', views.atualizar_presenca, name='atualizar_presenca'),
     path("checkin/<int:dia_id>/pg-vip/", views.pg_vip, name="pg_vip"),
+    path("checkin/<int:dia_id>/scanner/", views.scanner_checkin, name="scanner_checkin"),
+    path("checkin/<int:dia_id>/scan/", views.checkin_qr, name="checkin_qr"),
 
     # PGs
     path('pgs/', views.lista_pgs, name='lista_pgs'),
     path('pgs/adicionar/', views.adicionar_pg, name='adicionar_pg'),
     path('pgs/salvar-ordem/', views.salvar_ordem_pgs, name='salvar_ordem_pgs'),
     path('pgs/<int:pg_id>/', views.detalhes_pg, name='detalhes_pg'),
+    path('acompanhamento/', views.lista_acompanhamento, name='lista_acompanhamento'),
+    path('acompanhamento/csv/', views.exportar_acompanhamento_csv, name='exportar_acompanhamento_csv'),
+    path('pgs/<int:pg_id>/acompanhamento/', views.acompanhamento_pg, name='acompanhamento_pg'),
     path('pgs/<int:pg_id>/bulk-add/', views.bulk_add_pg, name='bulk_add_pg'),
     path('pgs/<int:pg_id>/bulk-remove/', views.bulk_remove_pg, name='bulk_remove_pg'),
 
@@ -46,10 +54,15 @@ urlpatterns = [
     #Exportar CSV
     path('exportar/adolescentes/', exportar_adolescentes_csv, name='exportar_adolescentes_csv'),
     path('exportar/presencas/', exportar_presencas_csv, name='exportar_presencas_csv'),
+    path('exportar/presencas/matriz/', views.exportar_matriz_presencas, name='exportar_matriz_presencas'),
+    path('exportar/presencas/zip/', views.exportar_presencas_zip, name='exportar_presencas_zip'),
     path('exportar/presencas/selecionar-dia/', selecionar_dia_exportar, name='selecionar_dia_exportar'),
 
     # Dashboard
     path("dashboard/", views.dashboard, name="dashboard"),
+    path("dashboard/api/serie/", views.dashboard_serie, name="dashboard_serie"),
+    path("dashboard/api/<str:widget>/", views.dashboard_widget, name="dashboard_widget"),
+    path("dashboard/cache-stats/", views.dashboard_cache_stats, name="dashboard_cache_stats"),
 
     # Contagem de Auditório
     path('contagem-auditorio/', views.contagem_auditorio, name='contagem_auditorio'),
@@ -62,13 +75,20 @@ urlpatterns = [
     # Eventos Especiais
     path('eventos/', views.lista_eventos_especiais, name='lista_eventos_especiais'),
     path('eventos/novo/', views.criar_evento_especial, name='criar_evento_especial'),
+    path('eventos/convites/ranking/', views.ranking_convidadores, name='ranking_convidadores'),
     path('eventos/<int:evento_id>/', views.checkin_evento_especial, name='checkin_evento_especial'),
     path('eventos/<int:evento_id>/visitante/novo/', views.cadastrar_visitante_evento, name='cadastrar_visitante_evento'),
+    path('eventos/<int:evento_id>/kiosk/', views.kiosk_visitantes, name='kiosk_visitantes'),
+    path('eventos/<int:evento_id>/kiosk/registrar/', views.kiosk_registrar_visitante, name='kiosk_registrar_visitante'),
+    path('eventos/<int:evento_id>/importar/', views.importar_visitantes_evento, name='importar_visitantes_evento'),
     path('eventos/<int:evento_id>/exportar-csv/', views.exportar_visitantes_evento_csv, name='exportar_visitantes_evento_csv'),
     path('eventos/visitante/<int:visitante_id>/editar/', views.editar_visitante_evento, name='editar_visitante_evento'),
     path('eventos/visitante/<int:visitante_id>/excluir/', views.excluir_visitante_evento, name='excluir_visitante_evento'),
     path('eventos/visitante/atualizar-presenca/', views.atualizar_presenca_visitante, name='atualizar_presenca_visitante'),
+    path('eventos/<int:evento_id>/presencas/', views.atualizar_presencas_visitantes, name='atualizar_presencas_visitantes'),
     path('eventos/<int:evento_id>/migrar/', views.migrar_visitantes, name='migrar_visitantes'),
     path('eventos/<int:evento_id>/estatisticas/', views.estatisticas_convites, name='estatisticas_convites'),
+    path('exportacoes/<uuid:tarefa_id>/', views.tarefa_exportacao, name='tarefa_exportacao'),
+    path('exportacoes/<uuid:tarefa_id>/download/', views.baixar_exportacao, name='baixar_exportacao'),
 ]
 
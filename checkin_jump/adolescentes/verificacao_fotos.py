@@ -0,0 +1,122 @@
+"""
+Conferência periódica das fotos dos adolescentes no storage.
+
+As páginas decidem se mostram a foto pelos metadados em ``Adolescente``
+(``foto_disponivel`` e companhia), sem perguntar ao storage a cada exibição.
+O comando ``verificar_fotos`` (agendado no cron) mantém esses metadados em dia:
+consulta o storage em paralelo numa pool de threads (as chamadas são de rede
+ou disco) e grava os resultados em lote com ``bulk_update``, só nos cadastros
+cuja foto ainda é a que foi consultada (uma troca durante a sondagem não
+recebe os metadados da foto antiga).
+
+``listar_arquivos`` percorre as pastas de fotos pelo storage (local ou
+Cloudinary), para achar arquivos que nenhum cadastro referencia.
+"""
+import posixpath
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+from django.db import transaction
+from PIL import Image
+
+from .miniaturas import CAMPOS_METADADOS, dimensoes, metadados
+from .models import Adolescente
+
+TAMANHO_LOTE = 200
+
+
+@dataclass
+class ResultadoVerificacao:
+    verificadas: int = 0
+    indisponiveis: int = 0
+    falhas: int = 0  # storage não respondeu: metadados mantidos
+
+
+def sondar(nome, storage, ler_dimensoes=False):
+    """
+    Metadados da foto ``nome`` segundo o storage. Com ``ler_dimensoes``, abre
+    a imagem (só o cabeçalho é decodificado). Exceções do storage propagam.
+    """
+    if not storage.exists(nome):
+        return metadados(False)
+    try:
+        tamanho = storage.size(nome)
+    except NotImplementedError:
+        tamanho = None
+    largura = altura = None
+    if ler_dimensoes:
+        try:
+            with storage.open(nome, 'rb') as arquivo:
+                largura, altura = dimensoes(Image.open(arquivo))
+        except (OSError, SyntaxError, ValueError):
+            pass  # existe, mas não é uma imagem legível
+    return metadados(True, largura, altura, tamanho)
+
+
+def verificar_fotos(adolescentes, workers=8, tamanho_lote=TAMANHO_LOTE, ao_progredir=None):
+    """
+    Confere as fotos dos ``adolescentes`` (instâncias com ``foto``) e grava os
+    metadados. Dimensões só são lidas de quem ainda não as tem.
+    ``ao_progredir(processadas, total)`` é chamado a cada lote gravado.
+    """
+    resultado = ResultadoVerificacao()
+    adolescentes = [adolescente for adolescente in adolescentes if adolescente.foto]
+    storage = Adolescente._meta.get_field('foto').storage
+    pendentes = []
+
+    def gravar():
+        with transaction.atomic():
+            atuais = dict(
+                Adolescente.objects.select_for_update()
+                .filter(pk__in=[adolescente.pk for adolescente in pendentes])
+                .values_list('id', 'foto')
+            )
+            mesma_foto = [adolescente for adolescente in pendentes if atuais.get(adolescente.pk) == adolescente.foto.name]
+            Adolescente.objects.bulk_update(mesma_foto, list(CAMPOS_METADADOS), batch_size=tamanho_lote)
+        pendentes.clear()
+        if ao_progredir:
+            ao_progredir(resultado.verificadas + resultado.falhas, len(adolescentes))
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        futuros = {
+            executor.submit(sondar, adolescente.foto.name, storage, adolescente.foto_largura is None): adolescente
+            for adolescente in adolescentes
+        }
+        for futuro in as_completed(futuros):
+            adolescente = futuros[futuro]
+            try:
+                valores = futuro.result()
+            except Exception:
+                resultado.falhas += 1
+                continue
+            if valores['foto_disponivel'] and valores['foto_largura'] is None:
+                # Dimensões já conhecidas não precisam ser relidas
+                valores.update(foto_largura=adolescente.foto_largura, foto_altura=adolescente.foto_altura)
+            for campo, valor in valores.items():
+                setattr(adolescente, campo, valor)
+            resultado.verificadas += 1
+            resultado.indisponiveis += not valores['foto_disponivel']
+            pendentes.append(adolescente)
+            if len(pendentes) >= tamanho_lote:
+                gravar()
+    if pendentes:
+        gravar()
+    return resultado
+
+
+def listar_arquivos(storage, pastas):
+    """Nomes (como gravados no banco) de todos os arquivos sob ``pastas``, recursivamente."""
+    vistos = set()
+    pendentes = list(pastas)
+    while pendentes:
+        pasta = pendentes.pop()
+        if pasta in vistos:
+            continue
+        vistos.add(pasta)
+        try:
+            subpastas, arquivos = storage.listdir(pasta)
+        except FileNotFoundError:
+            continue
+        pendentes.extend(posixpath.join(pasta, subpasta) for subpasta in subpastas)
+        for arquivo in arquivos:
+            yield posixpath.join(pasta, arquivo)
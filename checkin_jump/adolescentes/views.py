@@ -1,6 +1,6 @@
 from datetime import date, datetime, timedelta
 from django.shortcuts import render, get_object_or_404, redirect
-from .models import Adolescente, DiaEvento, Presenca, PequenoGrupo, Imperio, ContagemAuditorio, ContagemVisitantes, DuplicadoRejeitado, EventoEspecial, VisitanteEvento
+from .models import Adolescente, DiaEvento, Presenca, PequenoGrupo, Imperio, ContagemAuditorio, ContagemVisitantes, DuplicadoRejeitado, EventoEspecial, VisitanteEvento, ListaAcompanhamento, ItemAcompanhamento, TarefaExportacao, storage_exportacoes
 from .forms import AdolescenteForm, DiaEventoForm, ContagemAuditorioForm, ContagemVisitantesForm, EventoEspecialForm, VisitanteEventoForm
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
@@ -8,24 +8,42 @@ from django.contrib.messages import get_messages
 from django.contrib.auth.decorators import login_required, permission_required
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.http import JsonResponse
-from django.views.decorators.http import require_http_methods
-from django.db.models import Count, Q, Avg, F, Case, When, Value
+from django.views.decorators.http import require_http_methods, condition
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.db.models import Count, Exists, OuterRef, Q, Avg, Max
 from django.db.models import Prefetch
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.utils.text import slugify
 import csv
-from django.http import HttpResponse
+import itertools
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
 
 import json
+import os
+import uuid
 from django.urls import reverse
 from urllib.parse import urlencode
 from django.db import transaction, connection
 from django.template.loader import render_to_string
+from . import agregacoes, analytics, convidadores, crachas, exports, importacao, kiosk, migracao_visitantes, otimizacao_fotos, tarefas, totais_eventos
+from .filtros import FiltroAdolescentes, PaginatorContado, buscar_adolescentes_por_nome
+from .sequencias import atualizar_sequencias
+from .cache_utils import obter_ou_calcular, invalidar_dados, get_data_version, estatisticas_cache, hash_partes
 
 # Constantes para anos disponíveis
 ANO_ATUAL = 2026
 ANOS_DISPONIVEIS = [2025, 2026]
 
+# Opções do filtro de sequência na lista de adolescentes
+OPCOES_SEQUENCIA = [
+    ('seguidas_2', 'Veio 2+ seguidas'),
+    ('seguidas_4', 'Veio 4+ seguidas'),
+    ('seguidas_8', 'Veio 8+ seguidas'),
+    ('faltas_2', 'Faltou 2+ seguidas'),
+    ('faltas_3', 'Faltou 3+ seguidas'),
+    ('faltas_4', 'Faltou 4+ seguidas'),
+]
+
 def get_ano_selecionado(request):
     """Retorna o ano selecionado da sessão (padrão: 2026)"""
     return request.session.get('ano_selecionado', ANO_ATUAL)
@@ -41,47 +59,6 @@ try:
 except Exception:  # pragma: no cover
     TrigramSimilarity = None
 
-def buscar_adolescentes_por_nome(queryset, termo_busca):
-    """
-    Função auxiliar para buscar adolescentes por nome de forma mais inteligente
-    """
-    if not termo_busca:
-        return queryset
-    
-    # Remove espaços extras e divide em palavras
-    palavras = [palavra.strip() for palavra in termo_busca.split() if palavra.strip()]
-    
-    if not palavras:
-        return queryset
-    
-    if len(palavras) == 1:
-        # Busca simples: uma palavra em nome ou sobrenome
-        return queryset.filter(
-            Q(nome__icontains=palavras[0]) | Q(sobrenome__icontains=palavras[0])
-        )
-    else:
-        # Busca por nome completo: múltiplas estratégias
-        # 1. Busca por nome completo concatenado
-        nome_completo = ' '.join(palavras)
-        query = Q()
-        
-        # 2. Busca por nome completo concatenado (nome + sobrenome)
-        query |= Q(nome__icontains=nome_completo)
-        query |= Q(sobrenome__icontains=nome_completo)
-        
-        # 3. Busca por nome completo concatenado (sobrenome + nome)
-        nome_invertido = ' '.join(palavras[::-1])
-        query |= Q(nome__icontains=nome_invertido)
-        query |= Q(sobrenome__icontains=nome_invertido)
-        
-        # 4. Busca por todas as palavras em nome ou sobrenome
-        query_palavras = Q()
-        for palavra in palavras:
-            query_palavras &= (Q(nome__icontains=palavra) | Q(sobrenome__icontains=palavra))
-        query |= query_palavras
-        
-        return queryset.filter(query)
-
 def pagina_inicial(request):
     """
     Página inicial que redireciona adequadamente sem causar loops.
@@ -128,13 +105,6 @@ def trocar_ano(request, ano):
 @login_required
 @ensure_csrf_cookie
 def listar_adolescentes(request):
-    busca = request.GET.get('busca', '')
-    pg_id = request.GET.get('pg')
-    genero = request.GET.get('genero')
-    imperio_id = request.GET.get('imperio')
-    presenca_filtro = request.GET.get('presenca')
-    ano_nascimento = request.GET.get('ano_nascimento')
-    
     # Parâmetros de ordenação
     ordenar_por = request.GET.get('ordenar_por', 'nome')  # Padrão: ordenar por nome
     direcao = request.GET.get('direcao', 'asc')  # Padrão: ascendente
@@ -142,53 +112,14 @@ def listar_adolescentes(request):
     # Filtrar por ano selecionado
     ano = get_ano_selecionado(request)
     readonly = is_ano_readonly(request)
+    filtro = FiltroAdolescentes.do_request(request, ano)
     
     # Otimização: usar select_related e prefetch_related para evitar queries N+1
-    adolescentes = Adolescente.objects.filter(ano=ano).select_related('pg', 'imperio').prefetch_related(
+    adolescentes = filtro.aplicar(Adolescente.objects.select_related('pg', 'imperio').prefetch_related(
         Prefetch('presenca_set', 
                 queryset=Presenca.objects.select_related('dia').order_by('-dia__data')[:5],
                 to_attr='cached_ultimas_presencas')
-    )
-    if busca:
-        adolescentes = buscar_adolescentes_por_nome(adolescentes, busca)
-    if pg_id:
-        if pg_id == 'sem_pg':
-            adolescentes = adolescentes.filter(pg__isnull=True)
-        else:
-            adolescentes = adolescentes.filter(pg__id=pg_id)
-    if genero:
-        adolescentes = adolescentes.filter(genero=genero)
-    if imperio_id:
-        if imperio_id == 'sem_imperio':
-            adolescentes = adolescentes.filter(imperio__isnull=True)
-        else:
-            adolescentes = adolescentes.filter(imperio__id=imperio_id)
-
-    # Filtro por ano de nascimento
-    if ano_nascimento:
-        try:
-            ano_nasc_int = int(ano_nascimento)
-            adolescentes = adolescentes.filter(data_nascimento__year=ano_nasc_int)
-        except ValueError:
-            pass
-
-    # Filtro por presença
-    if presenca_filtro:
-        trinta_dias_atras = date.today() - timedelta(days=30)
-        if presenca_filtro == 'presente_30':
-            adolescentes = adolescentes.filter(
-                presenca__presente=True,
-                presenca__dia__data__gte=trinta_dias_atras,
-            ).distinct()
-        elif presenca_filtro == 'ausente_30':
-            # Não teve nenhuma presença (presente=True) nos últimos 30 dias
-            adolescentes = adolescentes.exclude(
-                presenca__presente=True,
-                presenca__dia__data__gte=trinta_dias_atras,
-            ).distinct()
-        elif presenca_filtro == 'nunca':
-            # Nunca compareceu (sem nenhum registro de presença)
-            adolescentes = adolescentes.filter(presenca__isnull=True).distinct()
+    ))
 
     # Aplicar ordenação
     if ordenar_por == 'nome':
@@ -225,7 +156,8 @@ def listar_adolescentes(request):
         # Padrão: ordenar por nome e sobrenome
         adolescentes = adolescentes.order_by('nome', 'sobrenome')
 
-    total_adolescentes = adolescentes.count()
+    # Contagem em cache por (filtro, versão dos dados), reaproveitada pela paginação
+    total_adolescentes = filtro.contar()
     
     # Otimização: cache para filtros (evita queries repetidas) - filtrar por ano
     pgs = PequenoGrupo.objects.filter(ano=ano)
@@ -240,7 +172,7 @@ def listar_adolescentes(request):
     )
 
     # Paginação
-    paginator = Paginator(adolescentes, 25)  # 25 registros por página
+    paginator = PaginatorContado(adolescentes, 25, total_adolescentes)  # 25 registros por página
     page = request.GET.get('page')
     
     try:
@@ -262,12 +194,15 @@ def listar_adolescentes(request):
         'total_adolescentes': total_adolescentes,
         'pgs': pgs,
         'imperios': imperios,
-        'busca': busca,
-        'pg_selecionado': pg_id,
-        'genero_selecionado': genero,
-        'imperio_selecionado': imperio_id,
-        'presenca_selecionada': presenca_filtro,
-        'ano_nascimento_selecionado': ano_nascimento,
+        'busca': filtro.busca,
+        'pg_selecionado': filtro.pg or None,
+        'genero_selecionado': filtro.genero or None,
+        'imperio_selecionado': filtro.imperio or None,
+        'presenca_selecionada': filtro.presenca or None,
+        'sequencia_selecionada': filtro.sequencia or None,
+        'opcoes_sequencia': OPCOES_SEQUENCIA,
+        'ano_nascimento_selecionado': request.GET.get('ano_nascimento'),
+        'filtro': filtro,
         'anos_nascimento': anos_nascimento,
         'ordenar_por': ordenar_por,
         'direcao': direcao,
@@ -534,6 +469,9 @@ def criar_adolescente(request):
             adolescente = form.save(commit=False)
             adolescente.ano = ano
             adolescente.save()
+            if form.foto_enviada:
+                otimizacao_fotos.enfileirar_upload(adolescente, form.foto_enviada)
+                messages.info(request, "A foto está sendo processada e aparece em instantes.")
             
             # Se veio da página de check-in, cria automaticamente o check-in para aquele dia
             if dia_id:
@@ -623,8 +561,15 @@ def editar_adolescente(request, id):
                 # Não deletar o arquivo físico se estiver no Cloudinary
                 # apenas limpar a referência no banco
                 adolescente.foto = None
-            
-            form.save()
+                form.save()
+            else:
+                # Sem remoção pedida a foto não é regravada: uma foto nova ainda em
+                # processamento (otimizacao_fotos) seria revertida pelo valor carregado aqui
+                form.save(commit=False)
+                adolescente.save(update_fields=[campo for campo in form.fields if campo != 'foto'])
+            if form.foto_enviada:
+                otimizacao_fotos.enfileirar_upload(adolescente, form.foto_enviada)
+                messages.info(request, "A foto está sendo processada e aparece em instantes.")
             messages.success(request, "Adolescente atualizado com sucesso.")
             
             # Redireciona mantendo filtros, busca e página
@@ -870,6 +815,14 @@ def checkin_dia(request, dia_id):
                 Presenca.objects.bulk_update(to_update, ['presente'])
             if to_create:
                 Presenca.objects.bulk_create(to_create, ignore_conflicts=True)
+            # bulk_* não disparam sinais. Linhas novas indicam que o dia acabou de
+            # entrar na contagem: os ausentes também ganham uma falta, então o ano
+            # inteiro é recalculado; correções afetam só quem mudou
+            if to_create:
+                atualizar_sequencias(ano)
+            else:
+                atualizar_sequencias(ano, [p.adolescente_id for p in to_update])
+            invalidar_dados()
 
         messages.success(request, "Check-in realizado com sucesso!")
         return redirect('checkin_dia', dia_id=dia.id)
@@ -975,6 +928,8 @@ def atualizar_presenca(request):
             Presenca.objects.filter(
                 adolescente=adolescente, dia=dia
             ).update(presente=presente)
+            atualizar_sequencias(dia.ano, [adolescente.id])
+            invalidar_dados()
             created = False
         
         return JsonResponse({
@@ -992,6 +947,97 @@ def atualizar_presenca(request):
             'error': str(e)
         }, status=500)
 
+def _adolescente_cracha(adolescente_id):
+    return get_object_or_404(
+        Adolescente.objects.select_related('pg').only('nome', 'sobrenome', 'token_checkin', 'pg__nome'),
+        pk=adolescente_id,
+    )
+
+@login_required
+@require_http_methods(["GET"])
+def cracha_adolescente(request, adolescente_id):
+    """PNG do crachá (QR + nome + PG). ETag pelo conteúdo impresso."""
+    adolescente = _adolescente_cracha(adolescente_id)
+    etag = f'"{crachas.versao_cracha(adolescente)}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(crachas.png_cracha(adolescente), content_type='image/png')
+        if request.GET.get('download'):
+            nome = slugify(f'{adolescente.nome} {adolescente.sobrenome}') or 'cracha'
+            response['Content-Disposition'] = f'attachment; filename="cracha_{nome}.png"'
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+@login_required
+def imprimir_crachas(request):
+    """Folha de crachás para impressão, com os mesmos filtros da lista de adolescentes."""
+    filtro = FiltroAdolescentes.do_request(request, get_ano_selecionado(request))
+    adolescentes = filtro.queryset().select_related('pg').only('nome', 'sobrenome', 'pg__nome').order_by('nome', 'sobrenome')
+    return render(request, 'adolescentes/crachas.html', {
+        'adolescentes': adolescentes,
+        'filtro': filtro,
+    })
+
+@login_required
+@ensure_csrf_cookie
+def scanner_checkin(request, dia_id):
+    """Leitor de crachás pela câmera para o check-in de um dia."""
+    dia = get_object_or_404(DiaEvento, pk=dia_id)
+    return render(request, 'checkin/scanner.html', {
+        'dia': dia,
+        'readonly': dia.ano < ANO_ATUAL,
+        'total_presentes': Presenca.objects.filter(dia=dia, presente=True).count(),
+    })
+
+@login_required
+@require_http_methods(["POST"])
+def checkin_qr(request, dia_id):
+    """
+    Check-in pela leitura do crachá. Recebe JSON ``{"codigo": "JUMP:<token>"}``:
+    o adolescente é achado pelo índice único do token (já sabendo se estava
+    presente) e a presença é gravada num único upsert.
+    """
+    dia = get_object_or_404(DiaEvento, pk=dia_id)
+    if dia.ano < ANO_ATUAL:
+        return JsonResponse({'ok': False, 'error': 'Ano somente leitura'}, status=403)
+    try:
+        dados = json.loads(request.body.decode('utf-8'))
+        token = crachas.token_do_conteudo(dados.get('codigo') if isinstance(dados, dict) else None)
+    except Exception:
+        token = ''
+    if not token:
+        return JsonResponse({'ok': False, 'error': 'Código inválido'}, status=400)
+
+    adolescente = (
+        Adolescente.objects.filter(token_checkin=token, ano=dia.ano)
+        .select_related('pg').only('nome', 'sobrenome', 'pg__nome')
+        .annotate(ja_presente=Exists(Presenca.objects.filter(adolescente=OuterRef('pk'), dia=dia, presente=True)))
+        .first()
+    )
+    if adolescente is None:
+        return JsonResponse({'ok': False, 'error': 'Crachá não encontrado neste ano'}, status=404)
+
+    if not adolescente.ja_presente:
+        # Primeira leitura do dia: os demais passam a ter uma falta neste dia
+        primeira_do_dia = not Presenca.objects.filter(dia=dia).exists()
+        Presenca.objects.bulk_create(
+            [Presenca(adolescente=adolescente, dia=dia, presente=True)],
+            update_conflicts=True, unique_fields=['adolescente', 'dia'], update_fields=['presente'],
+        )
+        # bulk_create não dispara sinais
+        atualizar_sequencias(dia.ano, None if primeira_do_dia else [adolescente.id])
+        invalidar_dados()
+
+    return JsonResponse({
+        'ok': True,
+        'id': adolescente.id,
+        'nome': f'{adolescente.nome} {adolescente.sobrenome}',
+        'pg': adolescente.pg.nome if adolescente.pg else '',
+        'ja_presente': adolescente.ja_presente,
+        'total_presentes': Presenca.objects.filter(dia=dia, presente=True).count(),
+    })
+
 @login_required
 def adicionar_pg(request):
     ano = get_ano_selecionado(request)
@@ -1097,6 +1143,103 @@ def detalhes_pg(request, pg_id):
     })
 
 
+@permission_required('adolescentes.view_pgs_page', raise_exception=True)
+@login_required
+def acompanhamento_pg(request, pg_id):
+    """Relatório de sequências do PG: quem vem seguido e quem precisa de acompanhamento."""
+    ano = get_ano_selecionado(request)
+    pg = get_object_or_404(PequenoGrupo, id=pg_id)
+    try:
+        faltas_min = max(int(request.GET.get('faltas', 3)), 1)
+    except ValueError:
+        faltas_min = 3
+
+    membros = Adolescente.objects.filter(pg=pg, ano=ano).only(
+        'id', 'nome', 'sobrenome', 'telefone', 'telefone_responsavel', 'nome_responsavel',
+        'sequencia_atual', 'melhor_sequencia', 'ausencias_seguidas',
+    )
+    em_sequencia = membros.filter(sequencia_atual__gte=2).order_by('-sequencia_atual', 'nome', 'sobrenome')
+    acompanhamento = membros.filter(ausencias_seguidas__gte=faltas_min).order_by('-ausencias_seguidas', 'nome', 'sobrenome')
+    resumo = membros.aggregate(
+        total=Count('id'),
+        media_sequencia=Avg('sequencia_atual'),
+        melhor=Max('melhor_sequencia'),
+    )
+
+    return render(request, 'pgs/acompanhamento.html', {
+        'pg': pg,
+        'em_sequencia': em_sequencia,
+        'acompanhamento': acompanhamento,
+        'faltas_min': faltas_min,
+        'resumo': resumo,
+        'ano_selecionado': ano,
+    })
+
+
+def _itens_acompanhamento(ano):
+    lista = ListaAcompanhamento.objects.filter(ano=ano).first()
+    if lista is None:
+        return None, ItemAcompanhamento.objects.none()
+    itens = (
+        lista.itens.select_related('adolescente', 'pg', 'imperio')
+        .order_by('pg__nome', 'imperio__nome', '-ausencias_seguidas', 'adolescente__nome')
+    )
+    return lista, itens
+
+
+@permission_required('adolescentes.view_pgs_page', raise_exception=True)
+@login_required
+def lista_acompanhamento(request):
+    """Lista pré-calculada (comando calcular_acompanhamento) de quem vinha e sumiu."""
+    ano = get_ano_selecionado(request)
+    agrupar = 'imperio' if request.GET.get('agrupar') == 'imperio' else 'pg'
+    lista, itens = _itens_acompanhamento(ano)
+    if agrupar == 'imperio':
+        itens = itens.order_by('imperio__nome', '-ausencias_seguidas', 'adolescente__nome')
+
+    grupos = []
+    for item in itens:
+        grupo = item.imperio if agrupar == 'imperio' else item.pg
+        nome = grupo.nome if grupo else ('Sem Império' if agrupar == 'imperio' else 'Sem PG')
+        if not grupos or grupos[-1]['nome'] != nome:
+            grupos.append({'nome': nome, 'itens': []})
+        grupos[-1]['itens'].append(item)
+
+    return render(request, 'adolescentes/acompanhamento.html', {
+        'lista': lista,
+        'grupos': grupos,
+        'total': sum(len(g['itens']) for g in grupos),
+        'agrupar': agrupar,
+        'ano_selecionado': ano,
+    })
+
+
+@permission_required('adolescentes.view_pgs_page', raise_exception=True)
+@login_required
+def exportar_acompanhamento_csv(request):
+    ano = get_ano_selecionado(request)
+    formato = exports.formato_exportacao(request)
+    tipado = formato == 'xlsx'
+    _, itens = _itens_acompanhamento(ano)
+
+    def linhas():
+        yield ['Nome', 'Sobrenome', 'PG', 'Império', 'Presenças no ano', 'Faltas seguidas',
+               'Última presença', 'Telefone', 'Responsável', 'Telefone do responsável']
+        for item in itens.iterator(chunk_size=exports.CHUNK_SIZE):
+            a = item.adolescente
+            yield [
+                a.nome, a.sobrenome,
+                item.pg.nome if item.pg else '',
+                item.imperio.nome if item.imperio else '',
+                item.total_presencas, item.ausencias_seguidas,
+                item.ultima_presenca if tipado or not item.ultima_presenca
+                else item.ultima_presenca.strftime('%d/%m/%Y'),
+                a.telefone or '', a.nome_responsavel or '', a.telefone_responsavel or '',
+            ]
+
+    return exports.resposta_exportacao(linhas(), f'acompanhamento_{ano}', formato, planilha='Acompanhamento')
+
+
 @login_required
 @require_http_methods(["POST"])
 def bulk_add_pg(request, pg_id):
@@ -1105,8 +1248,14 @@ def bulk_add_pg(request, pg_id):
         return JsonResponse({'ok': False, 'error': 'Ano somente leitura'}, status=403)
     pg = get_object_or_404(PequenoGrupo, id=pg_id)
     data = json.loads(request.body)
-    ids = data.get('ids', [])
-    count = Adolescente.objects.filter(id__in=ids, ano=pg.ano).update(pg=pg)
+    if 'filtro' in data:
+        # Todos os adolescentes da lista filtrada (querystring da listagem)
+        adolescentes = FiltroAdolescentes.da_querystring(data['filtro'], pg.ano).queryset()
+        count = Adolescente.objects.filter(id__in=adolescentes.values('id')).update(pg=pg)
+    else:
+        ids = data.get('ids', [])
+        count = Adolescente.objects.filter(id__in=ids, ano=pg.ano).update(pg=pg)
+    invalidar_dados()
     return JsonResponse({'ok': True, 'count': count})
 
 
@@ -1120,6 +1269,7 @@ def bulk_remove_pg(request, pg_id):
     data = json.loads(request.body)
     ids = data.get('ids', [])
     count = Adolescente.objects.filter(id__in=ids, pg=pg).update(pg=None)
+    invalidar_dados()
     return JsonResponse({'ok': True, 'count': count})
 
 
@@ -1188,6 +1338,7 @@ def bulk_add_imperio(request, imperio_id):
     data = json.loads(request.body)
     ids = data.get('ids', [])
     count = Adolescente.objects.filter(id__in=ids, ano=imperio.ano).update(imperio=imperio)
+    invalidar_dados()
     return JsonResponse({'ok': True, 'count': count})
 
 
@@ -1201,6 +1352,7 @@ def bulk_remove_imperio(request, imperio_id):
     data = json.loads(request.body)
     ids = data.get('ids', [])
     count = Adolescente.objects.filter(id__in=ids, imperio=imperio).update(imperio=None)
+    invalidar_dados()
     return JsonResponse({'ok': True, 'count': count})
 
 
@@ -1237,105 +1389,19 @@ def exportar_adolescentes_csv(request):
     if 'sobrenome' not in campos_selecionados:
         campos_selecionados.insert(1, 'sobrenome')
     
-    # Mapeamento de campos para cabeçalhos
-    campo_headers = {
-        'nome': 'Nome',
-        'sobrenome': 'Sobrenome',
-        'data_nascimento': 'Data de Nascimento',
-        'genero': 'Sexo',
-        'telefone': 'Telefone',
-        'pg': 'PG',
-        'imperio': 'Império',
-        'nome_responsavel': 'Nome do Responsável',
-        'telefone_responsavel': 'Telefone do Responsável'
-    }
-    
-    # Aplicar filtros (mesma lógica da listagem)
-    ano = get_ano_selecionado(request)
-    adolescentes = Adolescente.objects.filter(ano=ano).select_related('pg', 'imperio')
-    
-    # Filtros
-    busca = request.GET.get('busca', '')
-    pg_id = request.GET.get('pg')
-    genero = request.GET.get('genero')
-    imperio_id = request.GET.get('imperio')
-    presenca_filtro = request.GET.get('presenca')
-    ano_nascimento = request.GET.get('ano_nascimento')
-    
-    if busca:
-        adolescentes = buscar_adolescentes_por_nome(adolescentes, busca)
-    if pg_id:
-        if pg_id == 'sem_pg':
-            adolescentes = adolescentes.filter(pg__isnull=True)
-        else:
-            adolescentes = adolescentes.filter(pg__id=pg_id)
-    if genero:
-        adolescentes = adolescentes.filter(genero=genero)
-    if imperio_id:
-        if imperio_id == 'sem_imperio':
-            adolescentes = adolescentes.filter(imperio__isnull=True)
-        else:
-            adolescentes = adolescentes.filter(imperio__id=imperio_id)
-    if ano_nascimento:
-        try:
-            ano_nasc_int = int(ano_nascimento)
-            adolescentes = adolescentes.filter(data_nascimento__year=ano_nasc_int)
-        except ValueError:
-            pass
-    if presenca_filtro:
-        trinta_dias_atras = date.today() - timedelta(days=30)
-        if presenca_filtro == 'presente_30':
-            adolescentes = adolescentes.filter(
-                presenca__presente=True,
-                presenca__dia__data__gte=trinta_dias_atras,
-            ).distinct()
-        elif presenca_filtro == 'ausente_30':
-            adolescentes = adolescentes.exclude(
-                presenca__presente=True,
-                presenca__dia__data__gte=trinta_dias_atras,
-            ).distinct()
-        elif presenca_filtro == 'nunca':
-            adolescentes = adolescentes.filter(presenca__isnull=True).distinct()
+    # Aplicar filtros (os mesmos da listagem)
+    filtro = FiltroAdolescentes.do_request(request, get_ano_selecionado(request))
+    adolescentes = filtro.queryset()
     
     # Ordenar por nome
     adolescentes = adolescentes.order_by('nome', 'sobrenome')
     
-    # Criar resposta CSV
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="adolescentes.csv"'
-    response.write('\ufeff')  # BOM para UTF-8
-    
-    writer = csv.writer(response)
-    
-    # Escrever cabeçalho
-    headers = [campo_headers.get(campo, campo) for campo in campos_selecionados]
-    writer.writerow(headers)
-    
-    # Escrever dados
-    for adolescente in adolescentes:
-        row = []
-        for campo in campos_selecionados:
-            if campo == 'nome':
-                row.append(adolescente.nome)
-            elif campo == 'sobrenome':
-                row.append(adolescente.sobrenome)
-            elif campo == 'data_nascimento':
-                row.append(adolescente.data_nascimento.strftime('%d/%m/%Y'))
-            elif campo == 'genero':
-                row.append(adolescente.get_genero_display())
-            elif campo == 'telefone':
-                row.append(adolescente.telefone or '')
-            elif campo == 'pg':
-                row.append(adolescente.pg.nome if adolescente.pg else '')
-            elif campo == 'imperio':
-                row.append(adolescente.imperio.nome if adolescente.imperio else '')
-            elif campo == 'nome_responsavel':
-                row.append(adolescente.nome_responsavel or '')
-            elif campo == 'telefone_responsavel':
-                row.append(adolescente.telefone_responsavel or '')
-        writer.writerow(row)
-    
-    return response
+    # Resposta em streaming: lê em lotes só as colunas pedidas (sem instanciar modelos)
+    formato = exports.formato_exportacao(request)
+    return exports.resposta_exportacao(
+        exports.linhas_adolescentes(adolescentes, campos_selecionados, tipado=formato == 'xlsx'),
+        'adolescentes', formato, content_type_csv='text/csv', planilha='Adolescentes',
+    )
 
 def exportar_presencas_csv(request):
     dia_id = request.GET.get('dia_id')
@@ -1344,22 +1410,12 @@ def exportar_presencas_csv(request):
         # Exportar presenças de um dia específico
         try:
             dia = DiaEvento.objects.get(id=dia_id)
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="presencas_{dia.data.strftime("%d_%m_%Y")}.csv"'
-
-            writer = csv.writer(response)
-            writer.writerow(['Data', 'Nome', 'Presente'])
-
-            presencas = Presenca.objects.filter(dia=dia).select_related('adolescente').order_by('adolescente__nome')
-
-            for presenca in presencas:
-                writer.writerow([
-                    dia.data.strftime('%d/%m/%Y'),
-                    f'{presenca.adolescente.nome} {presenca.adolescente.sobrenome}',
-                    'Sim' if presenca.presente else 'Não'
-                ])
-
-            return response
+            formato = exports.formato_exportacao(request)
+            return exports.resposta_exportacao(
+                exports.linhas_presencas_dia(dia, tipado=formato == 'xlsx'),
+                f'presencas_{dia.data.strftime("%d_%m_%Y")}', formato,
+                bom=False, content_type_csv='text/csv', planilha='Presenças',
+            )
         except DiaEvento.DoesNotExist:
             messages.error(request, "Dia não encontrado.")
             return redirect('lista_dias_evento')
@@ -1367,46 +1423,99 @@ def exportar_presencas_csv(request):
         # Redirecionar para a página de seleção de dia
         return redirect('selecionar_dia_exportar')
 
+@login_required
+def exportar_matriz_presencas(request):
+    """
+    Exporta a matriz de presenças de um período: uma linha por adolescente,
+    uma coluna por dia, total e taxa. Gerada em streaming (CSV, XLSX ou .npz colunar).
+    """
+    ano = get_ano_selecionado(request)
+    formato = request.GET.get('formato', 'csv')
+    try:
+        data_inicio = date.fromisoformat(request.GET['data_inicio']) if request.GET.get('data_inicio') else None
+        data_fim = date.fromisoformat(request.GET['data_fim']) if request.GET.get('data_fim') else None
+    except ValueError:
+        messages.error(request, "Período inválido.")
+        return redirect('selecionar_dia_exportar')
+
+    dias = exports.dias_do_periodo(ano, data_inicio, data_fim)
+    sufixo = f"{ano}"
+    if data_inicio or data_fim:
+        sufixo = f"{data_inicio or ''}_{data_fim or ''}".strip('_')
+
+    if formato == 'npz':
+        response = StreamingHttpResponse(exports.matriz_presencas_npz(ano, dias), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="matriz_presencas_{sufixo}.npz"'
+    elif formato == 'xlsx':
+        return exports.resposta_exportacao(
+            exports.linhas_matriz_presencas(ano, dias), f'matriz_presencas_{sufixo}', 'xlsx', planilha='Matriz',
+        )
+    else:
+        response = StreamingHttpResponse(exports.matriz_presencas_csv(ano, dias), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="matriz_presencas_{sufixo}.csv"'
+    return response
+
 def selecionar_dia_exportar(request):
-    dias = DiaEvento.objects.annotate(
-        total_presentes=Count('presenca', filter=Q(presenca__presente=True))
-    ).order_by('-data')
+    ano = get_ano_selecionado(request)
+    paginator = Paginator(DiaEvento.objects.filter(ano=ano).order_by('-data'), 24)
+    dias = paginator.get_page(request.GET.get('page'))
+
+    # Totais por dia em cache (uma query agrupada por versão dos dados)
+    presentes = exports.presentes_por_dia(ano)
+    for dia in dias:
+        dia.total_presentes = presentes.get(dia.id, 0)
     
     return render(request, 'checkin/selecionar_dia_exportar.html', {
-        'dias': dias
+        'dias': dias,
+        'ano_selecionado': ano,
     })
 
-@permission_required('adolescentes.view_dashboard', raise_exception=True)
+
 @login_required
-def dashboard(request):
-    """Dashboard com estatísticas e gráficos"""
-    from datetime import timedelta
-    
-    # Filtrar por ano selecionado
+def exportar_presencas_zip(request):
+    """ZIP em streaming com um CSV por dia selecionado (?dias=) e um resumo."""
     ano = get_ano_selecionado(request)
-    readonly = is_ano_readonly(request)
-    
-    # Filtros de data
-    data_inicio = request.GET.get('data_inicio')
-    data_fim = request.GET.get('data_fim')
-    dia_especifico = request.GET.get('dia_especifico')
-    
-    # Estatísticas básicas - filtradas por ano
-    total_adolescentes = Adolescente.objects.filter(ano=ano).count()
-    total_pgs = PequenoGrupo.objects.filter(ano=ano).count()
-    total_imperios = Imperio.objects.filter(ano=ano).count()
-    total_eventos = DiaEvento.objects.filter(ano=ano).count()
-    
-    # Filtrar eventos por período se especificado - base filtrada por ano
+    dias = DiaEvento.objects.filter(ano=ano).order_by('data')
+    if not request.GET.get('todos'):
+        ids = [dia_id for dia_id in request.GET.getlist('dias') if dia_id.isdigit()]
+        dias = dias.filter(id__in=ids)
+    dias = list(dias)
+    if not dias:
+        messages.error(request, "Selecione ao menos um dia.")
+        return redirect('selecionar_dia_exportar')
+
+    response = StreamingHttpResponse(exports.zip_presencas_dias(dias), content_type='application/zip')
+    response['Content-Disposition'] = (
+        f'attachment; filename="presencas_{dias[0].data:%d_%m_%Y}_a_{dias[-1].data:%d_%m_%Y}.zip"'
+    )
+    return response
+
+def _eventos_dashboard(ano, data_inicio, data_fim, dia_especifico):
+    """Eventos considerados pelo dashboard conforme os filtros de período"""
     eventos_query = DiaEvento.objects.filter(ano=ano)
     if dia_especifico:
         try:
-            dia = DiaEvento.objects.get(data=dia_especifico)
+            DiaEvento.objects.get(data=dia_especifico)
             eventos_query = DiaEvento.objects.filter(data=dia_especifico)
         except DiaEvento.DoesNotExist:
             eventos_query = DiaEvento.objects.none()
     elif data_inicio and data_fim:
         eventos_query = DiaEvento.objects.filter(data__range=[data_inicio, data_fim])
+    return eventos_query
+
+
+def _calcular_dashboard(ano, data_inicio, data_fim, dia_especifico):
+    """
+    Calcula os cards principais do dashboard (o "shell" da página).
+    Retorna apenas dados JSON-serializáveis (datas em ISO) para poder ser cacheado.
+    """
+    # Estatísticas básicas - filtradas por ano
+    total_adolescentes = Adolescente.objects.filter(ano=ano).count()
+    total_pgs = PequenoGrupo.objects.filter(ano=ano).count()
+    total_imperios = Imperio.objects.filter(ano=ano).count()
+    total_eventos = DiaEvento.objects.filter(ano=ano).count()
+    
+    eventos_query = _eventos_dashboard(ano, data_inicio, data_fim, dia_especifico)
     
     # Presença média por evento no período
     if eventos_query.exists():
@@ -1419,102 +1528,8 @@ def dashboard(request):
     else:
         media_presenca = 0
     
-    # Distribuição por gênero - filtrada por ano
-    generos = Adolescente.objects.filter(ano=ano).values('genero').annotate(
-        total=Count('id')
-    ).order_by('genero')
-    
-    genero_labels = []
-    genero_data = []
-    for genero in generos:
-        genero_labels.append(genero['genero'])
-        genero_data.append(genero['total'])
-    
-    # Presença média por PG (top 5) - filtrada por ano
-    if eventos_query.exists():
-        presenca_por_pg = PequenoGrupo.objects.filter(ano=ano).annotate(
-            total_presentes=Count('adolescentes__presenca', 
-                filter=Q(adolescentes__presenca__presente=True, 
-                        adolescentes__presenca__dia__in=eventos_query)),
-            total_eventos=Count('adolescentes__presenca__dia', 
-                filter=Q(adolescentes__presenca__dia__in=eventos_query), 
-                distinct=True)
-        ).annotate(
-            media_presenca=Case(
-                When(total_eventos=0, then=Value(0)),
-                default=F('total_presentes') / F('total_eventos')
-            )
-        ).order_by('-media_presenca')[:5]
-    else:
-        presenca_por_pg = []
-    
-    pg_labels = []
-    pg_data = []
-    for pg in presenca_por_pg:
-        pg_labels.append(pg.nome)
-        pg_data.append(round(pg.media_presenca, 1))
-    
-    # Evolução da presença (últimos 10 eventos) — annotated para evitar N+1
-    if eventos_query.exists():
-        ultimos_eventos = (
-            eventos_query
-            .annotate(
-                presentes=Count('presenca', filter=Q(presenca__presente=True)),
-                total=Count('presenca'),
-            )
-            .order_by('-data')[:10]
-        )
-        # Pré-carregar visitantes em um dict (1 query)
-        evento_ids = [e.id for e in ultimos_eventos]
-        visitantes_map = dict(
-            ContagemVisitantes.objects.filter(dia_id__in=evento_ids)
-            .values_list('dia_id', 'quantidade_visitantes')
-        )
-    else:
-        ultimos_eventos = []
-        visitantes_map = {}
-    presenca_por_evento = []
-    for evento in reversed(ultimos_eventos):  # Inverter para ordem cronológica
-        presentes = evento.presentes
-        total = evento.total
-        visitantes = visitantes_map.get(evento.id, 0)
-        # Calcular percentual em relação ao total de adolescentes cadastrados
-        percentual = round((presentes / max(total_adolescentes, 1)) * 100, 1)
-        presenca_por_evento.append({
-            'data': evento.data.strftime('%d/%m'),
-            'titulo': evento.titulo or '',
-            'presentes': presentes,
-            'visitantes': visitantes,
-            'total': total,
-            'percentual': percentual
-        })
-    
-    # Presença média por Império - filtrada por ano
-    if eventos_query.exists():
-        presenca_por_imperio = Imperio.objects.filter(ano=ano).annotate(
-            total_presentes=Count('adolescente__presenca', 
-                filter=Q(adolescente__presenca__presente=True, 
-                        adolescente__presenca__dia__in=eventos_query)),
-            total_eventos=Count('adolescente__presenca__dia', 
-                filter=Q(adolescente__presenca__dia__in=eventos_query), 
-                distinct=True)
-        ).annotate(
-            media_presenca=Case(
-                When(total_eventos=0, then=Value(0)),
-                default=F('total_presentes') / F('total_eventos')
-            )
-        ).order_by('-media_presenca')
-    else:
-        presenca_por_imperio = []
-    
-    imperio_labels = []
-    imperio_data = []
-    for imperio in presenca_por_imperio:
-        imperio_labels.append(imperio.nome)
-        imperio_data.append(round(imperio.media_presenca, 1))
-    
     # Estatísticas do último evento
-    ultimo_evento = eventos_query.order_by('-data').first() if eventos_query.exists() else None
+    ultimo_evento = eventos_query.order_by('-data').first()
     if ultimo_evento:
         ultimo_presentes = Presenca.objects.filter(dia=ultimo_evento, presente=True).count()
         ultimo_total = Presenca.objects.filter(dia=ultimo_evento).count()
@@ -1525,38 +1540,7 @@ def dashboard(request):
         ultimo_total = 0
         ultimo_percentual = 0
     
-    # Lista de eventos para o filtro
-    todos_eventos = DiaEvento.objects.order_by('-data')
-    
-    evolucao_labels = [e['data'] for e in presenca_por_evento]
-    evolucao_data = [e['presentes'] for e in presenca_por_evento]
-    evolucao_total = [e['total'] for e in presenca_por_evento]
-    
-    # Contagem de auditório por evento
-    contagem_auditorio_total = 0
-    contagem_auditorio_media = 0
-    contagem_auditorio_ultimo = None
-    contagem_auditorio_ultimo_usuario = None
-    contagem_auditorio_ultimo_data = None
-    if eventos_query.exists():
-        contagens = ContagemAuditorio.objects.filter(dia__in=eventos_query)
-        media_a = contagens.aggregate(avg=Avg('quantidade_pessoas'))['avg']
-        contagem_auditorio_media = round(media_a or 0, 1)
-        # Última contagem
-        ultima_contagem = contagens.order_by('-dia__data').first()
-        if ultima_contagem:
-            contagem_auditorio_ultimo = ultima_contagem.quantidade_pessoas
-            contagem_auditorio_ultimo_usuario = ultima_contagem.usuario_registro.username
-            contagem_auditorio_ultimo_data = ultima_contagem.dia.data
-
-    # Contagem de visitantes por evento (média)
-    contagem_visitantes_media = 0
-    if eventos_query.exists():
-        contagens_visitantes = ContagemVisitantes.objects.filter(dia__in=eventos_query)
-        media_v = contagens_visitantes.aggregate(avg=Avg('quantidade_visitantes'))['avg']
-        contagem_visitantes_media = round(media_v or 0, 1)
-
-    context = {
+    return {
         'total_adolescentes': total_adolescentes,
         'total_pgs': total_pgs,
         'total_imperios': total_imperios,
@@ -1565,8 +1549,169 @@ def dashboard(request):
         'ultimo_presentes': ultimo_presentes,
         'ultimo_total': ultimo_total,
         'ultimo_percentual': ultimo_percentual,
-        'ultimo_evento': ultimo_evento,
+        'ultimo_evento': {
+            'data': ultimo_evento.data.isoformat(),
+            'titulo': ultimo_evento.titulo or '',
+        } if ultimo_evento else None,
+    }
+
+
+def _widget_genero(ano, data_inicio, data_fim, dia_especifico):
+    """Distribuição por gênero - filtrada por ano"""
+    generos = Adolescente.objects.filter(ano=ano).values('genero').annotate(
+        total=Count('id')
+    ).order_by('genero')
+    return {
+        'labels': [g['genero'] for g in generos],
+        'data': [g['total'] for g in generos],
+    }
+
+
+def _widget_pgs(ano, data_inicio, data_fim, dia_especifico):
+    """Presença média por PG (top 5) - filtrada por ano"""
+    eventos_query = _eventos_dashboard(ano, data_inicio, data_fim, dia_especifico)
+    grupos = agregacoes.media_presenca_por_grupo(ano, 'pg', eventos_query)[:5]
+    return {
+        'labels': [g['nome'] for g in grupos],
+        'data': [g['media'] for g in grupos],
+        'grupos': grupos,
+    }
+
+
+def _widget_imperios(ano, data_inicio, data_fim, dia_especifico):
+    """Presença média por Império - filtrada por ano"""
+    eventos_query = _eventos_dashboard(ano, data_inicio, data_fim, dia_especifico)
+    grupos = agregacoes.media_presenca_por_grupo(ano, 'imperio', eventos_query)
+    return {
+        'labels': [g['nome'] for g in grupos],
+        'data': [g['media'] for g in grupos],
+        'grupos': grupos,
+    }
+
+
+def _widget_evolucao(ano, data_inicio, data_fim, dia_especifico):
+    """Evolução da presença (últimos 10 eventos) — annotated para evitar N+1"""
+    eventos_query = _eventos_dashboard(ano, data_inicio, data_fim, dia_especifico)
+    total_adolescentes = Adolescente.objects.filter(ano=ano).count()
+    ultimos_eventos = list(
+        eventos_query
+        .annotate(
+            presentes=Count('presenca', filter=Q(presenca__presente=True)),
+            total=Count('presenca'),
+        )
+        .order_by('-data')[:10]
+    )
+    # Pré-carregar visitantes em um dict (1 query)
+    visitantes_map = dict(
+        ContagemVisitantes.objects.filter(dia_id__in=[e.id for e in ultimos_eventos])
+        .values_list('dia_id', 'quantidade_visitantes')
+    ) if ultimos_eventos else {}
+    
+    presenca_por_evento = []
+    for evento in reversed(ultimos_eventos):  # Inverter para ordem cronológica
+        # Calcular percentual em relação ao total de adolescentes cadastrados
+        percentual = round((evento.presentes / max(total_adolescentes, 1)) * 100, 1)
+        presenca_por_evento.append({
+            'data': evento.data.strftime('%d/%m'),
+            'titulo': evento.titulo or '',
+            'presentes': evento.presentes,
+            'visitantes': visitantes_map.get(evento.id, 0),
+            'total': evento.total,
+            'percentual': percentual
+        })
+    return {
+        'eventos': presenca_por_evento,
+        'labels': [e['data'] for e in presenca_por_evento],
+        'data': [e['presentes'] for e in presenca_por_evento],
+        'total': [e['total'] for e in presenca_por_evento],
+    }
+
+
+def _widget_contagens(ano, data_inicio, data_fim, dia_especifico):
+    """Contagens de auditório e de visitantes no período"""
+    eventos_query = _eventos_dashboard(ano, data_inicio, data_fim, dia_especifico)
+    auditorio = {'media': 0, 'ultimo': None, 'ultimo_usuario': None, 'ultimo_data': None}
+    visitantes_media = 0
+    if eventos_query.exists():
+        contagens = ContagemAuditorio.objects.filter(dia__in=eventos_query)
+        media_a = contagens.aggregate(avg=Avg('quantidade_pessoas'))['avg']
+        auditorio['media'] = round(media_a or 0, 1)
+        # Última contagem
+        ultima_contagem = contagens.select_related('dia', 'usuario_registro').order_by('-dia__data').first()
+        if ultima_contagem:
+            auditorio['ultimo'] = ultima_contagem.quantidade_pessoas
+            auditorio['ultimo_usuario'] = ultima_contagem.usuario_registro.username
+            auditorio['ultimo_data'] = ultima_contagem.dia.data.isoformat()
         
+        # Contagem de visitantes por evento (média)
+        media_v = ContagemVisitantes.objects.filter(dia__in=eventos_query).aggregate(
+            avg=Avg('quantidade_visitantes')
+        )['avg']
+        visitantes_media = round(media_v or 0, 1)
+    return {
+        'auditorio': auditorio,
+        'visitantes': {'media': visitantes_media},
+    }
+
+
+def _widget_retencao(ano, data_inicio, data_fim, dia_especifico):
+    """Coortes de primeira visita e curva de retenção do ano (matriz de presenças)"""
+    return analytics.resumo_retencao(ano)
+
+
+# Widgets carregados de forma assíncrona pela página do dashboard
+DASHBOARD_WIDGETS = {
+    'genero': _widget_genero,
+    'pgs': _widget_pgs,
+    'imperios': _widget_imperios,
+    'evolucao': _widget_evolucao,
+    'contagens': _widget_contagens,
+    'retencao': _widget_retencao,
+}
+
+
+def _filtros_dashboard(request):
+    return (
+        get_ano_selecionado(request),
+        request.GET.get('data_inicio'),
+        request.GET.get('data_fim'),
+        request.GET.get('dia_especifico'),
+    )
+
+
+def _etag_dashboard_widget(request, widget):
+    """ETag muda apenas quando os filtros ou a versão dos dados mudam"""
+    return hash_partes([widget, list(_filtros_dashboard(request)), get_data_version()])
+
+
+@permission_required('adolescentes.view_dashboard', raise_exception=True)
+@login_required
+def dashboard(request):
+    """Dashboard: cards principais renderizados no servidor, gráficos carregados via API"""
+    ano, data_inicio, data_fim, dia_especifico = _filtros_dashboard(request)
+    readonly = is_ano_readonly(request)
+    
+    # Resultado cacheado por (ano, filtros, versão dos dados) com proteção contra stampede
+    dados = obter_ou_calcular(
+        'dashboard',
+        [ano, data_inicio, data_fim, dia_especifico],
+        lambda: _calcular_dashboard(ano, data_inicio, data_fim, dia_especifico),
+    )
+    
+    context = dict(dados)
+    # Datas voltam a ser date para os filtros |date do template
+    if context['ultimo_evento']:
+        context['ultimo_evento'] = {
+            **context['ultimo_evento'],
+            'data': date.fromisoformat(context['ultimo_evento']['data']),
+        }
+    
+    filtros_query = urlencode({
+        chave: valor for chave, valor in (
+            ('data_inicio', data_inicio), ('data_fim', data_fim), ('dia_especifico', dia_especifico)
+        ) if valor
+    })
+    context.update({
         # Ano selecionado
         'ano_selecionado': ano,
         'anos_disponiveis': ANOS_DISPONIVEIS,
@@ -1576,29 +1721,100 @@ def dashboard(request):
         'data_inicio': data_inicio,
         'data_fim': data_fim,
         'dia_especifico': dia_especifico,
-        'todos_eventos': todos_eventos,
+        'todos_eventos': DiaEvento.objects.order_by('-data'),
         
-        # Dados para gráficos
-        'genero_labels': genero_labels,
-        'genero_data': genero_data,
-        'pg_labels': pg_labels,
-        'pg_data': pg_data,
-        'presenca_por_evento': presenca_por_evento,
-        'evolucao_labels': evolucao_labels,
-        'evolucao_data': evolucao_data,
-        'evolucao_total': evolucao_total,
-        'imperio_labels': imperio_labels,
-        'imperio_data': imperio_data,
-        'contagem_auditorio_total': contagem_auditorio_total,
-        'contagem_auditorio_media': contagem_auditorio_media,
-        'contagem_auditorio_ultimo': contagem_auditorio_ultimo,
-        'contagem_auditorio_ultimo_usuario': contagem_auditorio_ultimo_usuario,
-        'contagem_auditorio_ultimo_data': contagem_auditorio_ultimo_data,
-        'contagem_visitantes_media': contagem_visitantes_media,
-    }
+        # Endpoints dos widgets (mesmos filtros da página)
+        'widget_urls': {
+            nome: f"{reverse('dashboard_widget', args=[nome])}?{filtros_query}"
+            for nome in DASHBOARD_WIDGETS
+        },
+        'serie_url': reverse('dashboard_serie'),
+    })
     
     return render(request, 'adolescentes/dashboard.html', context)
 
+
+@permission_required('adolescentes.view_dashboard', raise_exception=True)
+@login_required
+@require_http_methods(["GET"])
+@condition(etag_func=_etag_dashboard_widget)
+def dashboard_widget(request, widget):
+    """Dados de um gráfico/painel do dashboard em JSON (cacheável via ETag)"""
+    calcular = DASHBOARD_WIDGETS.get(widget)
+    if calcular is None:
+        return JsonResponse({'ok': False, 'error': 'Widget desconhecido'}, status=404)
+    
+    filtros = _filtros_dashboard(request)
+    # Sem valor stale: o ETag já é da versão atual e o navegador guardaria
+    # dados antigos sob ele até a próxima escrita
+    dados = obter_ou_calcular(
+        f'dashboard_{widget}', list(filtros), lambda: calcular(*filtros), permitir_stale=False,
+    )
+    response = JsonResponse({'ok': True, 'widget': widget, 'dados': dados})
+    # Sempre revalidar: o navegador reenvia If-None-Match e recebe 304 se nada mudou
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _filtros_serie(request):
+    periodo = request.GET.get('periodo', 'semana')
+    if periodo not in agregacoes.TRUNCAMENTOS:
+        periodo = 'semana'
+    try:
+        janela = min(max(int(request.GET.get('media_movel', 4)), 1), 52)
+    except ValueError:
+        janela = 4
+    return (
+        periodo,
+        get_ano_selecionado(request),
+        request.GET.get('data_inicio') or None,
+        request.GET.get('data_fim') or None,
+        janela,
+    )
+
+
+def _etag_dashboard_serie(request):
+    return hash_partes(['serie', list(_filtros_serie(request)), get_data_version()])
+
+
+@permission_required('adolescentes.view_dashboard', raise_exception=True)
+@login_required
+@require_http_methods(["GET"])
+@condition(etag_func=_etag_dashboard_serie)
+def dashboard_serie(request):
+    """
+    Série de presenças por semana/mês/trimestre com média móvel, em JSON.
+    Parâmetros: periodo, data_inicio, data_fim (opcionais) e media_movel (janela).
+    """
+    periodo, ano, data_inicio, data_fim, janela = _filtros_serie(request)
+    try:
+        for valor in (data_inicio, data_fim):
+            if valor:
+                date.fromisoformat(valor)
+    except ValueError:
+        return JsonResponse({'ok': False, 'error': 'Data inválida'}, status=400)
+
+    dados = obter_ou_calcular(
+        'dashboard_serie', [periodo, ano, data_inicio, data_fim, janela],
+        lambda: agregacoes.serie_presencas(periodo, ano=ano, data_inicio=data_inicio, data_fim=data_fim, janela=janela),
+        permitir_stale=False,  # ver dashboard_widget
+    )
+    response = JsonResponse({'ok': True, 'dados': dados})
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@permission_required('adolescentes.view_dashboard', raise_exception=True)
+@login_required
+def dashboard_cache_stats(request):
+    """Contadores de hit/miss do cache do dashboard"""
+    return JsonResponse({
+        'ok': True,
+        'data_version': get_data_version(),
+        'dashboard': estatisticas_cache('dashboard'),
+        'widgets': {nome: estatisticas_cache(f'dashboard_{nome}') for nome in DASHBOARD_WIDGETS},
+    })
+
 @permission_required('adolescentes.add_contagemauditorio', raise_exception=True)
 @login_required
 def contagem_auditorio(request):
@@ -1651,19 +1867,11 @@ def lista_eventos_especiais(request):
     ano = get_ano_selecionado(request)
     readonly = is_ano_readonly(request)
     
+    # Totais vêm dos contadores do próprio evento (uma query só)
     eventos = EventoEspecial.objects.filter(ano=ano).order_by('-data')
     
-    # Adicionar contagem de visitantes para cada evento
-    eventos_com_stats = []
-    for evento in eventos:
-        eventos_com_stats.append({
-            'evento': evento,
-            'total_visitantes': evento.total_visitantes(),
-            'total_presentes': evento.total_presentes(),
-        })
-    
     context = {
-        'eventos': eventos_com_stats,
+        'eventos': eventos,
         'ano_selecionado': ano,
         'readonly': readonly,
     }
@@ -1743,15 +1951,15 @@ def checkin_evento_especial(request, evento_id):
         'filtro': filtro,
         'readonly': readonly,
         'ano_selecionado': ano,
-        'total_visitantes': evento.total_visitantes(),
-        'total_presentes': evento.total_presentes(),
+        'total_visitantes': evento.total_visitantes,
+        'total_presentes': evento.total_presentes,
     }
     return render(request, 'eventos/checkin_evento.html', context)
 
 
 @login_required
 def exportar_visitantes_evento_csv(request, evento_id):
-    """Exporta os visitantes de um evento especial em CSV."""
+    """Exporta os visitantes de um evento especial em CSV ou XLSX (?formato=xlsx)."""
     evento = get_object_or_404(EventoEspecial, pk=evento_id)
 
     visitantes = evento.visitantes.all()
@@ -1774,12 +1982,7 @@ def exportar_visitantes_evento_csv(request, evento_id):
 
     nome_evento = slugify(evento.nome) or 'evento-especial'
     data_evento = evento.data.strftime('%d_%m_%Y')
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = f'attachment; filename="visitantes_{nome_evento}_{data_evento}.csv"'
-    response.write('\ufeff')
-
-    writer = csv.writer(response)
-    writer.writerow([
+    cabecalho = [
         'Nome',
         'Sobrenome',
         'Data de Nascimento',
@@ -1788,7 +1991,26 @@ def exportar_visitantes_evento_csv(request, evento_id):
         'Presente',
         'Migrado',
         'Observações',
-    ])
+    ]
+
+    if exports.formato_exportacao(request) == 'xlsx':
+        linhas = itertools.chain([cabecalho], (
+            [
+                v.nome, v.sobrenome, v.data_nascimento, v.telefone or '', v.convidado_por or '',
+                'Sim' if v.presente else 'Não', 'Sim' if v.migrado else 'Não', v.observacoes or '',
+            ]
+            for v in visitantes.iterator(chunk_size=exports.CHUNK_SIZE)
+        ))
+        return exports.resposta_exportacao(
+            linhas, f'visitantes_{nome_evento}_{data_evento}', 'xlsx', planilha='Visitantes',
+        )
+
+    response = HttpResponse(content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="visitantes_{nome_evento}_{data_evento}.csv"'
+    response.write('\ufeff')
+
+    writer = csv.writer(response)
+    writer.writerow(cabecalho)
 
     for visitante in visitantes:
         writer.writerow([
@@ -1832,6 +2054,124 @@ def cadastrar_visitante_evento(request, evento_id):
     return render(request, 'eventos/cadastrar_visitante.html', context)
 
 
+@login_required
+def kiosk_visitantes(request, evento_id):
+    """Tela de quiosque: cadastro contínuo de visitantes na entrada do evento."""
+    evento = get_object_or_404(EventoEspecial, pk=evento_id)
+    if is_ano_readonly(request):
+        messages.error(request, "Não é possível cadastrar visitantes em eventos de anos anteriores.")
+        return redirect('checkin_evento_especial', evento_id=evento.id)
+    return render(request, 'eventos/kiosk.html', {
+        'evento': evento,
+        'form': VisitanteEventoForm(),
+        'totais': _totais_kiosk(evento),
+    })
+
+
+def _totais_kiosk(evento):
+    pendentes = kiosk.buffer.pendentes(evento.id)
+    return {
+        'total_visitantes': evento.total_visitantes + pendentes,
+        'total_presentes': evento.total_presentes + pendentes,
+        'pendentes': pendentes,
+    }
+
+
+@login_required
+@require_http_methods(["GET", "POST"])
+def kiosk_registrar_visitante(request, evento_id):
+    """
+    Endpoint do quiosque. POST (JSON com os campos do visitante): revalida com o
+    VisitanteEventoForm e enfileira no buffer de gravação, respondendo na hora.
+    GET: só os totais do evento (incluindo os ainda no buffer).
+    """
+    evento = get_object_or_404(EventoEspecial, pk=evento_id)
+    if request.method == 'GET':
+        evento.refresh_from_db(fields=['total_visitantes', 'total_presentes'])
+        return JsonResponse({'ok': True, **_totais_kiosk(evento)})
+    if is_ano_readonly(request):
+        return JsonResponse({'ok': False, 'error': 'Ano somente leitura'}, status=403)
+    try:
+        dados = json.loads(request.body.decode('utf-8'))
+        if not isinstance(dados, dict):
+            raise ValueError
+    except Exception:
+        return JsonResponse({'ok': False, 'error': 'Dados inválidos'}, status=400)
+
+    dados['presente'] = True
+    form = VisitanteEventoForm(data=dados)
+    if not form.is_valid():
+        return JsonResponse({'ok': False, 'erros': form.errors.get_json_data()}, status=400)
+    visitante = form.save(commit=False)
+    visitante.evento = evento
+    kiosk.buffer.adicionar(visitante)
+    evento.refresh_from_db(fields=['total_visitantes', 'total_presentes'])
+    return JsonResponse({'ok': True, 'nome': visitante.nome_completo(), **_totais_kiosk(evento)}, status=202)
+
+
+@login_required
+def importar_visitantes_evento(request, evento_id):
+    """
+    Importa a lista de convidados de um evento especial por planilha, com o
+    mesmo fluxo da importação de adolescentes (simulação -> confirmação).
+    """
+    evento = get_object_or_404(EventoEspecial, pk=evento_id)
+    if is_ano_readonly(request):
+        messages.error(request, "Não é possível cadastrar visitantes em eventos de anos anteriores.")
+        return redirect('checkin_evento_especial', evento_id=evento.id)
+
+    chave_sessao = f'importacao_visitantes_{evento.id}'
+    resultado = None
+    upload = None
+
+    def validar(linhas):
+        return importacao.validar_visitantes(linhas, evento, presente_padrao=upload.get('presentes', False))
+
+    if request.method == 'POST':
+        if 'cancelar' in request.POST:
+            _descartar_upload(request, chave_sessao)
+            return redirect('importar_visitantes_evento', evento_id=evento.id)
+
+        if 'confirmar' in request.POST:
+            upload = request.session.get(chave_sessao)
+            if not upload:
+                messages.error(request, "Envie a planilha novamente.")
+                return redirect('importar_visitantes_evento', evento_id=evento.id)
+            resultado = _ler_upload(upload, validar)
+            importacao.importar_visitantes(resultado)
+            _descartar_upload(request, chave_sessao)
+            messages.success(
+                request,
+                f"{resultado.criados} visitante(s) importado(s); "
+                f"{len(resultado.duplicados)} duplicado(s) e {len(resultado.erros)} linha(s) com erro ignorados.",
+            )
+            return redirect('checkin_evento_especial', evento_id=evento.id)
+
+        arquivo = request.FILES.get('arquivo')
+        if not arquivo or not arquivo.name.lower().endswith(importacao.EXTENSOES):
+            messages.error(request, "Envie um arquivo .csv ou .xlsx.")
+            return redirect('importar_visitantes_evento', evento_id=evento.id)
+        upload = _guardar_upload(request, chave_sessao, arquivo)
+        upload['presentes'] = bool(request.POST.get('presentes'))
+        request.session[chave_sessao] = upload
+        try:
+            resultado = _ler_upload(upload, validar)
+        except Exception:
+            _descartar_upload(request, chave_sessao)
+            messages.error(request, "Não foi possível ler a planilha. Verifique o formato do arquivo.")
+            return redirect('importar_visitantes_evento', evento_id=evento.id)
+
+    return render(request, 'eventos/importar_visitantes.html', {
+        'evento': evento,
+        'resultado': resultado,
+        'upload': upload,
+        'erros': resultado.erros[:LIMITE_RELATORIO_IMPORTACAO] if resultado else [],
+        'duplicados': resultado.duplicados[:LIMITE_RELATORIO_IMPORTACAO] if resultado else [],
+        'previa': resultado.validos[:LIMITE_RELATORIO_IMPORTACAO] if resultado else [],
+        'ja_adolescentes': sum(1 for v in resultado.validos if v.adolescente_existente) if resultado else 0,
+    })
+
+
 @login_required
 @permission_required('adolescentes.change_adolescente', raise_exception=True)
 def editar_visitante_evento(request, visitante_id):
@@ -1892,14 +2232,49 @@ def atualizar_presenca_visitante(request):
         if is_ano_readonly(request):
             return JsonResponse({'ok': False, 'error': 'Ano somente leitura'}, status=403)
         
-        visitante.presente = presente
-        visitante.save()
+        totais_eventos.definir_presenca(visitante.pk, presente)
+        invalidar_dados()
         
         return JsonResponse({'ok': True})
     except Exception as e:
         return JsonResponse({'ok': False, 'error': str(e)}, status=500)
 
 
+# Máximo de marcações aceitas por requisição em lote
+LIMITE_PRESENCAS_LOTE = 500
+
+
+@login_required
+@require_http_methods(["POST"])
+def atualizar_presencas_visitantes(request, evento_id):
+    """
+    Marca/desmarca a presença de vários visitantes do evento de uma vez.
+    Corpo JSON: ``{"presencas": [{"id": 1, "presente": true}, ...]}`` (a última
+    marcação de cada visitante vale). Responde com os totais atualizados.
+    """
+    evento = get_object_or_404(EventoEspecial, pk=evento_id)
+    if is_ano_readonly(request):
+        return JsonResponse({'ok': False, 'error': 'Ano somente leitura'}, status=403)
+    try:
+        payload = json.loads(request.body.decode('utf-8'))
+        presencas = {int(item['id']): bool(item['presente']) for item in payload['presencas']}
+    except Exception:
+        return JsonResponse({'ok': False, 'error': 'Lote inválido'}, status=400)
+    if len(presencas) > LIMITE_PRESENCAS_LOTE:
+        return JsonResponse({'ok': False, 'error': f'Máximo de {LIMITE_PRESENCAS_LOTE} por lote'}, status=400)
+
+    alterados = totais_eventos.definir_presencas(evento.id, presencas)
+    if alterados:
+        invalidar_dados()
+    evento.refresh_from_db(fields=['total_visitantes', 'total_presentes'])
+    return JsonResponse({
+        'ok': True,
+        'alterados': alterados,
+        'total_presentes': evento.total_presentes,
+        'total_visitantes': evento.total_visitantes,
+    })
+
+
 @login_required
 @permission_required('adolescentes.add_adolescente', raise_exception=True)
 def migrar_visitantes(request, evento_id):
@@ -1921,34 +2296,35 @@ def migrar_visitantes(request, evento_id):
             messages.warning(request, "Selecione pelo menos um visitante para migrar.")
             return redirect('migrar_visitantes', evento_id=evento.id)
         
-        migrados = 0
-        with transaction.atomic():
-            for visitante_id in visitantes_ids:
-                visitante = VisitanteEvento.objects.get(id=visitante_id, evento=evento, migrado=False)
-                
-                # Criar adolescente
-                adolescente = Adolescente.objects.create(
-                    nome=visitante.nome,
-                    sobrenome=visitante.sobrenome,
-                    data_nascimento=visitante.data_nascimento,
-                    telefone=visitante.telefone,
-                    ano=ano
-                )
-                
-                # Marcar visitante como migrado
-                visitante.migrado = True
-                visitante.adolescente_migrado = adolescente
-                visitante.save()
-                
-                migrados += 1
-        
-        messages.success(request, f"{migrados} visitante(s) migrado(s) para a tabela principal com sucesso!")
-        return redirect('checkin_evento_especial', evento_id=evento.id)
+        dia = None
+        dia_id = request.POST.get('dia', '')
+        if dia_id:
+            dia = DiaEvento.objects.filter(pk=dia_id, ano=ano).first() if dia_id.isdigit() else None
+            if dia is None:
+                messages.error(request, "Dia de evento inválido para o check-in.")
+                return redirect('migrar_visitantes', evento_id=evento.id)
+
+        resultado = migracao_visitantes.migrar_visitantes(evento, visitantes_ids, ano, dia=dia)
+        if resultado.migrados:
+            mensagem = f"{resultado.migrados} visitante(s) migrado(s) para a tabela principal com sucesso!"
+            if resultado.vinculados:
+                mensagem += f" {resultado.vinculados} já estava(m) cadastrado(s) e foi(ram) apenas vinculado(s)."
+            if dia is not None:
+                mensagem += f" Check-in registrado em {dia.data:%d/%m/%Y}."
+            messages.success(request, mensagem)
+        if not resultado.erros:
+            return redirect('checkin_evento_especial', evento_id=evento.id)
+        messages.warning(request, f"{len(resultado.erros)} visitante(s) não puderam ser migrados.")
+        erros = resultado.erros
+    else:
+        erros = []
     
     context = {
         'evento': evento,
         'visitantes': visitantes_disponiveis,
         'total_disponiveis': visitantes_disponiveis.count(),
+        'dias': DiaEvento.objects.filter(ano=ano).order_by('-data'),
+        'erros': erros,
     }
     return render(request, 'eventos/migrar_visitantes.html', context)
 
@@ -1959,47 +2335,27 @@ def estatisticas_convites(request, evento_id):
     evento = get_object_or_404(EventoEspecial, pk=evento_id)
     
     # Agrupar por quem convidou e contar
-    from django.db.models import Count
-    
-    estatisticas = (
-        VisitanteEvento.objects
-        .filter(evento=evento, convidado_por__isnull=False)
-        .exclude(convidado_por='')
-        .values('convidado_por')
-        .annotate(
-            total_convidados=Count('id'),
-            total_presentes=Count('id', filter=Q(presente=True)),
-            total_migrados=Count('id', filter=Q(migrado=True))
-        )
-        .order_by('-total_convidados')
-    )
+    estatisticas = exports.estatisticas_convites(evento)
     
     # Calcular totais gerais
-    total_visitantes = evento.visitantes.count()
-    total_com_convite = evento.visitantes.filter(convidado_por__isnull=False).exclude(convidado_por='').count()
+    total_visitantes = evento.total_visitantes
+    total_com_convite = evento.visitantes.filter(convidador__isnull=False).count()
     total_sem_convite = total_visitantes - total_com_convite
     
-    # Exportar CSV se solicitado
-    if request.GET.get('export') == 'csv':
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="estatisticas_convites_{evento.nome.replace(" ", "_")}.csv"'
-        response.write('\ufeff')  # BOM para UTF-8
-        
-        writer = csv.writer(response)
-        writer.writerow(['Posição', 'Nome', 'Total Convidados', 'Presentes', 'Migrados', 'Taxa Presença (%)'])
-        
-        for idx, stat in enumerate(estatisticas, 1):
-            taxa_presenca = (stat['total_presentes'] / stat['total_convidados'] * 100) if stat['total_convidados'] > 0 else 0
-            writer.writerow([
-                idx,
-                stat['convidado_por'],
-                stat['total_convidados'],
-                stat['total_presentes'],
-                stat['total_migrados'],
-                f"{taxa_presenca:.1f}"
-            ])
-        
-        return response
+    # Exportar CSV/XLSX se solicitado (em segundo plano quando há muitos convidadores)
+    formato = request.GET.get('export')
+    if formato in exports.FORMATOS:
+        nome_arquivo = f'estatisticas_convites_{evento.nome.replace(" ", "_")}'
+        if estatisticas.count() > tarefas.limite_sincrono():
+            tarefa = tarefas.solicitar_exportacao(
+                'estatisticas_convites', {'evento_id': evento.pk, 'formato': formato},
+                f'{nome_arquivo}.{formato}', request.user,
+            )
+            return redirect('tarefa_exportacao', tarefa.pk)
+        return exports.resposta_exportacao(
+            exports.linhas_estatisticas_convites(estatisticas, tipado=formato == 'xlsx'),
+            nome_arquivo, formato, content_type_csv='text/csv', planilha='Convites',
+        )
     
     context = {
         'evento': evento,
@@ -2009,3 +2365,156 @@ def estatisticas_convites(request, evento_id):
         'total_sem_convite': total_sem_convite,
     }
     return render(request, 'eventos/estatisticas_convites.html', context)
+
+
+@login_required
+def ranking_convidadores(request):
+    """Ranking de quem mais convidou, somando todos os eventos especiais do ano."""
+    ano = get_ano_selecionado(request)
+    ranking = convidadores.ranking_ano(ano)
+
+    formato = request.GET.get('export')
+    if formato in exports.FORMATOS:
+        return exports.resposta_exportacao(
+            exports.linhas_ranking_convidadores(ranking),
+            f'ranking_convidadores_{ano}', formato, content_type_csv='text/csv', planilha='Convidadores',
+        )
+
+    ranking = list(ranking)
+    return render(request, 'eventos/ranking_convidadores.html', {
+        'ranking': ranking,
+        'total_eventos': EventoEspecial.objects.filter(ano=ano).count(),
+        'total_convidados': sum(item['total_convidados'] for item in ranking),
+        'ano_selecionado': ano,
+    })
+
+
+# --- Exportações em segundo plano ---
+
+def _tarefa_do_usuario(request, tarefa_id):
+    tarefa = get_object_or_404(TarefaExportacao, pk=tarefa_id)
+    if tarefa.criado_por_id not in (None, request.user.id) and not request.user.is_staff:
+        raise Http404
+    return tarefa
+
+
+@login_required
+def tarefa_exportacao(request, tarefa_id):
+    """Acompanhamento de uma exportação em segundo plano (HTML ou ?formato=json para polling)."""
+    tarefa = _tarefa_do_usuario(request, tarefa_id)
+    download_url = reverse('baixar_exportacao', args=[tarefa.pk]) if tarefa.status == 'concluida' else None
+    if request.GET.get('formato') == 'json':
+        return JsonResponse({
+            'id': str(tarefa.pk),
+            'status': tarefa.status,
+            'status_display': tarefa.get_status_display(),
+            'total_linhas': tarefa.total_linhas,
+            'erro': tarefa.erro,
+            'download_url': download_url,
+        })
+    return render(request, 'adolescentes/tarefa_exportacao.html', {
+        'tarefa': tarefa,
+        'download_url': download_url,
+    })
+
+
+@login_required
+def baixar_exportacao(request, tarefa_id):
+    tarefa = _tarefa_do_usuario(request, tarefa_id)
+    if tarefa.status != 'concluida' or not tarefa.arquivo:
+        return redirect('tarefa_exportacao', tarefa.pk)
+    formato = 'xlsx' if tarefa.nome_arquivo.endswith('.xlsx') else 'csv'
+    return FileResponse(
+        tarefa.arquivo.open('rb'),
+        as_attachment=True,
+        filename=tarefa.nome_arquivo,
+        content_type=exports.content_type_exportacao(formato),
+    )
+
+
+# --- Importação em massa ---
+
+# Linhas de erro/duplicado exibidas no relatório da simulação
+LIMITE_RELATORIO_IMPORTACAO = 200
+
+
+def _guardar_upload(request, chave_sessao, arquivo):
+    """Guarda a planilha enviada no storage até a confirmação (upload -> simulação -> gravação)."""
+    anterior = request.session.pop(chave_sessao, None)
+    if anterior:
+        storage_exportacoes().delete(anterior['caminho'])
+    extensao = os.path.splitext(arquivo.name)[1].lower()
+    caminho = storage_exportacoes().save(f'importacoes/{uuid.uuid4().hex}{extensao}', arquivo)
+    request.session[chave_sessao] = {'caminho': caminho, 'nome': arquivo.name}
+    return request.session[chave_sessao]
+
+
+def _ler_upload(upload, validar):
+    with storage_exportacoes().open(upload['caminho'], 'rb') as arquivo:
+        return validar(importacao.ler_planilha(arquivo, upload['nome']))
+
+
+def _descartar_upload(request, chave_sessao):
+    upload = request.session.pop(chave_sessao, None)
+    if upload:
+        storage_exportacoes().delete(upload['caminho'])
+
+
+@permission_required('adolescentes.add_adolescente', raise_exception=True)
+@login_required
+def importar_adolescentes(request):
+    """
+    Importação de adolescentes por planilha: o upload gera uma simulação
+    (válidos, erros e duplicados, sem gravar); a confirmação revalida o mesmo
+    arquivo e grava os válidos com bulk_create em lotes.
+    """
+    ano = get_ano_selecionado(request)
+    if is_ano_readonly(request):
+        messages.error(request, "Não é possível importar adolescentes em anos anteriores.")
+        return redirect('listar_adolescentes')
+
+    chave_sessao = 'importacao_adolescentes'
+    validar = lambda linhas: importacao.validar_adolescentes(linhas, ano)
+    resultado = None
+    upload = None
+
+    if request.method == 'POST':
+        if 'cancelar' in request.POST:
+            _descartar_upload(request, chave_sessao)
+            return redirect('importar_adolescentes')
+
+        if 'confirmar' in request.POST:
+            upload = request.session.get(chave_sessao)
+            if not upload:
+                messages.error(request, "Envie a planilha novamente.")
+                return redirect('importar_adolescentes')
+            resultado = _ler_upload(upload, validar)
+            importacao.importar_adolescentes(resultado)
+            _descartar_upload(request, chave_sessao)
+            messages.success(
+                request,
+                f"{resultado.criados} adolescente(s) importado(s); "
+                f"{len(resultado.duplicados)} duplicado(s) e {len(resultado.erros)} linha(s) com erro ignorados.",
+            )
+            return redirect('listar_adolescentes')
+
+        arquivo = request.FILES.get('arquivo')
+        if not arquivo or not arquivo.name.lower().endswith(importacao.EXTENSOES):
+            messages.error(request, "Envie um arquivo .csv ou .xlsx.")
+            return redirect('importar_adolescentes')
+        upload = _guardar_upload(request, chave_sessao, arquivo)
+        try:
+            resultado = _ler_upload(upload, validar)
+        except Exception:
+            _descartar_upload(request, chave_sessao)
+            messages.error(request, "Não foi possível ler a planilha. Verifique o formato do arquivo.")
+            return redirect('importar_adolescentes')
+
+    return render(request, 'adolescentes/importar.html', {
+        'resultado': resultado,
+        'upload': upload,
+        'erros': resultado.erros[:LIMITE_RELATORIO_IMPORTACAO] if resultado else [],
+        'duplicados': resultado.duplicados[:LIMITE_RELATORIO_IMPORTACAO] if resultado else [],
+        'amostra': resultado.validos[:20] if resultado else [],
+        'ano_selecionado': ano,
+    })
@@ -0,0 +1,276 @@
+"""
+Escritor (e leitor mínimo) de planilhas XLSX em streaming, sem dependências externas.
+
+Gera um SpreadsheetML mínimo (uma planilha, strings inline, sem sharedStrings)
+direto num ZIP não-seekable: as linhas são comprimidas e entregues conforme são
+lidas, com memória limitada ao buffer do compressor.
+
+Tipos das células:
+- ``date``/``datetime`` viram números seriais com formato dd/mm/aaaa (Excel não
+  reinterpreta a data);
+- ``int``/``float``/``Decimal`` viram números;
+- ``bool`` vira booleano;
+- ``None`` vira célula vazia; o resto é texto.
+"""
+import posixpath
+import re
+import zipfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Linhas acumuladas antes de escrever/drenar o ZIP
+LINHAS_POR_ESCRITA = 500
+
+_EPOCA_EXCEL = datetime(1899, 12, 30)
+_CARACTERES_INVALIDOS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+# Índices em cellXfs (styles.xml)
+ESTILO_DATA = 1
+ESTILO_DATA_HORA = 2
+ESTILO_CABECALHO = 3
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{nome}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="2">'
+    '<numFmt numFmtId="164" formatCode="dd/mm/yyyy"/>'
+    '<numFmt numFmtId="165" formatCode="dd/mm/yyyy hh:mm"/>'
+    '</numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '</cellXfs>'
+    '</styleSheet>'
+)
+
+_INICIO_PLANILHA = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetViews><sheetView workbookViewId="0">'
+    '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+    '</sheetView></sheetViews>'
+    '<sheetData>'
+)
+_FIM_PLANILHA = '</sheetData></worksheet>'
+
+
+class ZipStream:
+    """
+    Destino não-seekable para ``zipfile.ZipFile``: acumula os bytes escritos e
+    os entrega com ``drenar()``, permitindo gerar um ZIP em streaming.
+    """
+
+    def __init__(self):
+        self._partes = []
+        self._posicao = 0
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self._posicao
+
+    def flush(self):
+        pass
+
+    def drenar(self):
+        dados = b''.join(self._partes)
+        self._partes = []
+        return dados
+
+
+def _texto(valor):
+    return escape(_CARACTERES_INVALIDOS.sub('', str(valor)))
+
+
+def celula(valor, estilo=None):
+    """XML de uma célula tipada (sem referência: a posição é implícita)."""
+    atributo_estilo = f' s="{estilo}"' if estilo else ''
+    if valor is None or valor == '':
+        return '<c/>'
+    if isinstance(valor, bool):
+        return f'<c t="b"{atributo_estilo}><v>{int(valor)}</v></c>'
+    if isinstance(valor, datetime):
+        serial = (valor.replace(tzinfo=None) - _EPOCA_EXCEL).total_seconds() / 86400
+        return f'<c s="{ESTILO_DATA_HORA}"><v>{serial!r}</v></c>'
+    if isinstance(valor, date):
+        return f'<c s="{ESTILO_DATA}"><v>{(valor - _EPOCA_EXCEL.date()).days}</v></c>'
+    if isinstance(valor, (int, float, Decimal)):
+        return f'<c{atributo_estilo}><v>{valor}</v></c>'
+    return f'<c t="inlineStr"{atributo_estilo}><is><t xml:space="preserve">{_texto(valor)}</t></is></c>'
+
+
+def linha_xml(numero, valores, estilo=None):
+    return f'<row r="{numero}">' + ''.join(celula(valor, estilo) for valor in valores) + '</row>'
+
+
+def linhas_xlsx(linhas, nome_planilha='Dados', cabecalho=True, linhas_por_escrita=LINHAS_POR_ESCRITA):
+    """
+    Gera os bytes de um .xlsx a partir de um iterável de linhas (listas de
+    valores). Com ``cabecalho``, a primeira linha sai em negrito e congelada.
+    """
+    destino = ZipStream()
+    nome_planilha = re.sub(r'[\[\]:*?/\\]', '', nome_planilha)[:31] or 'Dados'
+    nome_planilha = _texto(nome_planilha).replace('"', '&quot;')
+    with zipfile.ZipFile(destino, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        zf.writestr('_rels/.rels', _RELS)
+        zf.writestr('xl/workbook.xml', _WORKBOOK.format(nome=nome_planilha))
+        zf.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        zf.writestr('xl/styles.xml', _STYLES)
+
+        with zf.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as planilha:
+            planilha.write(_INICIO_PLANILHA.encode('utf-8'))
+            pendentes = []
+            for numero, valores in enumerate(linhas, start=1):
+                estilo = ESTILO_CABECALHO if cabecalho and numero == 1 else None
+                pendentes.append(linha_xml(numero, valores, estilo))
+                if len(pendentes) >= linhas_por_escrita:
+                    planilha.write(''.join(pendentes).encode('utf-8'))
+                    pendentes = []
+                    dados = destino.drenar()
+                    if dados:
+                        yield dados
+            planilha.write((''.join(pendentes) + _FIM_PLANILHA).encode('utf-8'))
+    yield destino.drenar()
+
+
+# --- Leitura ---
+
+_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_NS_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+def data_do_serial(serial):
+    """Converte um número serial do Excel em ``date``."""
+    return (_EPOCA_EXCEL + timedelta(days=float(serial))).date()
+
+
+def _indice_coluna(referencia):
+    indice = 0
+    for letra in referencia:
+        if not letra.isalpha():
+            break
+        indice = indice * 26 + (ord(letra.upper()) - 64)
+    return indice - 1
+
+
+def _caminho_primeira_planilha(zf):
+    workbook = ElementTree.fromstring(zf.read('xl/workbook.xml'))
+    primeira = workbook.find(f'{_NS}sheets/{_NS}sheet')
+    rid = primeira.get(f'{_NS_REL}id') if primeira is not None else None
+    try:
+        rels = ElementTree.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    except KeyError:
+        return 'xl/worksheets/sheet1.xml'
+    for rel in rels.iter(f'{_NS_PKG_REL}Relationship'):
+        if rel.get('Id') == rid:
+            alvo = rel.get('Target')
+            return alvo.lstrip('/') if alvo.startswith('/') else posixpath.normpath(posixpath.join('xl', alvo))
+    return 'xl/worksheets/sheet1.xml'
+
+
+def _texto_rico(elemento):
+    return ''.join(t.text or '' for t in elemento.iter(f'{_NS}t'))
+
+
+def ler_linhas_xlsx(arquivo):
+    """
+    Lê a primeira planilha de um .xlsx linha a linha (iterparse), devolvendo
+    listas de valores: texto como ``str``, números como ``int``/``float`` (datas
+    chegam como serial: use ``data_do_serial``), booleanos como ``bool``.
+    """
+    with zipfile.ZipFile(arquivo) as zf:
+        compartilhadas = []
+        if 'xl/sharedStrings.xml' in zf.namelist():
+            with zf.open('xl/sharedStrings.xml') as f:
+                for _, elemento in ElementTree.iterparse(f):
+                    if elemento.tag == f'{_NS}si':
+                        compartilhadas.append(_texto_rico(elemento))
+                        elemento.clear()
+
+        with zf.open(_caminho_primeira_planilha(zf)) as f:
+            for _, elemento in ElementTree.iterparse(f):
+                if elemento.tag != f'{_NS}row':
+                    continue
+                valores = []
+                for posicao, celula in enumerate(elemento.iter(f'{_NS}c')):
+                    referencia = celula.get('r')
+                    coluna = _indice_coluna(referencia) if referencia else posicao
+                    tipo = celula.get('t')
+                    v = celula.find(f'{_NS}v')
+                    if tipo == 'inlineStr':
+                        valor = _texto_rico(celula)
+                    elif v is None or v.text is None:
+                        valor = None
+                    elif tipo == 's':
+                        valor = compartilhadas[int(v.text)]
+                    elif tipo == 'b':
+                        valor = v.text == '1'
+                    elif tipo in ('str', 'e'):
+                        valor = v.text
+                    else:
+                        numero = float(v.text)
+                        valor = int(numero) if numero.is_integer() else numero
+                    valores.extend([None] * (coluna - len(valores)))
+                    valores.append(valor)
+                elemento.clear()
+                yield valores
@@ -174,6 +174,23 @@ else:
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Exportações em segundo plano (adolescentes/tarefas.py): acima do limite de
+# linhas a exportação vira uma tarefa executada num pool de threads do processo
+EXPORTACAO_LIMITE_SINCRONO = int(os.environ.get('EXPORTACAO_LIMITE_SINCRONO', 2000))
+EXPORTACAO_WORKERS = int(os.environ.get('EXPORTACAO_WORKERS', 2))
+
+# Fotos enviadas (adolescentes/otimizacao_fotos.py): reduzidas a FOTOS_LADO_MAXIMO px
+# e recodificadas (JPEG ou WEBP) num pool de threads antes de irem para o storage
+FOTOS_LADO_MAXIMO = int(os.environ.get('FOTOS_LADO_MAXIMO', 1600))
+FOTOS_FORMATO = os.environ.get('FOTOS_FORMATO', 'JPEG')
+FOTOS_QUALIDADE = int(os.environ.get('FOTOS_QUALIDADE', 85))
+FOTOS_WORKERS = int(os.environ.get('FOTOS_WORKERS', 2))
+
+# Quiosque de visitantes (adolescentes/kiosk.py): cadastros são gravados em lote
+# ao juntar KIOSK_BUFFER_TAMANHO ou após KIOSK_BUFFER_ESPERA segundos (0 desliga o buffer)
+KIOSK_BUFFER_TAMANHO = int(os.environ.get('KIOSK_BUFFER_TAMANHO', 20))
+KIOSK_BUFFER_ESPERA = float(os.environ.get('KIOSK_BUFFER_ESPERA', 2))
+
 # Cloudinary storage para produção (Railway tem filesystem efêmero)
 if os.environ.get('CLOUDINARY_CLOUD_NAME'):
     CLOUDINARY_STORAGE = {
@@ -190,8 +207,24 @@ if os.environ.get('CLOUDINARY_CLOUD_NAME'):
         'staticfiles': {
             'BACKEND': STATICFILES_STORAGE,
         },
+        # Exportações (CSV/XLSX) não são imagens: vão como arquivos "raw"
+        'exportacoes': {
+            'BACKEND': 'cloudinary_storage.storage.RawMediaCloudinaryStorage',
+        },
     }
 
+# Cache (dashboard, estatísticas e demais resultados versionados por data_version).
+# Fica no banco por padrão: a versão dos dados, os locks e os resultados precisam
+# ser os mesmos em todos os workers do gunicorn (um LocMemCache por processo
+# deixaria cada worker com a sua versão e serviria dados antigos após escritas
+# feitas no outro). A tabela é criada no deploy (python manage.py createcachetable).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'cache_dados'),
+    }
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -8,6 +8,15 @@ DATABASES = {
     }
 }
 
+# Um só processo nos testes: cache em memória (o DatabaseCache somaria as próprias
+# queries às contadas por django_assert_num_queries)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "checkin-jump-testes",
+    }
+}
+
 # Speed up password hashing in tests
 PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.MD5PasswordHasher",